@@ -1,13 +1,23 @@
 # file: ai_extraction/gemini_client.py
+import asyncio
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, partial
+from typing import Dict, Any, List, Optional, Tuple, Union
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from loguru import logger
 from common.config import settings
-from common.utils import normalize_whitespace
+from common.utils import normalize_whitespace, hash_string
 from ai_extraction.normalize import filter_to_schema  # new import
+from datastore.cache import DiskCache
+from datastore.crypto import get_fernet
+from datastore.storage import BASE_DIR
 
 # --------------------------
 # Gemini API endpoint (v1beta)
@@ -19,7 +29,10 @@ GEMINI_ENDPOINT = (
 
 class GeminiError(Exception):
     """Custom error class for Gemini-related issues."""
-    pass
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds, from a Retry-After header
 
 
 # --------------------------
@@ -33,107 +46,479 @@ def _load_json(path: str) -> Any:
 
 
 # Load canonical schema & few-shot examples
-CANONICAL = _load_json("ai_extraction/prompts/canonical_schema.json")
-FEW_SHOTS = _load_json("ai_extraction/prompts/few_shots.json")
+SCHEMA_PATH = "ai_extraction/prompts/canonical_schema.json"
+FEW_SHOTS_PATH = "ai_extraction/prompts/few_shots.json"
+CANONICAL = _load_json(SCHEMA_PATH)
+FEW_SHOTS = _load_json(FEW_SHOTS_PATH)
+
+SYS_RULES = (
+    "You are an expert document parser for admission and institutional forms. "
+    "Return ONLY valid JSON — no explanations or text outside JSON. "
+    "Use exactly these field names from the canonical schema. "
+    "Each field must have 'value', 'confidence' (0–1), and 'rationale' (<=15 words). "
+    "If a field is missing, leave 'value' empty and confidence=0. "
+    "Be robust to OCR noise, formatting errors, and partial labels."
+)
 
+COMPACT = (",", ":")
 
-def _make_prompt(ocr_text: str, hints: Optional[Dict] = None) -> Dict:
+
+@lru_cache(maxsize=1)
+def _preamble_contents() -> Tuple[Dict, ...]:
     """
-    Build the Gemini API prompt request with few-shot examples.
-    Guides the model to return structured JSON following the canonical schema.
+    System rules, canonical schema and few-shot turns shared by every request.
+    Built once; ai.few_shot_examples caps how many examples are included.
     """
-    sys_rules = (
-        "You are an expert document parser for admission and institutional forms. "
-        "Return ONLY valid JSON — no explanations or text outside JSON. "
-        "Use exactly these field names from the canonical schema. "
-        "Each field must have 'value', 'confidence' (0–1), and 'rationale' (<=15 words). "
-        "If a field is missing, leave 'value' empty and confidence=0. "
-        "Be robust to OCR noise, formatting errors, and partial labels."
-    )
-
     # Few-shot examples guide Gemini to consistent structure
-    examples = FEW_SHOTS.get("examples", [])
+    examples = FEW_SHOTS.get("examples", [])[: int(settings.get("ai.few_shot_examples", 1))]
     content = [
-        {"role": "user", "parts": [{"text": sys_rules}]},
-        {"role": "user", "parts": [{"text": "Canonical schema:\n" + json.dumps(CANONICAL, indent=2)}]},
+        {"role": "user", "parts": [{"text": SYS_RULES}]},
+        {"role": "user", "parts": [{"text": "Canonical schema:\n" + json.dumps(CANONICAL, separators=COMPACT)}]},
     ]
 
     for ex in examples:
         content.append({"role": "user", "parts": [{"text": ex["input"]}]})
-        content.append({"role": "model", "parts": [{"text": json.dumps(ex["output"], indent=2)}]})
+        content.append({"role": "model", "parts": [{"text": json.dumps(ex["output"], separators=COMPACT)}]})
+    return tuple(content)
 
-    # Add current OCR text
+
+@lru_cache(maxsize=1)
+def _preamble_prefix() -> bytes:
+    """The request body up to the final user turn, serialized once: b'{"contents":[...,'."""
+    turns = b",".join(json.dumps(turn, separators=COMPACT).encode("utf-8") for turn in _preamble_contents())
+    return b'{"contents":[' + turns + b","
+
+
+def _encode_request(user_text: str) -> bytes:
+    """Full generateContent body: cached prefix + the per-page user turn."""
+    turn = {"role": "user", "parts": [{"text": user_text}]}
+    return _preamble_prefix() + json.dumps(turn, separators=COMPACT).encode("utf-8") + b"]}"
+
+
+# Any edit to the rules, schema or examples changes this and invalidates cached responses
+PROMPT_FINGERPRINT = hash_string(_preamble_prefix().decode("utf-8"))
+
+_RESPONSE_CACHE: Optional[DiskCache] = None
+
+
+def _response_cache() -> DiskCache:
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        _RESPONSE_CACHE = DiskCache(
+            BASE_DIR / "cache" / "gemini",
+            max_bytes=int(settings.get("ai.cache.max_mb", 64)) * 1024 * 1024,
+            fernet=get_fernet(settings.get("datastore.encrypt", False)),
+            ttl_seconds=float(settings.get("ai.cache.ttl_hours", 168)) * 3600,
+        )
+    return _RESPONSE_CACHE
+
+
+def _cache_key(ocr_text: str, hints: Optional[Dict], model: str) -> str:
+    return hash_string(json.dumps({
+        "text": normalize_whitespace(ocr_text),
+        "hints": hints or {},
+        "model": model,
+        "prompt": PROMPT_FINGERPRINT,
+    }, sort_keys=True))
+
+
+def _user_text(ocr_text: str, hints: Optional[Dict] = None) -> str:
     user_text = "OCR TEXT:\n" + normalize_whitespace(ocr_text)
     if hints:
-        user_text += "\n\nHINTS:\n" + json.dumps(hints, indent=2)
-    content.append({"role": "user", "parts": [{"text": user_text}]})
+        user_text += "\n\nHINTS:\n" + json.dumps(hints, separators=COMPACT)
+    return user_text
+
+
+def _make_prompt(ocr_text: str, hints: Optional[Dict] = None) -> Dict:
+    """
+    Build the Gemini API prompt request with few-shot examples.
+    Guides the model to return structured JSON following the canonical schema.
+    """
+    content = list(_preamble_contents())
+
+    # Add current OCR text
+    content.append({"role": "user", "parts": [{"text": _user_text(ocr_text, hints)}]})
+
+    return {"contents": content}
+
+
+def _page_delimiter(n: int) -> str:
+    return f"=== PAGE {n} ==="
+
+
+def _batch_user_text(ocr_texts: List[str], hints: Optional[Dict] = None) -> str:
+    pages = "\n\n".join(f"{_page_delimiter(i)}\n{normalize_whitespace(t)}" for i, t in enumerate(ocr_texts, start=1))
+    user_text = (
+        f"The OCR TEXT below holds {len(ocr_texts)} separate pages, each starting with a "
+        f"'{_page_delimiter('N')}' line. Return ONLY a JSON array of exactly {len(ocr_texts)} "
+        "objects, one per page in the same order, each following the canonical schema.\n\n"
+        "OCR TEXT:\n" + pages
+    )
+    if hints:
+        user_text += "\n\nHINTS:\n" + json.dumps(hints, separators=COMPACT)
+    return user_text
+
 
+def _make_batch_prompt(ocr_texts: List[str], hints: Optional[Dict] = None) -> Dict:
+    """
+    Build one request carrying several pages. The model is asked for a JSON
+    array with one canonical-schema object per page, in page order.
+    """
+    content = list(_preamble_contents())
+    content.append({"role": "user", "parts": [{"text": _batch_user_text(ocr_texts, hints)}]})
     return {"contents": content}
 
 
+def _plan_batches(ocr_texts: List[str], max_chars: int, max_pages: int) -> List[List[int]]:
+    """
+    Greedily group page indices so each batch's OCR text stays within
+    max_chars (roughly 4 chars per token) and max_pages. A page that is
+    over budget on its own still gets a batch of one.
+    """
+    batches, cur, cur_chars = [], [], 0
+    for i, text in enumerate(ocr_texts):
+        size = len(normalize_whitespace(text)) + len(_page_delimiter(i + 1)) + 2
+        if cur and (cur_chars + size > max_chars or len(cur) >= max_pages):
+            batches.append(cur)
+            cur, cur_chars = [], 0
+        cur.append(i)
+        cur_chars += size
+    if cur:
+        batches.append(cur)
+    return batches
+
+
 # --------------------------
 # Main extraction logic
 # --------------------------
 
-@retry(
-    reraise=True,
-    stop=stop_after_attempt(settings.get("ai.max_retries", 3)),
-    wait=wait_exponential(multiplier=1, min=1, max=8),
-    retry=retry_if_exception_type(GeminiError),
-)
-def extract_structured_data(ocr_text: str, hints: Optional[Dict] = None) -> Dict[str, Any]:
+class TokenBucket:
     """
-    Calls Gemini API to convert raw OCR text into structured JSON fields
-    matching the canonical schema.
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    acquire() blocks until the tokens are available and returns the seconds waited.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise GeminiError("❌ GEMINI_API_KEY missing in environment (.env file).")
 
-    # Use full model ID for Gemini
-    model = settings.get("ai.model", "models/gemini-1.5-flash-latest")
-    url = GEMINI_ENDPOINT.format(model=model)
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
 
-    payload = _make_prompt(ocr_text, hints)
-    headers = {"Content-Type": "application/json"}
-    params = {"key": api_key}
 
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
     try:
-        resp = requests.post(url, params=params, headers=headers, data=json.dumps(payload), timeout=90)
-    except requests.exceptions.RequestException as e:
-        raise GeminiError(f"🌐 Network error calling Gemini API: {e}")
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GeminiClient:
+    """
+    Reusable Gemini HTTP client: one pooled keep-alive session plus
+    client-side request/token rate limiting (ai.rate_limit.*).
+    Token use is estimated from the request size (~4 bytes per token).
+    """
+
+    def __init__(self, pool_size: Optional[int] = None, timeout: Optional[float] = None,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        pool_size = int(pool_size or settings.get("ai.http.pool_size", 8))
+        self.timeout = float(timeout or settings.get("ai.http.timeout", 90))
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        rpm = requests_per_minute or settings.get("ai.rate_limit.requests_per_minute")
+        tpm = tokens_per_minute or settings.get("ai.rate_limit.tokens_per_minute")
+        self._request_bucket = TokenBucket(float(rpm)) if rpm else None
+        self._token_bucket = TokenBucket(float(tpm)) if tpm else None
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.limiter_wait = 0.0
+        self.rate_limited = 0
+
+    def _throttle(self, est_tokens: int):
+        waited = 0.0
+        if self._request_bucket:
+            waited += self._request_bucket.acquire(1)
+        if self._token_bucket:
+            waited += self._token_bucket.acquire(est_tokens)
+        if waited:
+            logger.debug("Gemini limiter held request for {:.2f}s", waited)
+        with self._lock:
+            self.limiter_wait += waited
+
+    def generate(self, payload: Union[bytes, Dict], model: str) -> str:
+        """POST a generateContent request (pre-encoded bytes or a dict) and return the model's text part."""
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise GeminiError("❌ GEMINI_API_KEY missing in environment (.env file).")
 
-    if resp.status_code >= 400:
-        logger.error("Gemini API error {}: {}", resp.status_code, resp.text[:1000])
-        raise GeminiError(f"HTTP {resp.status_code}: {resp.text[:400]}")
+        url = GEMINI_ENDPOINT.format(model=model)
+        headers = {"Content-Type": "application/json"}
+        params = {"key": api_key}
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, separators=COMPACT).encode("utf-8")
 
-    data = resp.json()
+        self._throttle(len(body) // 4)
+        with self._lock:
+            self.requests += 1
+        try:
+            resp = self.session.post(url, params=params, headers=headers, data=body, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise GeminiError(f"🌐 Network error calling Gemini API: {e}")
+
+        if resp.status_code >= 400:
+            logger.error("Gemini API error {}: {}", resp.status_code, resp.text[:1000])
+            retry_after = _retry_after_seconds(resp.headers.get("Retry-After"))
+            if resp.status_code == 429:
+                with self._lock:
+                    self.rate_limited += 1
+            raise GeminiError(f"HTTP {resp.status_code}: {resp.text[:400]}", retry_after=retry_after)
+
+        try:
+            return resp.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
+        except (ValueError, KeyError, IndexError) as e:
+            logger.error("❌ Unexpected response structure: {}", e)
+            raise GeminiError("Unexpected API response format.")
+
+    def _new_connections(self) -> int:
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[k].num_connections for k in list(pools.keys()) if k in pools)
+
+    def stats(self) -> Dict[str, Any]:
+        new = self._new_connections()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": new,
+                "reused_connections": max(0, self.requests - new),
+                "limiter_wait_s": round(self.limiter_wait, 3),
+                "rate_limited": self.rate_limited,
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_CLIENT: Optional[GeminiClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> GeminiClient:
+    """Shared process-wide client, created on first use."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = GeminiClient()
+        return _CLIENT
+
+
+def _to_schema(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter one parsed object strictly to the canonical schema, filling missing fields."""
+    canonical_fields = CANONICAL.get("fields", [])
+    filtered = filter_to_schema(parsed, canonical_fields)
+
+    # Validate output structure
+    for field in canonical_fields:
+        if field not in filtered:
+            filtered[field] = {"value": "", "confidence": 0.0, "rationale": "missing"}
+
+    return filtered
+
+
+_BACKOFF = wait_exponential(multiplier=1, min=1, max=8)
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Honour the server's Retry-After when given, else back off exponentially."""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, GeminiError) and exc.retry_after is not None:
+        return min(exc.retry_after, float(settings.get("ai.rate_limit.max_retry_after", 60)))
+    return _BACKOFF(retry_state)
+
+
+_RETRY = dict(
+    reraise=True,
+    stop=stop_after_attempt(settings.get("ai.max_retries", 3)),
+    wait=_wait_for_retry,
+    retry=retry_if_exception_type(GeminiError),
+)
+
+
+@retry(**_RETRY)
+def _call_gemini(ocr_text: str, hints: Optional[Dict], model: str) -> Dict[str, Any]:
+    """One Gemini round-trip (with retries), filtered to the canonical schema."""
+    text = get_client().generate(_encode_request(_user_text(ocr_text, hints)), model)
 
     # --------------------------
     # Extract model JSON response
     # --------------------------
     try:
-        text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
         parsed = json.loads(text)
         logger.info("✅ Gemini extraction successful: {} fields parsed", len(parsed))
-
-        # Filter output strictly to canonical schema
-        canonical_fields = CANONICAL.get("fields", [])
-        filtered = filter_to_schema(parsed, canonical_fields)
-
-        # Validate output structure
-        for field in canonical_fields:
-            if field not in filtered:
-                filtered[field] = {"value": "", "confidence": 0.0, "rationale": "missing"}
-
-        return filtered
+        return _to_schema(parsed)
 
     except json.JSONDecodeError as e:
         logger.error("❌ Gemini returned invalid JSON: {}", e)
         raise GeminiError("Invalid JSON format returned by Gemini.")
-    except KeyError as e:
-        logger.error("❌ Unexpected response structure: {}", e)
-        raise GeminiError("Unexpected API response format.")
     except Exception as e:
         logger.error("⚠️ Unknown parsing error: {}", e)
         raise GeminiError(str(e))
+
+
+@retry(**_RETRY)
+def _call_gemini_batch(ocr_texts: List[str], hints: Optional[Dict], model: str) -> List[Dict[str, Any]]:
+    """One multi-page Gemini round-trip (with retries); returns one schema object per page."""
+    text = get_client().generate(_encode_request(_batch_user_text(ocr_texts, hints)), model)
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError as e:
+        logger.error("❌ Gemini returned invalid JSON: {}", e)
+        raise GeminiError("Invalid JSON format returned by Gemini.")
+
+    if not isinstance(parsed, list) or len(parsed) != len(ocr_texts):
+        got = len(parsed) if isinstance(parsed, list) else type(parsed).__name__
+        logger.error("❌ Gemini batch returned {} objects for {} pages", got, len(ocr_texts))
+        raise GeminiError(f"Batch response has {got} objects for {len(ocr_texts)} pages.")
+    if not all(isinstance(obj, dict) for obj in parsed):
+        raise GeminiError("Batch response contains non-object entries.")
+
+    logger.info("✅ Gemini batch extraction successful: {} pages parsed", len(parsed))
+    return [_to_schema(obj) for obj in parsed]
+
+
+def extract_structured_data(ocr_text: str, hints: Optional[Dict] = None, use_cache: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Calls Gemini API to convert raw OCR text into structured JSON fields
+    matching the canonical schema. Identical requests are served from the
+    local response cache until their TTL expires.
+    """
+    # Use full model ID for Gemini
+    model = settings.get("ai.model", "models/gemini-1.5-flash-latest")
+    if use_cache is None:
+        use_cache = settings.get("ai.cache.enabled", True)
+    if not use_cache:
+        return _call_gemini(ocr_text, hints, model)
+
+    cache = _response_cache()
+    key = _cache_key(ocr_text, hints, model)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info("⚡ Gemini cache hit ({})", key)
+        return cached
+    result = _call_gemini(ocr_text, hints, model)
+    cache.put(key, result)
+    return result
+
+
+def extract_structured_data_batch(ocr_texts: List[str], hints: Optional[Dict] = None,
+                                  use_cache: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Extract several pages with as few requests as possible. Cached pages are
+    served locally; the rest are packed into requests bounded by
+    ai.batch.max_chars / ai.batch.max_pages. Returns one dict per page, in order.
+    """
+    model = settings.get("ai.model", "models/gemini-1.5-flash-latest")
+    if use_cache is None:
+        use_cache = settings.get("ai.cache.enabled", True)
+    cache = _response_cache() if use_cache else None
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(ocr_texts)
+    keys = [_cache_key(t, hints, model) for t in ocr_texts] if cache else []
+    todo = []
+    for i, text in enumerate(ocr_texts):
+        hit = cache.get(keys[i]) if cache else None
+        if hit is not None:
+            results[i] = hit
+        else:
+            todo.append(i)
+
+    batches = _plan_batches(
+        [ocr_texts[i] for i in todo],
+        max_chars=int(settings.get("ai.batch.max_chars", 24000)),
+        max_pages=int(settings.get("ai.batch.max_pages", 8)),
+    )
+    for batch in batches:
+        idxs = [todo[j] for j in batch]
+        parsed = _call_gemini_batch([ocr_texts[i] for i in idxs], hints, model)
+        for i, obj in zip(idxs, parsed):
+            results[i] = obj
+            if cache:
+                cache.put(keys[i], obj)
+    logger.info("Gemini batch: {} page(s), {} cached, {} request(s)",
+                len(ocr_texts), len(ocr_texts) - len(todo), len(batches))
+    return results
+
+
+# --------------------------
+# Concurrent extraction
+# --------------------------
+
+async def aextract_structured_data_many(
+    ocr_texts: List[str], hints: Optional[Dict] = None, concurrency: Optional[int] = None,
+    batch: Optional[bool] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run extract_structured_data for many pages with at most `concurrency`
+    requests in flight. Each request keeps its own retry policy; results come
+    back in input order and the first GeminiError is re-raised.
+    With batching on (ai.batch.enabled), pages are first packed into
+    multi-page requests and the batches run concurrently instead.
+    """
+    concurrency = max(1, int(concurrency or settings.get("ai.concurrency", 4)))
+    if batch is None:
+        batch = settings.get("ai.batch.enabled", False)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gemini") as pool:
+        if not batch:
+            tasks = [loop.run_in_executor(pool, partial(extract_structured_data, t, hints)) for t in ocr_texts]
+            return list(await asyncio.gather(*tasks))
+
+        groups = _plan_batches(
+            ocr_texts,
+            max_chars=int(settings.get("ai.batch.max_chars", 24000)),
+            max_pages=int(settings.get("ai.batch.max_pages", 8)),
+        )
+        tasks = [
+            loop.run_in_executor(pool, partial(extract_structured_data_batch, [ocr_texts[i] for i in g], hints))
+            for g in groups
+        ]
+        return [obj for part in await asyncio.gather(*tasks) for obj in part]
+
+
+def extract_structured_data_many(
+    ocr_texts: List[str], hints: Optional[Dict] = None, concurrency: Optional[int] = None,
+    batch: Optional[bool] = None
+) -> List[Dict[str, Any]]:
+    """Blocking wrapper around aextract_structured_data_many for threads without an event loop."""
+    out = asyncio.run(aextract_structured_data_many(ocr_texts, hints, concurrency, batch))
+    if _CLIENT is not None:
+        logger.info("Gemini client stats: {}", _CLIENT.stats())
+    return out
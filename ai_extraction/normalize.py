@@ -1,7 +1,15 @@
 # file: ai_extraction/normalize.py
-from typing import Dict, Any
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
 from rapidfuzz import process, fuzz
 from common.config import settings
+from datastore.storage import BASE_DIR
 
 # Canonical schema keys (aligned with canonical_schema.json)
 CANONICAL_KEYS = [
@@ -71,15 +79,150 @@ ALIASES = {
 }
 
 
+class AliasResolver:
+    """
+    Memoized key -> canonical-name resolver.
+
+    Exact aliases are a dict lookup; unseen keys are fuzzy-matched against
+    CANONICAL_KEYS once and remembered in a bounded LRU memo. Fuzzy matches
+    that hit a canonical key are "learned" and, with a path, persisted as
+    JSON so the next run starts warm. resolve_many scores every unseen key of
+    a batch against every canonical key in one rapidfuzz cdist call.
+    Canonical keys resolve to themselves without touching the memo; learned
+    entries are written once per resolve_many call, or by save() (at exit
+    for the shared resolver) after single-key resolves.
+    """
+
+    def __init__(self, canonical: List[str] = None, aliases: Dict[str, str] = None, threshold: int = 80,
+                 max_entries: int = 4096, path: Optional[Path] = None):
+        self.canonical = list(canonical or CANONICAL_KEYS)
+        self._canonical_set = set(self.canonical)
+        self.aliases = dict(ALIASES if aliases is None else aliases)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self._memo: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._learned: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if self.path and self.path.exists():
+            try:
+                learned = json.loads(self.path.read_text(encoding="utf-8"))
+                for k, v in learned.items():
+                    if v in self.canonical:
+                        self._learned[k] = v
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable alias file {}: {}", self.path, e)
+
+    def _lookup(self, k: str) -> Tuple[bool, Optional[str]]:
+        """(known, canonical-or-None) without fuzzy matching. Caller holds the lock."""
+        if k in self._canonical_set:
+            return True, k
+        if k in self.aliases:
+            return True, self.aliases[k]
+        if k in self._memo:
+            self._memo.move_to_end(k)
+            return True, self._memo[k]
+        if k in self._learned:
+            return True, self._learned[k]
+        return False, None
+
+    def _remember(self, k: str, mapped: Optional[str]) -> bool:
+        """Memoize a fuzzy result; True if it was learned. Caller holds the lock."""
+        self._memo[k] = mapped
+        if len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+        if mapped is None:
+            return False
+        self._learned[k] = mapped
+        if len(self._learned) > self.max_entries:
+            self._learned.popitem(last=False)
+        self._dirty = True
+        return True
+
+    def resolve(self, key: str) -> str:
+        """Map one AI-generated or OCR key to its canonical name (or return it unchanged)."""
+        k = key.lower().strip()
+        with self._lock:
+            known, mapped = self._lookup(k)
+            if known:
+                self.hits += 1
+                return mapped or key
+            self.misses += 1
+        best = process.extractOne(k, self.canonical, scorer=fuzz.QRatio)
+        mapped = best[0] if best and best[1] >= self.threshold else None
+        with self._lock:
+            self._remember(k, mapped)  # persisted by the next resolve_many or save()
+        return mapped or key
+
+    def resolve_many(self, keys: List[str]) -> List[str]:
+        """resolve() for a batch, scoring all unseen keys in one cdist matrix call."""
+        lowered = [key.lower().strip() for key in keys]
+        out: List[Optional[str]] = [None] * len(keys)
+        unseen: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, k in enumerate(lowered):
+                known, mapped = self._lookup(k)
+                if known:
+                    self.hits += 1
+                    out[i] = mapped or keys[i]
+                else:
+                    self.misses += 1
+                    unseen.setdefault(k, []).append(i)
+        if not unseen:
+            return out
+
+        queries = list(unseen)
+        scores = process.cdist(queries, self.canonical, scorer=fuzz.QRatio, workers=-1)
+        best = scores.argmax(axis=1)
+        with self._lock:
+            for row, k in enumerate(queries):
+                j = int(best[row])
+                mapped = self.canonical[j] if scores[row, j] >= self.threshold else None
+                self._remember(k, mapped)
+                for i in unseen[k]:
+                    out[i] = mapped or keys[i]
+        self.save()  # one write per batch, including earlier single-key resolves
+        return out
+
+    def save(self):
+        """Persist learned resolutions (atomic replace) if any were learned since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            text = json.dumps(self._learned, indent=2, sort_keys=True)
+        tmp = self.path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memo": len(self._memo), "learned": len(self._learned)}
+
+
+_RESOLVER: Optional[AliasResolver] = None
+
+
+def get_resolver() -> AliasResolver:
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = AliasResolver(
+            threshold=int(settings.get("ai.aliases.threshold", 80)),
+            max_entries=int(settings.get("ai.aliases.max_entries", 4096)),
+            path=BASE_DIR / "aliases.json" if settings.get("ai.aliases.persist", True) else None,
+        )
+        atexit.register(_RESOLVER.save)
+    return _RESOLVER
+
+
 def map_alias(key: str) -> str:
     """Map AI-generated or OCR keys to canonical schema names."""
-    k = key.lower().strip()
-    if k in ALIASES:
-        return ALIASES[k]
-    best = process.extractOne(k, CANONICAL_KEYS, scorer=fuzz.QRatio)
-    if best and best[1] >= 80:
-        return best[0]
-    return key
+    return get_resolver().resolve(key)
 
 
 def filter_to_schema(ai_data: Dict[str, Any], schema_fields: list[str]) -> Dict[str, Any]:
@@ -106,8 +249,7 @@ def normalize_ai_output(ai_dict: Dict[str, Any]) -> Dict[str, Any]:
     out = {k: "" for k in CANONICAL_KEYS}
     overall_conf = 0.0
 
-    for key, wrap in ai_dict.items():
-        mapped = map_alias(key)
+    for (key, wrap), mapped in zip(ai_dict.items(), get_resolver().resolve_many(list(ai_dict))):
         if isinstance(wrap, dict):
             val = wrap.get("value", "")
             conf = float(wrap.get("confidence", 0.0) or 0.0)
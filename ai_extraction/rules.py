@@ -0,0 +1,149 @@
+# file: ai_extraction/rules.py
+"""
+Deterministic 'Label: value' extractor that runs before Gemini.
+
+Labels come from the canonical keys, the alias table in
+ai_extraction.normalize and the form cues in automation.locators, compiled
+into one regex. A value runs from its label to the next known label (or the
+end of the line), so it works on line-broken text-layer output as well as
+on Tesseract text flattened to a single line. Each value is scored with
+parsing.validators.validate_field; Gemini is only needed for the rest.
+A value ends early at an unknown "Some Label:". Free-text and name values
+accept almost any words, so when one was cut there (or runs past
+MAX_VALUE_WORDS) its end is a guess: it is scored 0 and left to Gemini.
+merge() never lays a free-text rule hit over a value Gemini found.
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from common.config import settings
+from ai_extraction.normalize import ALIASES, CANONICAL_KEYS
+from automation.locators import CANONICAL_CUES
+from parsing.validators import resolve_validator, validate_field, validate_name, validate_text
+
+
+def _label_words(label: str) -> List[str]:
+    return [w for w in re.split(r"[^a-z0-9]+", label.lower()) if w]
+
+
+def _build_label_table() -> Dict[str, str]:
+    """Normalized label -> canonical key. Aliases override cues, canonical names override both."""
+    table = {}
+    for field, cues in CANONICAL_CUES.items():
+        for cue in cues:
+            table[" ".join(_label_words(cue))] = field
+    for alias, field in ALIASES.items():
+        table[" ".join(_label_words(alias))] = field
+    for key in CANONICAL_KEYS:
+        table[" ".join(_label_words(key))] = key
+    return table
+
+
+LABELS = _build_label_table()
+
+
+def _label_pattern(label: str) -> str:
+    # "father name" also matches "Father's Name", "FATHERS NAME", "father_name"
+    return r"[\s_.\-]+".join(re.escape(w) + r"(?:['’]?s)?" for w in label.split())
+
+
+def _compile_label_re(table: Dict[str, str]) -> re.Pattern:
+    """One named group per canonical key, so match.lastgroup is the field."""
+    by_field: Dict[str, List[str]] = {}
+    for label, field in table.items():
+        by_field.setdefault(field, []).append(label)
+    groups = [
+        f"(?P<{field}>" + "|".join(_label_pattern(l) for l in sorted(labels, key=len, reverse=True)) + ")"
+        for field, labels in by_field.items()
+    ]
+    return re.compile(r"(?<![A-Za-z0-9])(?:" + "|".join(groups) + r")[ \t]*[:=][ \t]*", re.IGNORECASE)
+
+
+LABEL_RE = _compile_label_re(LABELS)
+
+# A label this table does not know ("Hostel Required:"): up to three words
+# ending in a colon followed by a space or the end, so times and URLs pass
+UNKNOWN_LABEL_RE = re.compile(r"(?:\b[A-Z][A-Za-z'’]*[ \t]+){0,2}\b[A-Za-z][A-Za-z'’]*[ \t]*:(?=\s|$)")
+MAX_VALUE_WORDS = 12
+# Validators that cannot tell where a value should have ended
+_LOOSE_VALIDATORS = (validate_text, validate_name)
+
+_STATS_LOCK = threading.Lock()
+_STATS = {"pages": 0, "pages_local": 0, "fields": 0, "fields_local": 0}
+
+
+def extract_by_rules(ocr_text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Labeled values found in the text, as {field: {value, confidence, rationale}}
+    in the canonical schema shape. Values that fail validation keep confidence 0.
+    """
+    text = ocr_text or ""
+    matches = list(LABEL_RE.finditer(text))
+    out: Dict[str, Dict[str, Any]] = {}
+    for m, nxt in zip(matches, matches[1:] + [None]):
+        value = text[m.end():nxt.start() if nxt else len(text)].split("\n", 1)[0]
+        unknown = UNKNOWN_LABEL_RE.search(value)
+        if unknown:
+            value = value[:unknown.start()]
+        value = value.strip(" \t,;|")
+        if not value:
+            continue
+        field = m.lastgroup
+        ok, conf = validate_field(field, value)
+        if resolve_validator(field) in _LOOSE_VALIDATORS and (unknown or len(value.split()) > MAX_VALUE_WORDS):
+            ok = False
+        conf = conf if ok else 0.0
+        if field not in out or conf > out[field]["confidence"]:
+            out[field] = {"value": value, "confidence": conf, "rationale": f"rule:{m[field].strip()}"}
+    return out
+
+
+def resolve_locally(ocr_text: str) -> Tuple[Dict[str, Dict[str, Any]], Optional[List[str]]]:
+    """
+    Split a page into fields settled by rules and fields still needing Gemini.
+    Returns (resolved, needed); needed is None when the page can skip Gemini:
+    no label was found with a weak value and at least ai.rules.skip_coverage
+    of the canonical fields are resolved.
+    """
+    min_conf = float(settings.get("ai.min_field_confidence", 0.4))
+    found = extract_by_rules(ocr_text)
+    resolved = {k: v for k, v in found.items() if v["confidence"] >= min_conf}
+    weak = [k for k in found if k not in resolved]
+    coverage = len(resolved) / len(CANONICAL_KEYS)
+    if not weak and coverage >= float(settings.get("ai.rules.skip_coverage", 0.75)):
+        return resolved, None
+    return resolved, [k for k in CANONICAL_KEYS if k not in resolved]
+
+
+def merge(ai: Dict[str, Any], resolved: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Gemini output with the locally resolved fields laid over it, except
+    free-text fields (validate_text accepts almost anything) where Gemini
+    already has a value.
+    """
+    out = dict(ai)
+    for field, found in resolved.items():
+        theirs = ai.get(field)
+        if resolve_validator(field) is validate_text and isinstance(theirs, dict) and theirs.get("value"):
+            continue
+        out[field] = found
+    return out
+
+
+def record_page(result: Dict[str, Any], local_fields: int, ai_called: bool):
+    """Count one finished page toward rule_stats()."""
+    filled = sum(1 for v in result.values() if isinstance(v, dict) and v.get("value"))
+    with _STATS_LOCK:
+        _STATS["pages"] += 1
+        _STATS["pages_local"] += 0 if ai_called else 1
+        _STATS["fields"] += filled
+        _STATS["fields_local"] += local_fields
+
+
+def rule_stats() -> Dict[str, float]:
+    """Pages and filled fields resolved without a network call, since process start."""
+    with _STATS_LOCK:
+        s = dict(_STATS)
+    s["pages_local_frac"] = round(s["pages_local"] / s["pages"], 3) if s["pages"] else 0.0
+    s["fields_local_frac"] = round(s["fields_local"] / s["fields"], 3) if s["fields"] else 0.0
+    return s
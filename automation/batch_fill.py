@@ -0,0 +1,171 @@
+# file: automation/batch_fill.py
+"""
+Unattended multi-record autofill: every saved record for a portal is filled
+into a fresh copy of the form, K records at a time across a DriverPool of
+headless sessions, using the domain's saved mapping profile. Nothing is
+submitted and nothing prompts; each record gets a report line (JSONL) and
+the run ends with a success/failure, concurrency and latency summary.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from cryptography.fernet import InvalidToken
+from loguru import logger
+from common.utils import percentile
+from automation.driver import DriverPool
+from automation.filler import _load_mapping, fill_record
+from automation.locators import record_selector_hits, refresh_stale_selectors, stale_fields, suggest_mapping_for_page
+from automation.waits import explicit_timeout, page_loaded, wait_until
+from datastore.storage import list_records, load_record, save_profile
+
+
+def _mapping_for(pool: DriverPool, url: str, domain: str) -> Tuple[Dict[str, str], List[str]]:
+    """
+    The saved profile with stale selectors re-suggested, or suggestions from
+    one session saved as the profile, so workers never race on it.
+    Returns (mapping, fields still stale).
+    """
+    mapping = _load_mapping(domain)
+    if mapping and not stale_fields(domain, mapping):
+        return mapping, []
+    with pool.session() as drv:
+        drv.get(url)
+        wait_until(drv, page_loaded, explicit_timeout())
+        if mapping:
+            return refresh_stale_selectors(drv, domain, mapping)
+        mapping = suggest_mapping_for_page(drv)
+    if mapping:
+        save_profile(domain, {"mapping": mapping})
+        logger.info("💾 New mapping profile saved for {}", domain)
+    return mapping, []
+
+
+def _fill_one_record(pool: DriverPool, url: str, domain: str, mapping: Dict[str, str], stale: List[str],
+                     path: Path, active: Dict[str, int], lock: threading.Lock) -> Optional[Dict[str, Any]]:
+    """
+    Report for one record file, or None when it belongs to another domain or
+    the limit is reached. A file that cannot be read or decrypted (corrupt,
+    or encrypted with another key) may belong to any domain: it is logged
+    and counted in active["unreadable"], never claimed as this portal's.
+    """
+    t0 = time.perf_counter()
+    try:
+        saved = load_record(path)
+    except (InvalidToken, ValueError, OSError) as e:
+        logger.error("❌ Record {} is unreadable: {}", path.stem, e.__class__.__name__)
+        with lock:
+            active["unreadable"] += 1
+        return None
+    if saved.get("domain") != domain:
+        return None
+    with lock:
+        if active["limit"] is not None and active["claimed"] >= active["limit"]:
+            return None
+        active["claimed"] += 1
+    rec: Dict[str, Any] = {"record": path.stem, "filled": 0, "mapped": len(mapping), "fields": {}, "error": None}
+    try:
+        with pool.session() as drv:
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            try:
+                drv.get(url)
+                rec.update(fill_record(drv, mapping, saved.get("data") or {}, stale=stale))
+            finally:
+                with lock:
+                    active["now"] -= 1
+    except Exception as e:
+        logger.error("❌ Record {} failed: {}", path.stem, e)
+        rec["error"] = str(e)
+    statuses = [f["status"] for f in rec["fields"].values()]
+    rec["skipped"] = statuses.count("skipped")
+    rec["missing"] = statuses.count("missing")
+    rec["rejected"] = statuses.count("rejected")
+    rec["ok"] = rec["error"] is None and rec["filled"] > 0 and not rec["rejected"]
+    rec["latency_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+
+def run_autofill(
+    url: str,
+    out: str,
+    domain: Optional[str] = None,
+    sessions: Optional[int] = None,
+    limit: Optional[int] = None,
+    headless: bool = True,
+    pool: Optional[DriverPool] = None,
+) -> Dict:
+    """
+    Fill every saved record for `domain` (default: the URL's host) into `url`,
+    `sessions` at a time (automation.pool.size), and write one JSON line per
+    record to `out`. Records are read once, in the workers; unreadable files
+    may belong to any domain, so they only add to the summary's `unreadable`
+    count. A record is ok when it filled at least one field and had no
+    rejects or errors. Returns (and logs) the summary; show_summary's
+    success/failed counts are its `succeeded`/`failed`.
+    """
+    domain = domain or urlparse(url).netloc
+    paths: List[Path] = list_records()
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(size=sessions, headless=headless)
+    sessions = pool.size
+    logger.info("Autofill: {} saved record(s), filling those for {} across {} session(s)",
+                len(paths), domain, sessions)
+
+    reports: List[Dict[str, Any]] = []
+    active = {"now": 0, "max": 0, "claimed": 0, "limit": limit, "unreadable": 0}
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+    try:
+        mapping, stale = _mapping_for(pool, url, domain) if paths else ({}, [])
+        if paths and not mapping:
+            raise RuntimeError(f"no mapping for {domain}: save one with the Mapping Editor first")
+        pool.warm(min(sessions, len(paths)))
+        with Path(out).open("w", encoding="utf-8") as fh, \
+                ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="autofill") as ex:
+            futures = [ex.submit(_fill_one_record, pool, url, domain, mapping, stale, p, active, lock) for p in paths]
+            for fut in as_completed(futures):
+                rec = fut.result()
+                if rec is None:
+                    continue
+                reports.append(rec)
+                fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                fh.flush()
+    finally:
+        pool_stats = pool.stats()
+        if own_pool:
+            pool.close()
+    elapsed = time.perf_counter() - t0
+    if reports:
+        selector_stats = record_selector_hits(domain, mapping, [r["fields"] for r in reports])
+
+    latencies = [r["latency_s"] for r in reports]
+    waited = sum(r.get("timings", {}).get("wait_s", 0.0) for r in reports)
+    succeeded = sum(1 for r in reports if r["ok"])
+    summary = {
+        "domain": domain,
+        "records": len(reports),
+        "succeeded": succeeded,
+        "failed": len(reports) - succeeded,
+        "errors": sum(1 for r in reports if r["error"]),
+        "unreadable": active["unreadable"],
+        "fields_filled": sum(r["filled"] for r in reports),
+        "fields_skipped": sum(r["skipped"] for r in reports),
+        "sessions": sessions,
+        "max_concurrent": active["max"],
+        "elapsed_s": round(elapsed, 2),
+        "records_per_min": round(len(reports) * 60 / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_p50_s": round(percentile(latencies, 50), 3),
+        "latency_p95_s": round(percentile(latencies, 95), 3),
+        "latency_max_s": round(max(latencies, default=0.0), 3),
+        "wait_frac": round(waited / sum(latencies), 3) if sum(latencies) else 0.0,
+        "browser_startup_s": pool_stats["startup_mean_s"],
+        "stale_selectors": sorted(f for f, s in selector_stats.items() if s["stale"]) if reports else [],
+    }
+    logger.info("Autofill summary: {}", summary)
+    return summary
@@ -1,17 +1,251 @@
+# file: automation/driver.py
+"""
+Browser sessions for mapping and autofill.
+
+get_driver() launches one Chrome/Edge session. DriverPool keeps up to
+automation.pool.size sessions alive and hands them out again after a reset
+(cookies, local/session storage, blank page), so the mapping editor,
+autofill and batch runs only pay browser startup once per session.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.edge.options import Options as EdgeOptions
 from common.config import settings
+from automation.locators import enter_top_document
+
+_RESET_STORAGE_JS = "try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}"
 
-def get_driver():
+
+def get_driver(headless: Optional[bool] = None):
+    """New browser session (automation.browser); headless defaults to automation.headless."""
+    if headless is None:
+        headless = settings.get("automation.headless", False)
     browser = settings.get("automation.browser", "chrome").lower()
-    if browser == "edge":
-        opts = EdgeOptions()
-        opts.add_argument("--disable-gpu")
-        opts.add_argument("--start-maximized")
-        return webdriver.Edge(options=opts)
+    opts = EdgeOptions() if browser == "edge" else ChromeOptions()
+    opts.add_argument("--disable-gpu")
+    if headless:
+        opts.add_argument("--headless=new")
+        opts.add_argument("--window-size=1366,900")
     else:
-        opts = ChromeOptions()
-        opts.add_argument("--disable-gpu")
         opts.add_argument("--start-maximized")
-        return webdriver.Chrome(options=opts)
+    if browser == "edge":
+        return webdriver.Edge(options=opts)
+    return webdriver.Chrome(options=opts)
+
+
+class PoolTimeout(Exception):
+    """No session became free within the acquire timeout."""
+
+
+class DriverPool:
+    """
+    Up to `size` reusable browser sessions. acquire() returns an idle session,
+    launching one only when none is idle and the pool is not full (otherwise
+    it blocks until release()). release() resets the session before it is
+    reused; a session that fails to reset is quit and its slot freed.
+    `factory(headless)` launches a session (get_driver by default).
+    """
+
+    def __init__(self, size: Optional[int] = None, headless: Optional[bool] = None,
+                 factory: Optional[Callable[[bool], Any]] = None):
+        self.size = max(1, int(size or settings.get("automation.pool.size", 2)))
+        self.headless = settings.get("automation.headless", False) if headless is None else headless
+        self.factory = factory or get_driver
+        self._idle: List[Any] = []
+        self._all: List[Any] = []
+        self._starting = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.startup_s: List[float] = []
+        self.acquired = 0
+        self.warm_hits = 0
+        self.acquire_wait = 0.0
+        self.resets = 0
+        self.reset_failures = 0
+
+    def _launch(self):
+        t0 = time.perf_counter()
+        try:
+            driver = self.factory(self.headless)
+        except Exception:
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify()
+            raise
+        elapsed = time.perf_counter() - t0
+        with self._cond:
+            self._starting -= 1
+            self._all.append(driver)
+            self.startup_s.append(elapsed)
+        logger.info("🌐 Browser session started in {:.2f}s ({}/{})", elapsed, len(self._all), self.size)
+        return driver
+
+    def warm(self, n: Optional[int] = None) -> int:
+        """Start sessions in parallel until n (default: size) exist; returns how many were started."""
+        with self._cond:
+            n = min(self.size, self.size if n is None else n)
+            todo = max(0, n - len(self._all) - self._starting)
+            self._starting += todo
+        if not todo:
+            return 0
+        with ThreadPoolExecutor(max_workers=todo, thread_name_prefix="browser") as pool:
+            futures = [pool.submit(self._launch) for _ in range(todo)]
+        started = 0
+        for f in futures:
+            try:
+                driver = f.result()
+            except Exception as e:
+                logger.warning("⚠️ Could not pre-start a browser session: {}", e)
+                continue
+            with self._cond:
+                closed = self._closed
+                if closed:
+                    self._all.remove(driver)
+                else:
+                    self._idle.append(driver)
+                    self._cond.notify()
+            if closed:  # the pool was closed while this session was starting
+                self._quit(driver)
+            else:
+                started += 1
+        return started
+
+    def acquire(self, timeout: Optional[float] = None):
+        """An idle session, a newly launched one, or the next one released (PoolTimeout after timeout)."""
+        t0 = time.perf_counter()
+        deadline = None if timeout is None else t0 + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("driver pool is closed")
+                if self._idle:
+                    driver = self._idle.pop()
+                    self.acquired += 1
+                    self.warm_hits += 1
+                    self.acquire_wait += time.perf_counter() - t0
+                    return driver
+                if len(self._all) + self._starting < self.size:
+                    self._starting += 1
+                    break
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"no browser session free after {timeout}s")
+                self._cond.wait(remaining)
+        driver = self._launch()
+        with self._cond:
+            self.acquired += 1
+            self.acquire_wait += time.perf_counter() - t0
+        return driver
+
+    def reset(self, driver):
+        """Clear cookies and local/session storage and leave the session on a blank page."""
+        enter_top_document(driver)
+        driver.execute_script(_RESET_STORAGE_JS)  # storage is per origin: clear it before leaving the page
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})  # every domain, not just the current one
+        except (AttributeError, WebDriverException):
+            driver.delete_all_cookies()
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+
+    def release(self, driver, reset: bool = True):
+        """Return a session to the pool, reset first unless reset=False."""
+        if reset:
+            try:
+                self.reset(driver)
+                with self._cond:
+                    self.resets += 1
+            except WebDriverException as e:
+                logger.warning("⚠️ Browser session could not be reset ({}); replacing it", e)
+                with self._cond:
+                    self.reset_failures += 1
+                self.discard(driver)
+                return
+        with self._cond:
+            closed = self._closed
+            if closed and driver in self._all:
+                self._all.remove(driver)
+            elif not closed:
+                self._idle.append(driver)
+                self._cond.notify()
+        if closed:
+            self._quit(driver)
+
+    def discard(self, driver):
+        """Quit a session (e.g. one the user closed) and free its slot."""
+        with self._cond:
+            if driver in self._all:
+                self._all.remove(driver)
+            if driver in self._idle:
+                self._idle.remove(driver)
+            self._cond.notify()
+        self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None, reset: bool = True):
+        """`with pool.session() as drv:` acquire, then release (and reset) when the block ends."""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver, reset=reset)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            started = list(self.startup_s)
+            return {
+                "size": self.size,
+                "sessions": len(self._all),
+                "idle": len(self._idle),
+                "in_use": len(self._all) - len(self._idle),
+                "started": len(started),
+                "startup_mean_s": round(sum(started) / len(started), 3) if started else 0.0,
+                "startup_max_s": round(max(started), 3) if started else 0.0,
+                "acquired": self.acquired,
+                "warm_hits": self.warm_hits,
+                "acquire_wait_s": round(self.acquire_wait, 3),
+                "resets": self.resets,
+                "reset_failures": self.reset_failures,
+            }
+
+    def close(self):
+        """Quit every session; sessions still in use are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for driver in idle:
+                self._all.remove(driver)
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
+
+
+_POOL: Optional[DriverPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> DriverPool:
+    """Shared process-wide pool (automation.pool.*), created on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL._closed:
+            _POOL = DriverPool()
+        return _POOL
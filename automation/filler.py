@@ -1,27 +1,38 @@
 # file: automation/filler.py
 import json
-import time
 import os
+from typing import Any, Dict, Iterable, List
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from loguru import logger
-from automation.locators import resolve_selector, suggest_mapping_for_page
+from common.config import settings
+from automation.locators import (enter_frame_of, enter_top_document, record_selector_hits, refresh_stale_selectors,
+                                 resolve_selectors, suggest_mapping_for_page)
+from automation.waits import (FillClock, element_ready, explicit_timeout, implicit_timeout, option_available,
+                              page_loaded, value_committed, wait_until)
 from datastore.storage import load_profile, save_profile
 
+FILL_JS_PATH = "automation/js/fill.js"
+HIGHLIGHT_JS_PATH = "automation/js/highlight.js"
 
-def highlight(driver, element, duration=0.3):
-    """Temporarily highlight an input element for visual feedback."""
+with open(FILL_JS_PATH, "r", encoding="utf-8") as f:
+    FILL_JS = f.read()
+with open(HIGHLIGHT_JS_PATH, "r", encoding="utf-8") as f:
+    HIGHLIGHT_JS = f.read()
+
+
+def highlight(driver, element):
+    """
+    Flash the element through a page-side CSS animation (automation.highlight_ms;
+    0 turns it off). Returns at once; nothing waits for the animation.
+    """
+    ms = int(settings.get("automation.highlight_ms", 300))
+    if ms <= 0:
+        return
     try:
-        original = element.get_attribute("style")
-        driver.execute_script(
-            "arguments[0].setAttribute('style', arguments[1]);",
-            element,
-            "border: 2px solid #1a73e8; background: #eaf1fe;"
-        )
-        time.sleep(duration)
-        driver.execute_script("arguments[0].setAttribute('style', arguments[1]);", element, original)
-    except Exception:
+        driver.execute_script(f"({HIGHLIGHT_JS})(arguments[0], arguments[1]);", element, ms)
+    except WebDriverException:
         pass
 
 
@@ -42,13 +53,167 @@ def _load_mapping(domain: str) -> dict:
     return {}
 
 
-def fill_form_fields(driver, url: str, domain: str, data: dict, wait_seconds: float = 0.4):
+def bulk_fill(driver, entries: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
     """
-    Fill all form fields using Selenium based on mapping profile.
-    Keeps browser open for manual verification.
+    Fill every {field, selector, value} entry with one execute_script call:
+    native value setter plus input/change events, select options by text or
+    value, checkbox/radio by truthy value or option. Filled elements get the
+    highlight in the same call. Returns
+    {field: {"status": "filled" | "missing" | "rejected", "reason": str}}.
+    """
+    if not entries:
+        return {}
+    enter_top_document(driver)
+    script = (f"var ms = arguments[1]; return ({FILL_JS})(arguments[0], "
+              f"ms > 0 ? function (el) {{ ({HIGHLIGHT_JS})(el, ms); }} : null);")
+    report = driver.execute_script(script, entries, int(settings.get("automation.highlight_ms", 300))) or []
+    return {r["field"]: {"status": r["status"], "reason": r.get("reason", "")} for r in report}
+
+
+def _bulk_fill_late(driver, entries: List[Dict[str, str]], report: Dict[str, Dict[str, str]], clock: FillClock):
+    """Re-run the fill script on fields that were not in the DOM yet, until they appear or implicit_wait runs out."""
+    pending = [e for e in entries if report[e["field"]]["status"] == "missing"]
+    if not pending:
+        return
+
+    def appeared(d):
+        nonlocal pending
+        got = bulk_fill(d, pending)
+        report.update(got)
+        pending = [e for e in pending if got[e["field"]]["status"] == "missing"]
+        return not pending
+
+    wait_until(driver, appeared, implicit_timeout(), clock)
+
+
+def _fill_one(driver, field: str, selector: str, value: str, clock: FillClock,
+              element=None, wait: bool = True) -> Dict[str, str]:
+    """
+    Per-field WebDriver path (wait, clear, send_keys); the fallback for bulk
+    rejects. `element` is a handle from resolve_selectors; without one the
+    field is waited for (up to implicit_wait, or not at all when wait=False).
     """
+    try:
+        if element is not None:
+            try:
+                # The handle is only usable from its own document (resolve_selectors ends in the top one)
+                enter_frame_of(driver, selector)
+                if not element.is_enabled():
+                    element = None
+            except WebDriverException:
+                element = None
+        if element is None:
+            element = wait_until(driver, element_ready(selector), implicit_timeout() if wait else 0, clock)
+        if not element:
+            logger.warning(f"❌ Could not locate an enabled element for '{field}' → {selector}")
+            return {"status": "missing", "reason": "no enabled element"}
+
+        tag = element.tag_name.lower()
+        input_type = (element.get_attribute("type") or "text").lower()
+        reason = ""
+
+        if tag == "select":
+            # Dependent dropdowns fill their options after the parent field changes
+            if not wait_until(driver, option_available(element, value), explicit_timeout(), clock):
+                return {"status": "rejected", "reason": "no option matches"}
+            try:
+                Select(element).select_by_visible_text(value)
+            except NoSuchElementException:
+                Select(element).select_by_value(value)
+        elif input_type in ["checkbox", "radio"]:
+            if value.lower() in ["yes", "true", "1", "checked"]:
+                if not element.is_selected():
+                    element.click()
+        else:
+            if tag in ["input", "textarea"]:
+                element.clear()
+            before = element.get_attribute("value") or ""
+            element.send_keys(value)
+            if not wait_until(driver, value_committed(element, before, value), implicit_timeout(), clock):
+                logger.warning(f"⚠️ '{field}' did not take the typed value")
+                return {"status": "rejected", "reason": "value did not stick"}
+            stored = element.get_attribute("value") or ""
+            if stored != value:
+                reason = f"stored as {stored!r}"  # e.g. a date input's ISO form
+
+        highlight(driver, element)
+        logger.info(f"✅ Filled '{field}' → {selector} with '{value}'")
+        return {"status": "filled", "reason": reason}
+
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fill '{field}' ({selector}): {e}")
+        return {"status": "rejected", "reason": str(e)}
+
+
+def fill_record(driver, mapping: Dict[str, str], data: dict, bulk: bool = None,
+                stale: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Fill one record into the loaded page, without prompting.
+    With bulk on (automation.bulk_fill) every field is set by one in-page
+    script; only fields it rejects go through the per-field send_keys path.
+    Waits are condition-based (see automation.waits), never fixed sleeps;
+    `stale` fields (selectors that keep missing) are not waited for.
+    Returns {"fields": {field: {"status", "reason"}}, "filled", "mapped",
+    "timings": {"wait_s", "work_s", "total_s"}}.
+    """
+    if bulk is None:
+        bulk = settings.get("automation.bulk_fill", True)
+    clock = FillClock()
+    report: Dict[str, Dict[str, str]] = {}
+    if not wait_until(driver, page_loaded, explicit_timeout(), clock):
+        logger.warning("⚠️ Page still loading after {}s; filling anyway", explicit_timeout())
+
+    entries = []
+    for field, selector in mapping.items():
+        value = data.get(field)
+        if not value:
+            logger.warning(f"⚠️ Field '{field}' has no extracted value in data.")
+            report[field] = {"status": "skipped", "reason": "no value"}
+            continue
+        entries.append({"field": field, "selector": selector, "value": str(value)})
+
+    todo = entries
+    if bulk and entries:
+        try:
+            report.update(bulk_fill(driver, entries))
+            _bulk_fill_late(driver, [e for e in entries if e["field"] not in stale], report, clock)
+            for e in entries:
+                if report[e["field"]]["status"] == "filled":
+                    logger.info(f"✅ Filled '{e['field']}' → {e['selector']} (bulk)")
+            todo = [e for e in entries if report[e["field"]]["status"] == "rejected"]
+            for e in todo:
+                logger.info(f"↩️ Bulk fill rejected '{e['field']}' ({report[e['field']]['reason']}); typing instead")
+        except WebDriverException as e:
+            logger.warning(f"⚠️ Bulk fill failed ({e}); falling back to per-field filling")
+    if todo:
+        found, _ = resolve_selectors(driver, {e["field"]: e["selector"] for e in todo})
+        for e in todo:
+            report[e["field"]] = _fill_one(driver, e["field"], e["selector"], e["value"], clock,
+                                           element=found.get(e["field"]), wait=e["field"] not in stale)
+
+    # --- Summary ---
+    filled_count = sum(1 for r in report.values() if r["status"] == "filled")
+    skipped_fields = [f for f, r in report.items() if r["status"] != "filled"]
+    timings = clock.timings()
+    logger.info(f"✅ Autofill complete. {filled_count}/{len(mapping)} fields filled.")
+    logger.info("⏱️ {}s total: {}s waiting on the page, {}s filling",
+                timings["total_s"], timings["wait_s"], timings["work_s"])
+    if skipped_fields:
+        logger.warning(f"⚠️ Skipped {len(skipped_fields)} fields: {', '.join(skipped_fields)}")
+    return {"fields": report, "filled": filled_count, "mapped": len(mapping), "timings": timings}
+
+
+def fill_form_fields(driver, url: str, domain: str, data: dict, bulk: bool = None) -> Dict[str, Any]:
+    """
+    Fill all form fields using Selenium based on mapping profile (see
+    fill_record), generating and saving a mapping if the domain has none.
+    Keeps browser open for manual verification and returns the fill report.
+    """
+    report: Dict[str, Any] = {"fields": {}, "filled": 0, "mapped": 0, "timings": {}}
     try:
         mapping = _load_mapping(domain)
+        wait_until(driver, page_loaded, explicit_timeout())
+        stale: List[str] = []
 
         # Generate mapping dynamically if not found
         if not mapping:
@@ -56,58 +221,13 @@ def fill_form_fields(driver, url: str, domain: str, data: dict, wait_seconds: fl
             mapping = suggest_mapping_for_page(driver)
             save_profile(domain, {"mapping": mapping})
             logger.info("💾 New mapping profile saved for future use.")
+        else:
+            mapping, stale = refresh_stale_selectors(driver, domain, mapping)
 
         logger.info("Loaded mapping:\n{}", json.dumps(mapping, indent=2))
         logger.info("🚀 Starting autofill process...")
-        filled_count = 0
-        skipped_fields = []
-
-        for field, selector in mapping.items():
-            value = data.get(field)
-            if not value:
-                logger.warning(f"⚠️ Field '{field}' has no extracted value in data.")
-                skipped_fields.append(field)
-                continue
-
-            element = resolve_selector(driver, selector)
-            if not element:
-                logger.warning(f"❌ Could not locate element for '{field}' → {selector}")
-                skipped_fields.append(field)
-                continue
-
-            try:
-                highlight(driver, element)
-                tag = element.tag_name.lower()
-                input_type = (element.get_attribute("type") or "text").lower()
-
-                if tag in ["input", "textarea"]:
-                    element.clear()
-                    element.send_keys(str(value))
-                elif tag == "select":
-                    try:
-                        Select(element).select_by_visible_text(str(value))
-                    except Exception:
-                        element.send_keys(str(value))
-                elif input_type in ["checkbox", "radio"]:
-                    val = str(value).lower()
-                    if val in ["yes", "true", "1", "checked"]:
-                        if not element.is_selected():
-                            element.click()
-                else:
-                    element.send_keys(str(value))
-
-                logger.info(f"✅ Filled '{field}' → {selector} with '{value}'")
-                filled_count += 1
-                time.sleep(wait_seconds)
-
-            except Exception as e:
-                logger.warning(f"⚠️ Could not fill '{field}' ({selector}): {e}")
-                skipped_fields.append(field)
-
-        # --- Summary ---
-        logger.info(f"✅ Autofill complete. {filled_count}/{len(mapping)} fields filled.")
-        if skipped_fields:
-            logger.warning(f"⚠️ Skipped {len(skipped_fields)} fields: {', '.join(skipped_fields)}")
+        report = fill_record(driver, mapping, data, bulk=bulk, stale=stale)
+        record_selector_hits(domain, mapping, [report["fields"]])
 
         print("\n✅ Form filled successfully.")
         print("👉 Please review the filled details in the browser.")
@@ -117,6 +237,7 @@ def fill_form_fields(driver, url: str, domain: str, data: dict, wait_seconds: fl
     except Exception as e:
         logger.error(f"❌ Autofill crashed: {e}")
         input("⚠️ Press ENTER to close the browser after inspecting the issue...")
+    return report
 
 # Backward compatibility alias for UI import
 autofill_with_mapping = fill_form_fields
@@ -0,0 +1,35 @@
+# file: automation/harvester.py
+from typing import Dict, List, Optional
+from selenium.webdriver.remote.webdriver import WebDriver
+from common.config import settings
+
+HARVEST_JS_PATH = "automation/js/harvest.js"
+
+# Joins the iframe selectors leading to an element with the element's own selector
+FRAME_SEP = " >>> "
+
+with open(HARVEST_JS_PATH, "r", encoding="utf-8") as f:
+    HARVEST_JS = f.read()
+
+
+def harvest_inputs(driver: WebDriver, include_frames: Optional[bool] = None) -> List[Dict]:
+    """
+    Collect the page's form controls with one execute_script call.
+    Each item has the same tag/attrs/label keys as locators._collect_inputs_soup,
+    plus `visible`, a unique `css` path and `frame` (iframe selectors, outermost
+    first; empty for the top document). Same-origin iframes are included when
+    automation.allow_iframes is on.
+    """
+    if include_frames is None:
+        include_frames = settings.get("automation.allow_iframes", True)
+    items = driver.execute_script(f"return ({HARVEST_JS})(arguments[0]);", bool(include_frames)) or []
+    for item in items:
+        attrs = item["attrs"]
+        if "class" in attrs:
+            attrs["class"] = attrs["class"].split()  # match BeautifulSoup's multi-valued class
+    return items
+
+
+def frame_selector(frames: List[str], selector: str) -> str:
+    """Prefix a selector with the iframe path it lives in."""
+    return FRAME_SEP.join(list(frames) + [selector])
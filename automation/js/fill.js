@@ -0,0 +1,135 @@
+// file: automation/js/fill.js
+// Fill many fields in one round-trip.
+// Called as (fill)(entries, mark) with entries = [{field, selector, value}]
+// and mark an optional function run on each filled element (the highlight);
+// returns [{field, status, reason}] with status "filled", "missing" or
+// "rejected" (the caller retries rejected fields with real key presses).
+function (entries, mark) {
+  var TRUTHY = { yes: 1, true: 1, "1": 1, checked: 1, on: 1, y: 1 };
+  var FRAME_SEP = " >>> ";
+
+  function query(doc, selector) {
+    var sel = selector.trim();
+    if (sel.charAt(0) === "/" || sel.charAt(0) === "(") {
+      return doc.evaluate(sel, doc, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return doc.querySelector(sel);
+  }
+
+  // "iframe#x >>> #email": walk same-origin frames down to the target document
+  function resolve(selector) {
+    var parts = selector.split(FRAME_SEP);
+    var doc = document;
+    for (var i = 0; i < parts.length - 1; i++) {
+      var frame = query(doc, parts[i]);
+      doc = frame && frame.contentDocument;
+      if (!doc) return null;
+    }
+    return query(doc, parts[parts.length - 1]);
+  }
+
+  function norm(s) {
+    return String(s).replace(/\s+/g, " ").trim().toLowerCase();
+  }
+
+  function fire(el) {
+    var win = el.ownerDocument.defaultView;
+    el.dispatchEvent(new win.Event("input", { bubbles: true }));
+    el.dispatchEvent(new win.Event("change", { bubbles: true }));
+  }
+
+  // Framework-bound inputs (React & co.) track the native value setter
+  function setNativeValue(el, value) {
+    var win = el.ownerDocument.defaultView;
+    var proto = el.tagName === "TEXTAREA" ? win.HTMLTextAreaElement.prototype : win.HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, "value").set.call(el, value);
+  }
+
+  // A click toggles once and fires click/input/change natively (dispatching a
+  // click after setting `checked` would toggle it straight back); if a page
+  // handler cancels the click, set the property and fire input/change only.
+  function setChecked(el, checked) {
+    if (el.checked === checked) return;
+    el.click();
+    if (el.checked === checked) return;
+    var win = el.ownerDocument.defaultView;
+    Object.getOwnPropertyDescriptor(win.HTMLInputElement.prototype, "checked").set.call(el, checked);
+    fire(el);
+  }
+
+  function fillSelect(el, value) {
+    var want = norm(value);
+    for (var i = 0; i < el.options.length; i++) {
+      var opt = el.options[i];
+      if (norm(opt.text) === want || norm(opt.value) === want) {
+        el.selectedIndex = i;
+        fire(el);
+        return null;
+      }
+    }
+    return "no option matches";
+  }
+
+  function fillRadio(el, value) {
+    var want = norm(value);
+    var group = el.name ? el.ownerDocument.getElementsByName(el.name) : [el];
+    for (var i = 0; i < group.length; i++) {
+      var r = group[i];
+      var label = r.labels && r.labels.length ? norm(r.labels[0].textContent) : "";
+      if (r.type === "radio" && (norm(r.value) === want || label === want)) {
+        setChecked(r, true);
+        return null;
+      }
+    }
+    if (TRUTHY[want]) {
+      setChecked(el, true);
+      return null;
+    }
+    return "no radio option matches";
+  }
+
+  function fillOne(el, value) {
+    if (el.disabled) return "disabled";
+    var tag = el.tagName;
+    var type = (el.getAttribute("type") || "text").toLowerCase();
+    if (tag === "SELECT") return fillSelect(el, value);
+    if (tag === "INPUT" && type === "checkbox") {
+      setChecked(el, !!TRUTHY[norm(value)]);
+      return null;
+    }
+    if (tag === "INPUT" && type === "radio") return fillRadio(el, value);
+    if (tag !== "TEXTAREA" && tag !== "INPUT") return "not a form control";
+    if (el.readOnly) return "read-only";
+    if (type === "file" || type === "hidden") return "unsupported input type " + type;
+    setNativeValue(el, value);
+    fire(el);
+    // e.g. a date input silently refuses a non-ISO value
+    if (el.value !== value) return "value not accepted";
+    return null;
+  }
+
+  var report = [];
+  for (var i = 0; i < entries.length; i++) {
+    var e = entries[i];
+    var el = null;
+    try {
+      el = resolve(e.selector);
+    } catch (err) {
+      report.push({ field: e.field, status: "missing", reason: String(err) });
+      continue;
+    }
+    if (!el) {
+      report.push({ field: e.field, status: "missing", reason: "no element" });
+      continue;
+    }
+    var problem;
+    try {
+      problem = fillOne(el, String(e.value));
+    } catch (err) {
+      problem = String(err);
+    }
+    if (!problem && mark) mark(el);
+    report.push({ field: e.field, status: problem ? "rejected" : "filled", reason: problem || "" });
+  }
+  return report;
+}
@@ -0,0 +1,114 @@
+// file: automation/js/harvest.js
+// Collect form controls from the page in one round-trip.
+// Called as (harvest)(includeFrames); returns a list of
+// {tag, attrs, label, visible, css, frame} where `frame` is the list of
+// iframe selectors (outermost first) leading to the control's document.
+function (includeFrames) {
+  var CONTROLS = "input, textarea, select";
+  var CONTROL_TAGS = { INPUT: 1, TEXTAREA: 1, SELECT: 1 };
+
+  function squash(s) {
+    return s.replace(/\s+/g, " ").trim();
+  }
+
+  // Label text without the text of controls it wraps (e.g. a <select>'s options)
+  function ownText(node) {
+    var parts = [];
+    for (var c = node.firstChild; c; c = c.nextSibling) {
+      if (c.nodeType === 3) parts.push(c.nodeValue);
+      else if (c.nodeType === 1 && !CONTROL_TAGS[c.tagName]) parts.push(ownText(c));
+    }
+    return squash(parts.join(" "));
+  }
+
+  function cssEscape(s) {
+    return window.CSS && CSS.escape ? CSS.escape(s) : s.replace(/([^\w-])/g, "\\$1");
+  }
+
+  // Shortest-ish selector that querySelector resolves back to this element
+  function cssPath(el) {
+    var doc = el.ownerDocument;
+    var parts = [];
+    for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+      if (node.id && doc.getElementById(node.id) === node) {
+        parts.unshift("#" + cssEscape(node.id));
+        break;
+      }
+      if (node === doc.documentElement) {
+        parts.unshift("html");
+        break;
+      }
+      var i = 1;
+      for (var s = node.previousElementSibling; s; s = s.previousElementSibling) {
+        if (s.tagName === node.tagName) i++;
+      }
+      parts.unshift(node.tagName.toLowerCase() + ":nth-of-type(" + i + ")");
+    }
+    return parts.join(" > ");
+  }
+
+  function isVisible(el) {
+    if (el.type === "hidden") return false;
+    var style = el.ownerDocument.defaultView.getComputedStyle(el);
+    if (style.display === "none" || style.visibility === "hidden") return false;
+    return el.getClientRects().length > 0;
+  }
+
+  function attrsOf(el) {
+    var out = {};
+    for (var i = 0; i < el.attributes.length; i++) out[el.attributes[i].name] = el.attributes[i].value;
+    return out;
+  }
+
+  // Same order as locators._collect_inputs_soup: for=id, wrapping label,
+  // aria-label, placeholder, preceding <label> without a for attribute.
+  function labelOf(el, forIndex) {
+    var text = el.id && forIndex.hasOwnProperty(el.id) ? forIndex[el.id] : "";
+    if (!text) {
+      var wrapper = el.parentElement && el.parentElement.closest("label");
+      text = wrapper ? ownText(wrapper) : "";
+    }
+    if (!text) text = el.getAttribute("aria-label") || el.getAttribute("placeholder") || "";
+    if (!text) {
+      var prev = el.previousElementSibling;
+      if (prev && prev.tagName === "LABEL" && !prev.hasAttribute("for")) text = ownText(prev);
+    }
+    return text;
+  }
+
+  function harvest(doc, frame, out) {
+    var forIndex = {};
+    var labels = doc.querySelectorAll("label[for]");
+    for (var i = 0; i < labels.length; i++) {
+      var key = labels[i].getAttribute("for");
+      if (!forIndex.hasOwnProperty(key)) forIndex[key] = ownText(labels[i]);
+    }
+    var controls = doc.querySelectorAll(CONTROLS);
+    for (var j = 0; j < controls.length; j++) {
+      var el = controls[j];
+      out.push({
+        tag: el.tagName.toLowerCase(),
+        attrs: attrsOf(el),
+        label: labelOf(el, forIndex),
+        visible: isVisible(el),
+        css: cssPath(el),
+        frame: frame
+      });
+    }
+    if (!includeFrames) return;
+    var frames = doc.querySelectorAll("iframe, frame");
+    for (var k = 0; k < frames.length; k++) {
+      var inner = null;
+      try {
+        inner = frames[k].contentDocument;  // null (or throws) for cross-origin frames
+      } catch (e) {
+        inner = null;
+      }
+      if (inner && inner.documentElement) harvest(inner, frame.concat([cssPath(frames[k])]), out);
+    }
+  }
+
+  var out = [];
+  harvest(document, [], out);
+  return out;
+}
@@ -0,0 +1,20 @@
+// file: automation/js/highlight.js
+// Non-blocking fill highlight: a CSS animation that fades out by itself.
+// Called as (highlight)(element, ms); nothing waits for it to finish.
+function (el, ms) {
+  var doc = el.ownerDocument;
+  if (!doc.getElementById("docufill-highlight")) {
+    var style = doc.createElement("style");
+    style.id = "docufill-highlight";
+    style.textContent =
+      "@keyframes docufill-flash { from { outline-color: #1a73e8; background-color: #eaf1fe; } }" +
+      "[data-docufill-filled] { outline: 2px solid transparent;" +
+      " animation: docufill-flash var(--docufill-ms, 300ms) ease-out; }";
+    (doc.head || doc.documentElement).appendChild(style);
+  }
+  el.style.setProperty("--docufill-ms", ms + "ms");
+  el.setAttribute("data-docufill-filled", "");
+  el.addEventListener("animationend", function () {
+    el.removeAttribute("data-docufill-filled");
+  }, { once: true });
+}
@@ -0,0 +1,23 @@
+// file: automation/js/resolve.js
+// Resolve many selectors in one round-trip, in the current document.
+// Called as (resolve)(selectors) with CSS or XPath strings (XPath starts
+// with "/" or "("); returns one element or null per selector. An invalid
+// selector counts as a miss.
+function (selectors) {
+  var out = [];
+  for (var i = 0; i < selectors.length; i++) {
+    var sel = selectors[i].trim();
+    var el = null;
+    try {
+      if (sel.charAt(0) === "/" || sel.charAt(0) === "(") {
+        el = document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+      } else {
+        el = document.querySelector(sel);
+      }
+    } catch (err) {
+      el = null;
+    }
+    out.push(el && el.nodeType === 1 ? el : null);
+  }
+  return out;
+}
@@ -1,14 +1,27 @@
 # file: automation/locators.py
-from typing import Dict, List, Optional, Tuple
+import weakref
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import NoSuchElementException
-from rapidfuzz import fuzz
-from bs4 import BeautifulSoup
-from datastore.storage import load_profile
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+import numpy as np
+from rapidfuzz import fuzz, process
+from bs4 import BeautifulSoup, Comment, NavigableString
+from lxml import html as lxml_html
+from loguru import logger
+from common.config import settings
+from datastore.storage import load_profile, save_profile
+from automation.harvester import FRAME_SEP, frame_selector, harvest_inputs
+
+RESOLVE_JS_PATH = "automation/js/resolve.js"
+
+with open(RESOLVE_JS_PATH, "r", encoding="utf-8") as f:
+    RESOLVE_JS = f.read()
 
 CANDIDATE_ATTRS = ["name", "id", "aria-label", "placeholder"]
+CONTROL_TAGS = ["input", "textarea", "select"]
 
 # Canonical cues: hints used for automatic field matching
 CANONICAL_CUES = {
@@ -46,26 +59,47 @@ def _css_or_xpath(selector: str) -> Tuple[str, str]:
     return (By.CSS_SELECTOR, sel)
 
 
-def _score_label(text: str, cues: List[str]) -> int:
-    """Compute fuzzy similarity between field label and canonical cues."""
-    text = (text or "").lower().strip()
-    return max(fuzz.QRatio(text, cue) for cue in cues) if text else 0
+@lru_cache(maxsize=4096)
+def _compile_selector(selector: str) -> Tuple[Tuple[str, ...], str, str]:
+    """Mapping selector -> (frame path, By, expression); parsed once per distinct selector."""
+    *frames, target = selector.split(FRAME_SEP)
+    by, expr = _css_or_xpath(target)
+    return tuple(frames), by, expr
 
 
-def _collect_inputs_soup(html: str) -> List[Dict]:
-    """Parse HTML and collect all input-like elements with visible labels."""
-    soup = BeautifulSoup(html, "lxml")
-    inputs = []
+def _own_text(node) -> str:
+    """Text of a label without the text of controls it wraps (e.g. a <select>'s options)."""
+    parts = []
+    for child in node.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString):
+            parts.append(str(child))
+        elif child.name not in CONTROL_TAGS:
+            parts.append(_own_text(child))
+    return " ".join(" ".join(parts).split())
 
-    for el in soup.select("input, textarea, select"):
-        label_text = ""
-        if el.has_attr("id"):
-            lbl = soup.select_one(f"label[for='{el['id']}']")
-            if lbl:
-                label_text = lbl.get_text(" ", strip=True)
 
+def _collect_inputs_bs4(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    # One pass over the labels instead of a label[for=...] query per input
+    for_index: Dict[str, str] = {}
+    for lbl in soup.find_all("label"):
+        if lbl.has_attr("for"):
+            for_index.setdefault(lbl["for"], _own_text(lbl))
+
+    inputs = []
+    for el in soup.find_all(CONTROL_TAGS):
+        label_text = for_index.get(el["id"], "") if el.has_attr("id") else ""
+        if not label_text:
+            wrapper = el.find_parent("label")
+            label_text = _own_text(wrapper) if wrapper else ""
         if not label_text:
             label_text = el.get("aria-label") or el.get("placeholder") or ""
+        if not label_text:
+            prev = el.find_previous_sibling()
+            if prev is not None and prev.name == "label" and not prev.has_attr("for"):
+                label_text = _own_text(prev)
 
         inputs.append({
             "tag": el.name,
@@ -76,49 +110,340 @@ def _collect_inputs_soup(html: str) -> List[Dict]:
     return inputs
 
 
+def _own_text_lxml(node) -> str:
+    parts = [node.text or ""]
+    for child in node:
+        if isinstance(child.tag, str) and child.tag not in CONTROL_TAGS:
+            parts.append(_own_text_lxml(child))
+        parts.append(child.tail or "")
+    return " ".join(" ".join(parts).split())
+
+
+def _collect_inputs_lxml(html: str) -> List[Dict]:
+    """Same result as _collect_inputs_bs4, straight off the lxml tree (no soup is built)."""
+    if not html or not html.strip():
+        return []
+    root = lxml_html.fromstring(html)
+    for_index: Dict[str, str] = {}
+    for lbl in root.iter("label"):
+        if lbl.get("for") is not None:
+            for_index.setdefault(lbl.get("for"), _own_text_lxml(lbl))
+
+    inputs = []
+    for el in root.iter(*CONTROL_TAGS):
+        label_text = for_index.get(el.get("id"), "") if el.get("id") is not None else ""
+        if not label_text:
+            wrapper = next(el.iterancestors("label"), None)
+            label_text = _own_text_lxml(wrapper) if wrapper is not None else ""
+        if not label_text:
+            label_text = el.get("aria-label") or el.get("placeholder") or ""
+        if not label_text:
+            prev = el.getprevious()
+            while prev is not None and not isinstance(prev.tag, str):
+                prev = prev.getprevious()  # skip comments, as find_previous_sibling() does
+            if prev is not None and prev.tag == "label" and prev.get("for") is None:
+                label_text = _own_text_lxml(prev)
+
+        attrs = dict(el.attrib)
+        if "class" in attrs:
+            attrs["class"] = attrs["class"].split()  # bs4 treats class as multi-valued
+        inputs.append({
+            "tag": el.tag,
+            "attrs": attrs,
+            "label": label_text
+        })
+
+    return inputs
+
+
+def _collect_inputs_soup(html: str) -> List[Dict]:
+    """
+    Parse HTML and collect all input-like elements with visible labels.
+    Label lookup order: <label for=id>, a label wrapping the input,
+    aria-label, placeholder, then an immediately preceding <label> without
+    a for attribute. automation.html_parser picks the parser: "lxml" reads
+    the lxml tree directly, "bs4" goes through BeautifulSoup.
+    """
+    if settings.get("automation.html_parser", "lxml") == "bs4":
+        return _collect_inputs_bs4(html)
+    return _collect_inputs_lxml(html)
+
+
+MATCH_THRESHOLD = 70
+
+# Cue strings flattened in CANONICAL_CUES order, with where each field's cues start
+_CUE_FIELDS = list(CANONICAL_CUES)
+_CUES = [cue for cues in CANONICAL_CUES.values() for cue in cues]
+_CUE_STARTS = np.cumsum([0] + [len(cues) for cues in CANONICAL_CUES.values()])[:-1]
+
+
+def _input_text(el: Dict) -> str:
+    text = el["label"] or " ".join([el["attrs"].get(a, "") for a in CANDIDATE_ATTRS])
+    return (text or "").lower().strip()
+
+
+def _score_matrix(inputs: List[Dict]) -> np.ndarray:
+    """fields x inputs: best QRatio of any of the field's cues against the input's label."""
+    texts = [_input_text(el) for el in inputs]
+    scores = process.cdist(_CUES, texts, scorer=fuzz.QRatio, workers=-1)  # cues x inputs
+    return np.maximum.reduceat(scores, _CUE_STARTS, axis=0)
+
+
+def _hungarian(cost: np.ndarray) -> np.ndarray:
+    """
+    Minimum-cost assignment for an n x m cost matrix with n <= m: the column
+    chosen for each row. Shortest augmenting paths with potentials, O(n^2 m),
+    the inner scan over columns vectorized.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)  # row (1-based) matched to each column; column 0 is a sentinel
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            cur = np.full(m + 1, np.inf)
+            cur[1:] = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv)
+            minv[better] = cur[better]
+            way[better] = j0
+            j1 = int(np.argmin(np.where(free, minv, np.inf)))
+            delta = minv[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    cols = np.full(n, -1, dtype=int)
+    for j in range(1, m + 1):
+        if p[j]:
+            cols[p[j] - 1] = j - 1
+    return cols
+
+
+def _assign(scores: np.ndarray, threshold: int = MATCH_THRESHOLD) -> Dict[int, int]:
+    """
+    One-to-one field -> input assignment maximizing the total score of pairs
+    at or above the threshold. Returns {field row: input column}.
+    """
+    eligible = np.where(scores >= threshold, scores, 0.0)
+    rows = np.flatnonzero(eligible.any(axis=1))
+    cols = np.flatnonzero(eligible.any(axis=0))
+    if rows.size == 0:
+        return {}
+    sub = eligible[np.ix_(rows, cols)]
+    if sub.shape[0] <= sub.shape[1]:
+        picks = [(r, c) for r, c in enumerate(_hungarian(-sub))]
+    else:
+        picks = [(r, c) for c, r in enumerate(_hungarian(-sub.T))]
+    return {int(rows[r]): int(cols[c]) for r, c in picks if c >= 0 and sub[r, c] >= threshold}
+
+
+def _selector_for(el: Dict) -> Optional[str]:
+    """Attribute selector for a collected input; harvested inputs in iframes get their frame path."""
+    attrs = el["attrs"]
+    if "id" in attrs:
+        sel = f"#{attrs['id']}"
+    elif "name" in attrs:
+        sel = f"[name='{attrs['name']}']"
+    elif "aria-label" in attrs:
+        sel = f"[aria-label='{attrs['aria-label']}']"
+    elif "placeholder" in attrs:
+        sel = f"[placeholder='{attrs['placeholder']}']"
+    else:
+        sel = el.get("css")
+    if sel and el.get("frame"):
+        sel = frame_selector(el["frame"], sel)
+    return sel
+
+
+def suggest_mapping_from_inputs(inputs: List[Dict]) -> Dict[str, str]:
+    """
+    Map canonical fields to collected inputs. Cue/label similarity is one
+    cdist matrix; fields and inputs are then paired one-to-one (no input is
+    claimed twice) so the summed score of pairs scoring >= 70 is maximal.
+    Controls the browser reports as not visible (type=hidden, display:none,
+    no layout box) are not candidates; parsed HTML carries no such flag.
+    Returns: {canonical_field: CSS selector}
+    """
+    inputs = [i for i in inputs if i.get("visible", True)]
+    if not inputs:
+        return {}
+    pairs = _assign(_score_matrix(inputs))
+    mapping = {}
+    for row in sorted(pairs):
+        sel = _selector_for(inputs[pairs[row]])
+        if sel:
+            mapping[_CUE_FIELDS[row]] = sel
+    return mapping
+
+
+def suggest_mapping_from_html(html: str) -> Dict[str, str]:
+    return suggest_mapping_from_inputs(_collect_inputs_soup(html))
+
+
 def suggest_mapping_for_page(driver: WebDriver) -> Dict[str, str]:
     """
     Suggests mappings for form fields dynamically using fuzzy label matching.
+    Inputs are harvested in the browser (one script call, same-origin iframes
+    included) unless automation.dom_harvest is off or the script fails, in
+    which case page_source is parsed here.
     Returns: {canonical_field: CSS selector}
     """
-    html = driver.page_source
-    inputs = _collect_inputs_soup(html)
-    mapping = {}
+    if settings.get("automation.dom_harvest", True):
+        try:
+            return suggest_mapping_from_inputs(harvest_inputs(driver))
+        except WebDriverException as e:
+            logger.warning("DOM harvest failed ({}); parsing page_source instead", e)
+    return suggest_mapping_from_html(driver.page_source)
 
-    for field, cues in CANONICAL_CUES.items():
-        best = None
-        best_score = 0
-
-        for el in inputs:
-            label = el["label"] or " ".join([el["attrs"].get(a, "") for a in CANDIDATE_ATTRS])
-            score = _score_label(label, cues)
-            if score > best_score:
-                best = el
-                best_score = score
-
-        if best and best_score >= 70:
-            attrs = best["attrs"]
-            if "id" in attrs:
-                mapping[field] = f"#{attrs['id']}"
-            elif "name" in attrs:
-                mapping[field] = f"[name='{attrs['name']}']"
-            elif "aria-label" in attrs:
-                mapping[field] = f"[aria-label='{attrs['aria-label']}']"
-            elif "placeholder" in attrs:
-                mapping[field] = f"[placeholder='{attrs['placeholder']}']"
 
-    return mapping
+# Drivers currently switched into an iframe by resolve_selector
+_IN_FRAME: "weakref.WeakSet[WebDriver]" = weakref.WeakSet()
+
+
+def _enter_frames(driver: WebDriver, frames: List[str]):
+    """Point the driver at the document the selector lives in (top document if no frames)."""
+    if not frames and driver not in _IN_FRAME:
+        return
+    driver.switch_to.default_content()
+    _IN_FRAME.discard(driver)
+    for frame in frames:
+        driver.switch_to.frame(driver.find_element(*_css_or_xpath(frame)))
+        _IN_FRAME.add(driver)
+
+
+def enter_top_document(driver: WebDriver):
+    """Undo a frame switch left by resolve_selector (no round-trip if there is none)."""
+    _enter_frames(driver, [])
+
+
+def enter_frame_of(driver: WebDriver, selector: str):
+    """Switch into the frame a (resolved) selector lives in, e.g. before using a resolve_selectors handle."""
+    _enter_frames(driver, list(_compile_selector(selector)[0]))
 
 
 def resolve_selector(driver: WebDriver, selector: str) -> Optional[WebElement]:
-    """Try resolving selector to an element; return None if not found."""
-    by, expr = _css_or_xpath(selector)
+    """
+    Try resolving selector to an element; return None if not found.
+    A selector with iframe parts ("iframe#x >>> #email") leaves the driver
+    switched into that frame so the element can be used; the next top-level
+    lookup switches back.
+    """
+    frames, by, expr = _compile_selector(selector)
     try:
+        _enter_frames(driver, list(frames))
         return driver.find_element(by, expr)
     except NoSuchElementException:
         return None
 
 
+def resolve_selectors(driver: WebDriver, mapping: Dict[str, str]) -> Tuple[Dict[str, WebElement], List[str]]:
+    """
+    Resolve a whole {field: selector} mapping with one script call per
+    document (the top page, plus one per distinct iframe path) instead of a
+    find_element per field; nothing waits for missing elements.
+    Returns ({field: element}, [fields that missed]). The driver is left in
+    the top document: call enter_frame_of(driver, selector) before using a
+    handle that lives in an iframe.
+    """
+    groups: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+    for field, selector in mapping.items():
+        frames, _, _ = _compile_selector(selector)
+        groups.setdefault(frames, []).append((field, selector.split(FRAME_SEP)[-1].strip()))
+
+    found: Dict[str, WebElement] = {}
+    for frames, items in sorted(groups.items(), key=lambda g: len(g[0])):
+        try:
+            _enter_frames(driver, list(frames))
+            elements = driver.execute_script(f"return ({RESOLVE_JS})(arguments[0]);", [t for _, t in items]) or []
+        except WebDriverException as e:  # frame gone, or the page navigated
+            logger.debug("Could not resolve selectors in frame {}: {}", list(frames), e)
+            continue
+        for (field, _), el in zip(items, elements):
+            if el is not None:
+                found[field] = el
+    _enter_frames(driver, [])
+    return found, [f for f in mapping if f not in found]
+
+
+def _stale_after() -> int:
+    return int(settings.get("automation.selectors.stale_after", 3))
+
+
+def record_selector_hits(domain: str, mapping: Dict[str, str], reports: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """
+    Fold fill reports ({field: {"status"}}, one per filled record) into the
+    profile's selector_stats: per field the selector, runs, hits and the
+    current run of misses. Skipped fields (no value) do not count; a field
+    whose selector changed starts over. Returns the updated stats.
+    """
+    prof = load_profile(domain) or {"domain": domain, "mapping": mapping}
+    stats = {f: s for f, s in prof.get("selector_stats", {}).items() if mapping.get(f) == s.get("selector")}
+    for fields in reports:
+        for field, r in fields.items():
+            if field not in mapping or r["status"] == "skipped":
+                continue
+            s = stats.setdefault(field, {"selector": mapping[field], "runs": 0, "hits": 0, "miss_streak": 0})
+            s["runs"] += 1
+            if r["status"] == "missing":
+                s["miss_streak"] += 1
+            else:
+                s["hits"] += 1
+                s["miss_streak"] = 0
+    for s in stats.values():
+        s["hit_rate"] = round(s["hits"] / s["runs"], 3) if s["runs"] else 0.0
+        s["stale"] = s["miss_streak"] >= _stale_after()
+    prof["selector_stats"] = stats
+    save_profile(domain, prof)
+    return stats
+
+
+def stale_fields(domain: str, mapping: Dict[str, str]) -> List[str]:
+    """Mapped fields whose current selector has missed automation.selectors.stale_after runs in a row."""
+    stats = (load_profile(domain) or {}).get("selector_stats", {})
+    return [f for f, sel in mapping.items()
+            if f in stats and stats[f].get("selector") == sel and stats[f].get("miss_streak", 0) >= _stale_after()]
+
+
+def refresh_stale_selectors(driver: WebDriver, domain: str, mapping: Dict[str, str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Re-suggest selectors for stale fields from the loaded page and keep the
+    ones that resolve (saved to the profile). Returns (mapping, fields still
+    stale); the caller fills those without waiting for them to appear.
+    """
+    stale = stale_fields(domain, mapping)
+    if not stale:
+        return mapping, []
+    suggested = suggest_mapping_for_page(driver)
+    candidates = {f: suggested[f] for f in stale if suggested.get(f) and suggested[f] != mapping[f]}
+    found, _ = resolve_selectors(driver, candidates) if candidates else ({}, [])
+    if found:
+        mapping = dict(mapping, **{f: candidates[f] for f in found})
+        prof = load_profile(domain) or {"domain": domain}
+        prof["mapping"] = mapping
+        save_profile(domain, prof)
+        for f in found:
+            logger.info("🔁 Selector for '{}' kept missing; re-suggested {}", f, candidates[f])
+    still = [f for f in stale if f not in found]
+    if still:
+        logger.warning("⚠️ Stale selectors (no wait for these): {}", ", ".join(f"{f} → {mapping[f]}" for f in still))
+    return mapping, still
+
+
 def get_profile_or_suggestions(driver: WebDriver, domain: str) -> Dict[str, str]:
     """
     Loads stored profile mapping from local datastore, or auto-generates if not found.
@@ -0,0 +1,97 @@
+# file: automation/waits.py
+"""
+Condition-based waits for the autofill loop, and a stopwatch that splits a
+form's wall time into waiting (polling the page) and working (driving it).
+
+Two timeouts from config/settings.yaml:
+  automation.implicit_wait  things that should appear almost at once
+                            (a field rendered late, a typed value echoing back)
+  automation.explicit_wait  page-driven work (document load, options of a
+                            dropdown that depends on another field)
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+from common.config import settings
+from automation.locators import resolve_selector
+
+POLL_S = 0.05
+
+_HAS_OPTION_JS = """
+var want = String(arguments[1]).replace(/\\s+/g, " ").trim().toLowerCase();
+return Array.prototype.some.call(arguments[0].options, function (o) {
+  return o.text.replace(/\\s+/g, " ").trim().toLowerCase() === want || o.value.toLowerCase() === want;
+});
+"""
+
+
+def implicit_timeout() -> float:
+    return float(settings.get("automation.implicit_wait", 2))
+
+
+def explicit_timeout() -> float:
+    return float(settings.get("automation.explicit_wait", 10))
+
+
+class FillClock:
+    """Wall time of one form; time spent inside waiting() counts as wait, the rest as work."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.wait_s = 0.0
+
+    @contextmanager
+    def waiting(self):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wait_s += time.perf_counter() - t
+
+    def timings(self) -> Dict[str, float]:
+        total = time.perf_counter() - self.t0
+        return {"wait_s": round(self.wait_s, 3), "work_s": round(total - self.wait_s, 3), "total_s": round(total, 3)}
+
+
+def wait_until(driver, condition: Callable, timeout: float, clock: Optional[FillClock] = None):
+    """condition's first truthy result, or None on timeout (stale elements count as 'not yet')."""
+    wait = WebDriverWait(driver, timeout, poll_frequency=POLL_S, ignored_exceptions=(StaleElementReferenceException,))
+    try:
+        if clock is None:
+            return wait.until(condition)
+        with clock.waiting():
+            return wait.until(condition)
+    except TimeoutException:
+        return None
+
+
+def page_loaded(driver) -> bool:
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def element_ready(selector: str) -> Callable:
+    """The element once it is present and enabled."""
+    def check(driver):
+        el = resolve_selector(driver, selector)
+        return el if el is not None and el.is_enabled() else False
+    return check
+
+
+def option_available(element: WebElement, value: str) -> Callable:
+    """True once the <select> offers an option whose text or value is `value` (dependent dropdowns)."""
+    return lambda driver: driver.execute_script(_HAS_OPTION_JS, element, value)
+
+
+def value_committed(element: WebElement, before: str, value: str) -> Callable:
+    """
+    True once the control's value has moved off `before` (its value before
+    typing) or reads back `value`. Date, number and masked inputs store their
+    own form of the text, so an exact echo is not required.
+    """
+    def check(driver):
+        now = element.get_attribute("value") or ""
+        return now != before or now == value
+    return check
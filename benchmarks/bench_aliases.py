@@ -0,0 +1,77 @@
+# file: benchmarks/bench_aliases.py
+"""
+Key -> canonical-name mapping over a large synthetic key set: the original
+per-key process.extractOne, AliasResolver cold (one cdist call for the
+batch), and AliasResolver warm (every key memoized).
+
+Run from the repository root:
+    python -m benchmarks.bench_aliases --keys 20000 --unique 2000
+"""
+import argparse
+import random
+import time
+from rapidfuzz import process, fuzz
+from ai_extraction.normalize import ALIASES, CANONICAL_KEYS, AliasResolver
+
+
+def legacy_map_alias(key: str) -> str:
+    """map_alias as shipped before: fuzzy search for every call."""
+    k = key.lower().strip()
+    if k in ALIASES:
+        return ALIASES[k]
+    best = process.extractOne(k, CANONICAL_KEYS, scorer=fuzz.QRatio)
+    if best and best[1] >= 80:
+        return best[0]
+    return key
+
+
+def synthetic_keys(n: int, unique: int, seed: int = 0):
+    """Model-style keys: canonical names, aliases, case/typo variants and junk, with repeats."""
+    rnd = random.Random(seed)
+    base = CANONICAL_KEYS + list(ALIASES)
+    pool = []
+    for i in range(unique):
+        k = rnd.choice(base)
+        kind = i % 4
+        if kind == 1:
+            k = k.upper()
+        elif kind == 2 and len(k) > 4:
+            j = rnd.randrange(len(k) - 1)
+            k = k[:j] + k[j + 1] + k[j] + k[j + 2:]  # transposition typo
+        elif kind == 3:
+            k = f"{k}_{rnd.randrange(1000)}"
+        pool.append(k)
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--keys", type=int, default=20000)
+    ap.add_argument("--unique", type=int, default=2000)
+    args = ap.parse_args()
+
+    keys = synthetic_keys(args.keys, args.unique)
+    process.cdist(["warm up"], CANONICAL_KEYS, scorer=fuzz.QRatio, workers=-1)  # one-time native init
+    t_old, old = _timed(lambda: [legacy_map_alias(k) for k in keys])
+    resolver = AliasResolver()
+    t_cold, cold = _timed(lambda: resolver.resolve_many(keys))
+    t_warm, warm = _timed(lambda: resolver.resolve_many(keys))
+    single = AliasResolver()
+    t_single, _ = _timed(lambda: [single.resolve(k) for k in keys])
+    assert old == cold == warm, "resolver disagrees with the original mapping"
+
+    print(f"{len(keys)} keys, {len(set(keys))} distinct")
+    print(f"{'':24} {'seconds':>9} {'speedup':>8}")
+    for name, t in (("extractOne per key", t_old), ("resolve per key", t_single),
+                    ("resolve_many cold", t_cold), ("resolve_many warm", t_warm)):
+        print(f"{name:24} {t:>9.4f} {t_old / t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# file: benchmarks/bench_dates.py
+"""
+parse_date throughput: the original dateutil-for-everything parser versus
+the strict-pattern fast path, cold (empty memo) and warm.
+
+Run from the repository root:
+    python -m benchmarks.bench_dates --values 50000 --unique 5000
+"""
+import argparse
+import random
+import time
+from dateutil import parser as dateparser
+from parsing import validators
+
+
+def legacy_parse_date(s: str):
+    """parse_date as shipped before."""
+    if not s:
+        return "", 0.0
+    try:
+        dt = dateparser.parse(s, dayfirst=True, fuzzy=True)
+        return dt.strftime("%Y-%m-%d"), 0.9
+    except Exception:
+        return "", 0.0
+
+
+def synthetic_dates(n: int, unique: int, seed: int = 0):
+    """DD/MM/YYYY, ISO, DD-Mon-YYYY and a few free-form dates, with repeats."""
+    rnd = random.Random(seed)
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    pool = []
+    for i in range(unique):
+        y, m, d = rnd.randint(1990, 2010), rnd.randint(1, 12), rnd.randint(1, 28)
+        pool.append([
+            f"{d:02d}/{m:02d}/{y}",
+            f"{y}-{m:02d}-{d:02d}",
+            f"{d:02d}-{months[m - 1]}-{y}",
+            f"born on {d} {months[m - 1]} {y}",
+        ][0 if i % 10 < 5 else 1 if i % 10 < 7 else 2 if i % 10 < 9 else 3])
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def _rate(fn, values):
+    t0 = time.perf_counter()
+    for v in values:
+        fn(v)
+    return len(values) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--values", type=int, default=50000)
+    ap.add_argument("--unique", type=int, default=5000)
+    args = ap.parse_args()
+
+    values = synthetic_dates(args.values, args.unique)
+    distinct = sorted(set(values))
+    mismatched = [v for v in distinct if legacy_parse_date(v)[0] != validators.parse_date(v)[0]]
+    validators._parse_date_cached.cache_clear()
+
+    old = _rate(legacy_parse_date, values)
+    distinct_new = _rate(validators.parse_date, distinct)  # every value parsed once: no memo help
+    validators._parse_date_cached.cache_clear()
+    cold = _rate(validators.parse_date, values)
+    warm = _rate(validators.parse_date, values)
+
+    print(f"{len(values)} values, {len(distinct)} distinct, {len(mismatched)} parsed differently")
+    if mismatched:
+        v = mismatched[0]
+        print(f"  e.g. {v!r}: before {legacy_parse_date(v)[0]}, now {validators.parse_date(v)[0]}")
+    print(f"{'':22} {'values/s':>12} {'speedup':>8}")
+    for name, r in (("dateutil (before)", old), ("fast path, no repeats", distinct_new),
+                    ("fast path, cold memo", cold), ("fast path, warm memo", warm)):
+        print(f"{name:22} {r:>12.0f} {r / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# file: benchmarks/bench_driver_pool.py
+"""
+Per-action browser cost: a fresh get_driver() + quit() per mapping/autofill
+action (the old UI handlers) versus a warm DriverPool session that is reset
+between actions. Each action loads a local form and suggests a mapping.
+Needs Chrome/Chromium and a matching chromedriver.
+
+Run from the repository root:
+    python -m benchmarks.bench_driver_pool --actions 5 --headless
+"""
+import argparse
+import functools
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from automation.driver import DriverPool, get_driver
+from automation.locators import suggest_mapping_for_page
+from benchmarks.bench_harvest import _Quiet
+
+FORMS_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "forms"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--actions", type=int, default=5)
+    ap.add_argument("--headless", action="store_true")
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Quiet, directory=str(FORMS_DIR)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/admission.html"
+
+    def action(drv):
+        drv.get(url)
+        suggest_mapping_for_page(drv)
+
+    try:
+        t0 = time.perf_counter()
+        for _ in range(args.actions):
+            drv = get_driver(headless=args.headless)
+            try:
+                action(drv)
+            finally:
+                drv.quit()
+        t_cold = (time.perf_counter() - t0) / args.actions
+
+        pool = DriverPool(size=1, headless=args.headless)
+        pool.warm()
+        t0 = time.perf_counter()
+        for _ in range(args.actions):
+            with pool.session() as drv:
+                action(drv)
+        t_warm = (time.perf_counter() - t0) / args.actions
+        stats = pool.stats()
+        pool.close()
+    finally:
+        server.shutdown()
+
+    print(f"new browser per action  {t_cold:>6.2f}s / action")
+    print(f"pooled session          {t_warm:>6.2f}s / action  ({t_cold / t_warm:.1f}x faster)")
+    print(f"pool startup {stats['startup_mean_s']}s once, {stats['warm_hits']} warm acquires, {stats['resets']} resets")
+
+
+if __name__ == "__main__":
+    main()
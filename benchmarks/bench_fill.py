@@ -0,0 +1,71 @@
+# file: benchmarks/bench_fill.py
+"""
+Form-fill latency in a real browser: one WebDriver round-trip set per field
+(find_element + clear + send_keys) versus one in-page fill script for the
+whole form. Generated forms are served from a local static server.
+Needs Chrome/Chromium and a matching chromedriver.
+
+Run from the repository root:
+    python -m benchmarks.bench_fill --sizes 20 100 500
+"""
+import argparse
+import functools
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from automation.filler import bulk_fill
+from benchmarks.bench_harvest import _Quiet
+from benchmarks.bench_locators import make_form
+
+
+def per_field(drv, entries):
+    for e in entries:
+        el = drv.find_element(By.CSS_SELECTOR, e["selector"])
+        el.clear()
+        el.send_keys(e["value"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            Path(tmp, f"form_{n}.html").write_text(make_form(n), encoding="utf-8")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Quiet, directory=tmp))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        opts = Options()
+        opts.add_argument("--headless=new")
+        opts.add_argument("--disable-gpu")
+        drv = webdriver.Chrome(options=opts)
+        try:
+            print(f"{'fields':>7} {'send_keys':>10} {'bulk':>8} {'speedup':>8}")
+            for n in args.sizes:
+                url = f"http://127.0.0.1:{server.server_address[1]}/form_{n}.html"
+                drv.get(url)
+                names = drv.execute_script(
+                    "return Array.from(document.querySelectorAll('input[name]:not([type=hidden])'), e => e.name);")
+                entries = [{"field": f"f{i}", "selector": f"[name='{nm}']", "value": f"value {i}"}
+                           for i, nm in enumerate(names)]
+                t0 = time.perf_counter()
+                per_field(drv, entries)
+                t_keys = time.perf_counter() - t0
+                drv.get(url)
+                t0 = time.perf_counter()
+                report = bulk_fill(drv, entries)
+                t_bulk = time.perf_counter() - t0
+                filled = sum(1 for r in report.values() if r["status"] == "filled")
+                print(f"{len(entries):>7} {t_keys:>9.3f}s {t_bulk:>7.3f}s {t_keys / t_bulk:>7.1f}x  ({filled} filled)")
+        finally:
+            drv.quit()
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# file: benchmarks/bench_harvest.py
+"""
+Mapping-suggestion latency in a real browser: fetching driver.page_source
+and parsing it in Python versus one in-page harvest script call.
+Generated forms are served from a local static server (no network).
+Needs Chrome/Chromium and a matching chromedriver.
+
+Run from the repository root:
+    python -m benchmarks.bench_harvest --sizes 50 500 5000
+"""
+import argparse
+import functools
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from automation import locators
+from automation.harvester import harvest_inputs
+from benchmarks.bench_locators import make_form
+
+
+class _Quiet(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            Path(tmp, f"form_{n}.html").write_text(make_form(n), encoding="utf-8")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Quiet, directory=tmp))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        opts = Options()
+        opts.add_argument("--headless=new")
+        opts.add_argument("--disable-gpu")
+        drv = webdriver.Chrome(options=opts)
+        try:
+            print(f"{'inputs':>7} {'page_source':>12} {'harvest':>9} {'speedup':>8}")
+            for n in args.sizes:
+                drv.get(f"http://127.0.0.1:{server.server_address[1]}/form_{n}.html")
+                t_src = _best(lambda: locators.suggest_mapping_from_html(drv.page_source), args.repeat)
+                t_js = _best(lambda: locators.suggest_mapping_from_inputs(harvest_inputs(drv)), args.repeat)
+                print(f"{n:>7} {t_src:>11.3f}s {t_js:>8.3f}s {t_src / t_js:>7.1f}x")
+        finally:
+            drv.quit()
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
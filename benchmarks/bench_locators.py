@@ -0,0 +1,82 @@
+# file: benchmarks/bench_locators.py
+"""
+_collect_inputs_soup on generated forms with 50 / 500 / 5000 inputs: the
+original label[for] query per input versus the one-pass label index, with
+BeautifulSoup and with the direct lxml parser.
+
+Run from the repository root:
+    python -m benchmarks.bench_locators --sizes 50 500 5000
+"""
+import argparse
+import time
+from typing import Dict, List
+from bs4 import BeautifulSoup
+from automation import locators
+
+LABELS = ["Full Name", "Father's Name", "Date of Birth", "Email", "Mobile", "Address", "City", "Pincode"]
+
+
+def make_form(n: int) -> str:
+    """A long form mixing for-labels, wrapping labels, adjacent labels and placeholders."""
+    rows = []
+    for i in range(n):
+        label = f"{LABELS[i % len(LABELS)]} {i}"
+        kind = i % 4
+        if kind == 0:
+            rows.append(f'<div class="row"><label for="f{i}">{label}</label><input id="f{i}" name="f{i}"></div>')
+        elif kind == 1:
+            rows.append(f'<div class="row"><label>{label} <input name="f{i}"></label></div>')
+        elif kind == 2:
+            rows.append(f'<div class="row"><label>{label}</label><input name="f{i}"></div>')
+        else:
+            rows.append(f'<div class="row"><span>{label}</span><input name="f{i}" placeholder="{label}"></div>')
+    return "<html><body><form>" + "\n".join(rows) + "</form></body></html>"
+
+
+def legacy_collect(html: str) -> List[Dict]:
+    """_collect_inputs_soup as shipped before: one label[for] query per input."""
+    soup = BeautifulSoup(html, "lxml")
+    inputs = []
+    for el in soup.select("input, textarea, select"):
+        label_text = ""
+        if el.has_attr("id"):
+            lbl = soup.select_one(f"label[for='{el['id']}']")
+            if lbl:
+                label_text = lbl.get_text(" ", strip=True)
+        if not label_text:
+            label_text = el.get("aria-label") or el.get("placeholder") or ""
+        inputs.append({"tag": el.name, "attrs": dict(el.attrs), "label": label_text})
+    return inputs
+
+
+def _timed(fn, html, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'inputs':>7} {'before':>9} {'bs4 index':>10} {'lxml':>9} {'speedup':>8} {'labeled before/after':>21}")
+    for n in args.sizes:
+        html = make_form(n)
+        # The legacy scan is quadratic; one run is plenty at the large sizes
+        t_old, old = _timed(legacy_collect, html, 1 if n > 500 else args.repeat)
+        t_bs4, new = _timed(locators._collect_inputs_bs4, html, args.repeat)
+        t_lxml, fast = _timed(locators._collect_inputs_lxml, html, args.repeat)
+        assert new == fast, "parsers disagree"
+        labeled_old = sum(1 for i in old if i["label"])
+        labeled_new = sum(1 for i in new if i["label"])
+        print(f"{n:>7} {t_old:>8.3f}s {t_bs4:>9.3f}s {t_lxml:>8.3f}s {t_old / t_lxml:>7.1f}x "
+              f"{labeled_old:>10}/{labeled_new}")
+
+
+if __name__ == "__main__":
+    main()
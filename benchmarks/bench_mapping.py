@@ -0,0 +1,57 @@
+# file: benchmarks/bench_mapping.py
+"""
+suggest_mapping on generated forms: the original per-field greedy loop of
+fuzz.QRatio calls versus one cdist matrix plus one-to-one assignment.
+Inputs are collected once; only the matching step is timed.
+
+Run from the repository root:
+    python -m benchmarks.bench_mapping --sizes 50 500 5000
+"""
+import argparse
+import time
+from collections import Counter
+from typing import Dict, List
+from rapidfuzz import fuzz
+from automation import locators
+from benchmarks.bench_locators import make_form
+
+
+def legacy_suggest(inputs: List[Dict]) -> Dict[str, str]:
+    """suggest_mapping_for_page's matching as shipped before: greedy best input per field."""
+    mapping = {}
+    for field, cues in locators.CANONICAL_CUES.items():
+        best, best_score = None, 0
+        for el in inputs:
+            text = (el["label"] or " ".join([el["attrs"].get(a, "") for a in locators.CANDIDATE_ATTRS])).lower().strip()
+            score = max(fuzz.QRatio(text, cue) for cue in cues) if text else 0
+            if score > best_score:
+                best, best_score = el, score
+        if best and best_score >= locators.MATCH_THRESHOLD:
+            mapping[field] = locators._selector_for(best)
+    return mapping
+
+
+def _conflicts(mapping: Dict[str, str]) -> int:
+    return sum(n - 1 for n in Counter(mapping.values()).values() if n > 1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    args = ap.parse_args()
+
+    locators.suggest_mapping_from_inputs(locators._collect_inputs_soup(make_form(8)))  # warm up cdist
+    print(f"{'inputs':>7} {'before':>9} {'after':>9} {'speedup':>8} {'conflicts before/after':>23}")
+    for n in args.sizes:
+        inputs = locators._collect_inputs_soup(make_form(n))
+        t0 = time.perf_counter()
+        old = legacy_suggest(inputs)
+        t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = locators.suggest_mapping_from_inputs(inputs)
+        t_new = time.perf_counter() - t0
+        print(f"{n:>7} {t_old:>8.3f}s {t_new:>8.3f}s {t_old / t_new:>7.1f}x {_conflicts(old):>12}/{_conflicts(new)}")
+
+
+if __name__ == "__main__":
+    main()
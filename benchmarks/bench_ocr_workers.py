@@ -0,0 +1,35 @@
+# file: benchmarks/bench_ocr_workers.py
+"""
+OCR throughput (pages/sec) versus ocr.workers on synthetic scanned PDFs.
+
+Run from the repository root:
+    python -m benchmarks.bench_ocr_workers --pages 20 --workers 1 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from ocr.extract_text import ocr_file
+from benchmarks.synthetic import make_scanned_pdf
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = make_scanned_pdf(os.path.join(tmp, "bench.pdf"), args.pages)
+        print(f"{'workers':>8} {'pages':>6} {'seconds':>9} {'pages/s':>8} {'speedup':>8}")
+        base = None
+        for w in sorted(set(args.workers)):
+            t0 = time.perf_counter()
+            recs = ocr_file(str(pdf), max_pages=args.pages, workers=w)
+            dt = time.perf_counter() - t0
+            base = base or dt
+            print(f"{w:>8} {len(recs):>6} {dt:>9.2f} {len(recs) / dt:>8.2f} {base / dt:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# file: benchmarks/bench_preprocess.py
+"""
+preprocess_bgr time and peak memory per page: the original full-resolution
+deskew versus the downscale-first estimate.
+
+Run from the repository root:
+    python -m benchmarks.bench_preprocess --repeat 3 --skew 2
+"""
+import argparse
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from ocr import preprocess as pp
+from benchmarks.synthetic import render_form_image, sample_form_lines
+
+
+def legacy_deskew(gray):
+    """deskew as shipped before: minAreaRect over every nonzero pixel of the page."""
+    coords = np.column_stack(np.where(gray > 0))
+    if coords.size == 0:
+        return gray
+    angle = cv2.minAreaRect(coords)[-1]
+    if angle < -45:
+        angle = -(90 + angle)
+    else:
+        angle = -angle
+    (h, w) = gray.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+def legacy_preprocess_bgr(bgr_img):
+    gray = pp.to_grayscale(bgr_img)
+    gray = pp.denoise(gray)
+    gray = legacy_deskew(gray)
+    gray = pp.upscale_dpi(gray, 300)
+    return pp.threshold(gray)
+
+
+def _measure(fn, page, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(page)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--skew", type=float, default=2.0, help="degrees of synthetic scan skew")
+    args = ap.parse_args()
+
+    # 300 DPI A4 page, as ocr_file renders it
+    pil = render_form_image(sample_form_lines(0), skew_deg=args.skew).resize((2480, 3508))
+    page = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
+
+    print(f"page {page.shape[1]}x{page.shape[0]}, skew {args.skew} deg, "
+          f"estimated {pp.estimate_skew_angle(pp.to_grayscale(page)):.2f} deg")
+    print(f"{'':10} {'seconds':>9} {'peak MiB':>9}")
+    t_old, m_old = _measure(legacy_preprocess_bgr, page, args.repeat)
+    t_new, m_new = _measure(pp.preprocess_bgr, page, args.repeat)
+    print(f"{'before':10} {t_old:>9.3f} {m_old / 2**20:>9.1f}")
+    print(f"{'after':10} {t_new:>9.3f} {m_new / 2**20:>9.1f}")
+    print(f"{'speedup':10} {t_old / t_new:>8.1f}x {m_old / max(m_new, 1):>8.1f}x less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# file: benchmarks/bench_prompt_batching.py
+"""
+Requests and request bytes per document: one request per page versus
+batched multi-page prompts. Offline — payloads are built, not sent.
+
+Run from the repository root:
+    python -m benchmarks.bench_prompt_batching --pages 1 5 10 40
+"""
+import argparse
+import json
+from ai_extraction import gemini_client as gc
+from benchmarks.synthetic import sample_form_lines
+
+HINTS = {"form_type": "generic", "priority_fields": ["full_name", "email", "phone"]}
+
+
+def _payload_bytes(payload) -> int:
+    return len(json.dumps(payload).encode("utf-8"))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 40])
+    args = ap.parse_args()
+    max_chars = int(gc.settings.get("ai.batch.max_chars", 24000))
+    max_pages = int(gc.settings.get("ai.batch.max_pages", 8))
+
+    print(f"batch budget: {max_chars} chars / {max_pages} pages")
+    print(f"{'pages':>6} {'per-page reqs':>14} {'per-page bytes':>15} {'batched reqs':>13} {'batched bytes':>14} {'bytes saved':>12}")
+    for n in args.pages:
+        texts = ["\n".join(sample_form_lines(i)) for i in range(n)]
+        single = sum(_payload_bytes(gc._make_prompt(t, HINTS)) for t in texts)
+        batches = gc._plan_batches(texts, max_chars, max_pages)
+        batched = sum(_payload_bytes(gc._make_batch_prompt([texts[i] for i in b], HINTS)) for b in batches)
+        print(f"{n:>6} {n:>14} {single:>15,} {len(batches):>13} {batched:>14,} {1 - batched / single:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
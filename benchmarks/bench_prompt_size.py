@@ -0,0 +1,56 @@
+# file: benchmarks/bench_prompt_size.py
+"""
+Prompt size and build time for the shipped prompts: the original per-call
+indent=2 build versus the precompiled compact prefix.
+
+Run from the repository root:
+    python -m benchmarks.bench_prompt_size
+"""
+import json
+import timeit
+from ai_extraction import gemini_client as gc
+from common.utils import normalize_whitespace
+from benchmarks.synthetic import sample_form_lines
+
+HINTS = {"form_type": "generic", "priority_fields": ["full_name", "email", "phone"]}
+
+
+def legacy_body(ocr_text: str, hints) -> bytes:
+    """Request body as _make_prompt built it before precompilation."""
+    content = [
+        {"role": "user", "parts": [{"text": gc.SYS_RULES}]},
+        {"role": "user", "parts": [{"text": "Canonical schema:\n" + json.dumps(gc.CANONICAL, indent=2)}]},
+    ]
+    for ex in gc.FEW_SHOTS.get("examples", []):
+        content.append({"role": "user", "parts": [{"text": ex["input"]}]})
+        content.append({"role": "model", "parts": [{"text": json.dumps(ex["output"], indent=2)}]})
+    user_text = "OCR TEXT:\n" + normalize_whitespace(ocr_text)
+    if hints:
+        user_text += "\n\nHINTS:\n" + json.dumps(hints, indent=2)
+    content.append({"role": "user", "parts": [{"text": user_text}]})
+    return json.dumps({"contents": content}).encode("utf-8")
+
+
+def current_body(ocr_text: str, hints) -> bytes:
+    return gc._encode_request(gc._user_text(ocr_text, hints))
+
+
+def main():
+    page = "\n".join(sample_form_lines(0))
+    old, new = legacy_body(page, HINTS), current_body(page, HINTS)
+    prefix = len(gc._preamble_prefix())
+    n = 2000
+    t_old = timeit.timeit(lambda: legacy_body(page, HINTS), number=n) / n * 1e6
+    t_new = timeit.timeit(lambda: current_body(page, HINTS), number=n) / n * 1e6
+
+    print(f"few-shot examples included : {gc.settings.get('ai.few_shot_examples', 1)} "
+          f"of {len(gc.FEW_SHOTS.get('examples', []))}")
+    print(f"static prefix              : {prefix:,} bytes (built once)")
+    print(f"{'':26} {'before':>10} {'after':>10} {'change':>8}")
+    print(f"{'request bytes / page':26} {len(old):>10,} {len(new):>10,} {len(new) / len(old) - 1:>8.0%}")
+    print(f"{'approx tokens / page':26} {len(old) // 4:>10,} {len(new) // 4:>10,}")
+    print(f"{'build time / page (us)':26} {t_old:>10.1f} {t_new:>10.1f} {t_new / t_old - 1:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
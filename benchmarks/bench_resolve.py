@@ -0,0 +1,58 @@
+# file: benchmarks/bench_resolve.py
+"""
+Element lookup for a whole mapping in a real browser: one find_element per
+field (resolve_selector) versus one in-page script per document
+(resolve_selectors). Every tenth selector misses, as with a stale profile.
+Needs Chrome/Chromium and a matching chromedriver.
+
+Run from the repository root:
+    python -m benchmarks.bench_resolve --sizes 20 100 500
+"""
+import argparse
+import functools
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from automation import locators
+from benchmarks.bench_harvest import _Quiet
+from benchmarks.bench_locators import make_form
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            Path(tmp, f"form_{n}.html").write_text(make_form(n), encoding="utf-8")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Quiet, directory=tmp))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        opts = Options()
+        opts.add_argument("--headless=new")
+        opts.add_argument("--disable-gpu")
+        drv = webdriver.Chrome(options=opts)
+        try:
+            print(f"{'fields':>7} {'per field':>10} {'batched':>8} {'speedup':>8}")
+            for n in args.sizes:
+                drv.get(f"http://127.0.0.1:{server.server_address[1]}/form_{n}.html")
+                mapping = {f"f{i}": f"[name='{'gone' if i % 10 == 9 else 'f'}{i}']" for i in range(n)}
+                t0 = time.perf_counter()
+                for sel in mapping.values():
+                    locators.resolve_selector(drv, sel)
+                t_each = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                found, missed = locators.resolve_selectors(drv, mapping)
+                t_batch = time.perf_counter() - t0
+                print(f"{n:>7} {t_each:>9.3f}s {t_batch:>7.3f}s {t_each / t_batch:>7.1f}x  ({len(missed)} missed)")
+        finally:
+            drv.quit()
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# file: benchmarks/bench_roi.py
+"""
+Per-page OCR time on a recurring form: full-page Tesseract (adaptive PSM)
+versus template crops (anchor match + one crop per canonical field).
+
+The template is built from the synthetic page geometry, so it matches by
+construction. Needs a working Tesseract install.
+
+Run from the repository root:
+    python -m benchmarks.bench_roi --repeat 3 --threads 1 4
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from ai_extraction.normalize import CANONICAL_KEYS, map_alias
+from common.config import settings
+from ocr import extract_text as et
+from benchmarks.synthetic import PAGE_SIZE, render_form_image, sample_form_lines
+
+# Must agree with render_form_image
+TOP, LINE_HEIGHT, LEFT = 120, 56, 100
+
+
+def synthetic_template(lines):
+    """One box per 'Label: value' line; the first line doubles as the anchor."""
+    w, h = PAGE_SIZE
+
+    def box(i):
+        y = TOP + i * LINE_HEIGHT
+        return [(LEFT - 20) / w, (y - 10) / h, (w - 60) / w, (y + LINE_HEIGHT - 10) / h]
+
+    fields = {}
+    for i, line in enumerate(lines):
+        key = map_alias(line.split(":", 1)[0].strip().lower().replace(" ", "_"))
+        if key in CANONICAL_KEYS and key not in fields:
+            fields[key] = box(i)
+    return {"name": "synthetic", "aspect": w / h, "anchors": [{"text": lines[0], "box": box(0)}], "fields": fields}
+
+
+def _best_of(fn, repeat):
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 4], help="ocr.templates.threads values to try")
+    args = ap.parse_args()
+
+    et._ensure_tesseract_path()
+    lines = sample_form_lines(0)
+    # 300 DPI A4 page, as ocr_file renders it
+    pil = render_form_image(lines).resize((PAGE_SIZE[0] * 2, PAGE_SIZE[1] * 2))
+    page = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
+    tpl = synthetic_template(lines)
+
+    t_full, rec = _best_of(lambda: et._ocr_page(page, templates=[]), args.repeat)
+    print(f"full page            {t_full:>7.2f}s  psm {rec.get('psm')} (tried {rec.get('psm_tried')})")
+
+    get = settings.get
+    for n in args.threads:
+        settings.get = lambda k, d=None, n=n: n if k == "ocr.templates.threads" else get(k, d)
+        t_roi, rec = _best_of(lambda: et._ocr_page(page, templates=[tpl]), args.repeat)
+        if rec.get("extraction_method") != "template":
+            print(f"crops x{n:<2}  template did not match; got {rec.get('extraction_method')}")
+            continue
+        filled = sum(1 for f in rec["fields"].values() if f["value"])
+        print(f"crops x{n:<2} threads    {t_roi:>7.2f}s  {filled}/{len(rec['fields'])} fields read, "
+              f"{t_full / t_roi:.1f}x faster")
+    settings.get = get
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# file: benchmarks/bench_text_layer.py
+"""
+Born-digital PDFs: text-layer fast path versus forced raster OCR.
+
+Run from the repository root:
+    python -m benchmarks.bench_text_layer --pages 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from ocr.extract_text import ocr_file
+from benchmarks.synthetic import make_digital_pdf
+
+
+def _timed(pdf: str, pages: int, use_text_layer: bool):
+    t0 = time.perf_counter()
+    recs = ocr_file(pdf, max_pages=pages, use_text_layer=use_text_layer)
+    return time.perf_counter() - t0, recs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--workers", type=int, default=None, help="ocr.workers for the raster run")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = str(make_digital_pdf(os.path.join(tmp, "digital.pdf"), args.pages))
+        fast, recs = _timed(pdf, args.pages, use_text_layer=True)
+        methods = {r["extraction_method"] for r in recs}
+        print(f"text_layer : {fast:8.3f}s  {args.pages / fast:9.1f} pages/s  methods={sorted(methods)}")
+        slow, _ = _timed(pdf, args.pages, use_text_layer=False)
+        print(f"raster OCR : {slow:8.3f}s  {args.pages / slow:9.1f} pages/s")
+        print(f"speedup    : {slow / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# file: benchmarks/bench_validation.py
+"""
+Validation + normalization of a large batch of flat records: per-cell
+validate_field / postprocess (as the pipeline does per page) versus the
+column-wise API in parsing.columns, timed for validation alone and for
+normalization + validation.
+
+Run from the repository root:
+    python -m benchmarks.bench_validation --records 50000
+"""
+import argparse
+import copy
+import random
+import time
+from ai_extraction.rules import extract_by_rules
+from parsing.columns import normalize_columns, to_columns, validate_columns
+from parsing.validators import validate_field
+from pipeline.stream import postprocess
+from benchmarks.synthetic import sample_form_lines
+
+NAMES = ["apoorva srivastava", "rohan sharma", "priya verma", "amit kumar", "neha gupta"]
+
+
+def synthetic_records(n: int, seed: int = 0):
+    """Flat records shaped like extraction output, with realistic repetition."""
+    rnd = random.Random(seed)
+    base = {k: f["value"] for k, f in extract_by_rules("\n".join(sample_form_lines(0))).items()}
+    out = []
+    for i in range(n):
+        rec = dict(base)
+        rec["full_name"] = rnd.choice(NAMES)
+        rec["phone"] = f"9{rnd.randrange(10**9):09d}"
+        rec["date_of_birth"] = f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1995, 2008)}"
+        rec["email"] = rnd.choice([f"user{i}@example.com", "not-an-email"])
+        rec["page"] = 1
+        out.append(rec)
+    return out
+
+
+def validate_per_cell(records):
+    for rec in records:
+        {k: validate_field(k, v) for k, v in rec.items() if k != "page" and v}
+
+
+def validate_columnar(records):
+    validate_columns(to_columns(records))
+
+
+def per_cell(records):
+    for rec in records:
+        postprocess(rec)
+    validate_per_cell(records)
+
+
+def columnar(records):
+    validate_columns(normalize_columns(to_columns(records)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", type=int, default=50000)
+    args = ap.parse_args()
+
+    records = synthetic_records(args.records)
+    print(f"{args.records} records x {len(records[0])} columns")
+    for stage, slow, fast in (("validate", validate_per_cell, validate_columnar),
+                              ("normalize + validate", per_cell, columnar)):
+        results = {}
+        for name, fn in (("per cell", slow), ("columnar", fast)):
+            batch = copy.deepcopy(records)
+            t0 = time.perf_counter()
+            fn(batch)
+            results[name] = time.perf_counter() - t0
+        print(stage)
+        for name, t in results.items():
+            print(f"  {name:10} {t:>8.2f}s  {args.records / t:>10.0f} records/s")
+        print(f"  speedup    {results['per cell'] / results['columnar']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# file: benchmarks/synthetic.py
+"""Synthetic form documents for benchmarks and tests."""
+import json
+import random
+from pathlib import Path
+from typing import List
+from PIL import Image, ImageDraw, ImageFont
+
+FEW_SHOTS_PATH = "ai_extraction/prompts/few_shots.json"
+
+# A4 at 150 DPI keeps generated files small; ocr_file re-renders at ocr.dpi_upscale.
+PAGE_SIZE = (1240, 1754)
+
+
+def sample_form_lines(seed: int = 0) -> List[str]:
+    """Return 'Label: value' lines taken from the shipped few-shot examples."""
+    with open(FEW_SHOTS_PATH, "r", encoding="utf-8") as f:
+        examples = json.load(f).get("examples", [])
+    rnd = random.Random(seed)
+    return examples[rnd.randrange(len(examples))]["input"].splitlines()
+
+
+def render_form_image(lines: List[str], skew_deg: float = 0.0) -> Image.Image:
+    """Draw form lines on a white page, optionally rotated like a skewed scan."""
+    img = Image.new("RGB", PAGE_SIZE, "white")
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=28)
+    except TypeError:  # Pillow built without FreeType
+        font = ImageFont.load_default()
+    y = 120
+    for line in lines:
+        draw.text((100, y), line, fill="black", font=font)
+        y += 56
+    if skew_deg:
+        img = img.rotate(skew_deg, resample=Image.BICUBIC, expand=False, fillcolor="white")
+    return img
+
+
+def make_scanned_pdf(path: str, pages: int, seed: int = 0) -> Path:
+    """Write an image-only (no text layer) PDF with `pages` synthetic forms."""
+    imgs = [render_form_image(sample_form_lines(seed + i)) for i in range(pages)]
+    out = Path(path)
+    imgs[0].save(out, "PDF", resolution=150, save_all=True, append_images=imgs[1:])
+    return out
+
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_digital_pdf(path: str, pages: int, seed: int = 0) -> Path:
+    """Write a born-digital PDF (Helvetica text layer, no images) with `pages` forms."""
+    objs = []  # 1-based PDF object bodies
+
+    def add(body: str) -> int:
+        objs.append(body)
+        return len(objs)
+
+    catalog = add("")  # patched once the page tree exists
+    pages_id = add("")
+    font = add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for i in range(pages):
+        ops = ["BT", "/F1 11 Tf", "14 TL", "60 780 Td"]
+        for line in sample_form_lines(seed + i):
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace").decode("latin-1")
+        content = add(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        kids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>"
+        ))
+    objs[catalog - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>"
+    objs[pages_id - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    buf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objs, start=1):
+        offsets.append(len(buf))
+        buf += f"{n} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace")
+    xref = len(buf)
+    buf += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode("ascii")
+    for off in offsets:
+        buf += f"{off:010d} 00000 n \n".encode("ascii")
+    buf += f"trailer\n<< /Size {len(objs) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    out = Path(path)
+    out.write_bytes(bytes(buf))
+    return out
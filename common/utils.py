@@ -1,4 +1,5 @@
 import hashlib
+import math
 import os
 import re
 from pathlib import Path
@@ -19,8 +20,23 @@ def mask_value(value: str, left: int = 3, right: int = 2) -> str:
 def hash_string(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:12]
 
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
 def ensure_dir(path: str):
     Path(path).mkdir(parents=True, exist_ok=True)
 
 def normalize_whitespace(s: str) -> str:
     return re.sub(r"\s+", " ", s or "").strip()
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a list of numbers; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[k]
@@ -0,0 +1,133 @@
+# file: datastore/cache.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from cryptography.fernet import Fernet, InvalidToken
+from loguru import logger
+from common.utils import ensure_dir
+
+
+def _mtime(p: Path) -> float:
+    try:
+        return p.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+class DiskCache:
+    """
+    Persistent JSON cache with one file per key and size-bounded LRU eviction.
+    The LRU order is kept in memory (key -> size, least recent first, with a
+    running total), so eviction never lists the directory. File mtime doubles
+    as the last-access time, so the order is rebuilt from it on restart.
+    With ttl_seconds set, entries older than that (since write) read as misses.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, fernet: Optional[Fernet] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.dir = Path(directory)
+        self.max_bytes = max_bytes
+        self.fernet = fernet
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        ensure_dir(str(self.dir))
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        for p in sorted(self.dir.glob("*.json"), key=_mtime):
+            try:
+                self._sizes[p.stem] = p.stat().st_size
+            except OSError:
+                pass
+        self._total = sum(self._sizes.values())
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        p = self._path(key)
+        try:
+            text = p.read_text(encoding="utf-8")
+            if self.fernet:
+                text = self.fernet.decrypt(text.encode("utf-8")).decode("utf-8")
+            entry = json.loads(text)
+            created, value = entry["t"], entry["v"]
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (InvalidToken, ValueError, KeyError, TypeError, OSError) as e:
+            # Written under another key or truncated: drop it and recompute.
+            logger.warning("Discarding unreadable cache entry {}: {}", p.name, e)
+            self.delete(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        if self.ttl_seconds is not None and time.time() - created > self.ttl_seconds:
+            self.delete(key)
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+            return None
+        try:
+            os.utime(p)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        text = json.dumps({"t": time.time(), "v": value}, separators=(",", ":"))
+        if self.fernet:
+            text = self.fernet.encrypt(text.encode("utf-8")).decode("utf-8")
+        p = self._path(key)
+        tmp = p.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, p)
+        size = p.stat().st_size
+        with self._lock:
+            self._total += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._sizes.move_to_end(key)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+        with self._lock:
+            self._total -= self._sizes.pop(key, 0)
+
+    def _evict(self):
+        """Drop least-recently-used entries until the cache fits. Caller holds the lock."""
+        while self._total > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._path(key).unlink(missing_ok=True)
+            self._total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for q in self.dir.glob("*.json"):
+            q.unlink(missing_ok=True)
+        with self._lock:
+            self._sizes.clear()
+            self._total = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "entries": len(self._sizes),
+                "bytes": self._total,
+            }
@@ -1,7 +1,7 @@
 import json
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from loguru import logger
 from common.config import settings
 from common.utils import ensure_dir, hash_string
@@ -10,9 +10,11 @@ from datastore.crypto import get_fernet
 BASE_DIR = Path(os.path.expanduser(settings.get("datastore.base_dir", "~/.docufill_ai")))
 RECORDS_DIR = BASE_DIR / "records"
 PROFILES_DIR = BASE_DIR / "profiles"
+TEMPLATES_DIR = BASE_DIR / "templates"
 
 ensure_dir(str(RECORDS_DIR))
 ensure_dir(str(PROFILES_DIR))
+ensure_dir(str(TEMPLATES_DIR))
 
 FERNET = get_fernet(settings.get("datastore.encrypt", False))
 
@@ -40,6 +42,10 @@ def load_record(path: Path) -> Dict[str, Any]:
     raw = _maybe_decrypt(text)
     return json.loads(raw)
 
+def list_records() -> List[Path]:
+    """Saved record files, oldest first. Nothing is read or decrypted here; see load_record."""
+    return sorted(RECORDS_DIR.glob("*.json"), key=lambda p: (p.stat().st_mtime, p.name))
+
 def save_profile(domain: str, profile: Dict[str, Any]) -> Path:
     out = PROFILES_DIR / f"{domain}.json"
     out.write_text(json.dumps(profile, indent=2), encoding="utf-8")
@@ -52,3 +58,17 @@ def load_profile(domain: str) -> Optional[Dict[str, Any]]:
         return None
     return json.loads(p.read_text(encoding="utf-8"))
 
+def save_template(name: str, template: Dict[str, Any]) -> Path:
+    out = TEMPLATES_DIR / f"{name}.json"
+    out.write_text(json.dumps(dict(template, name=name), indent=2), encoding="utf-8")
+    logger.info("Saved layout template {}", out)
+    return out
+
+def load_template(name: str) -> Optional[Dict[str, Any]]:
+    p = TEMPLATES_DIR / f"{name}.json"
+    if not p.exists():
+        return None
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def list_templates() -> List[Dict[str, Any]]:
+    return [json.loads(p.read_text(encoding="utf-8")) for p in sorted(TEMPLATES_DIR.glob("*.json"))]
@@ -0,0 +1,62 @@
+# file: docufill/__main__.py
+"""
+Headless entry point.
+
+    python -m docufill batch <dir> --out results.jsonl --workers N
+    python -m docufill autofill <form-url> --out autofill.jsonl --sessions K
+"""
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Load .env before anything else so os.getenv works everywhere
+load_dotenv()
+
+from common.logging_setup import setup_logging  # import after load_dotenv
+
+
+def _print_summary(summary: dict, title: str = "Batch"):
+    print(f"\n── {title} summary ─────────────────────")
+    for k, v in summary.items():
+        print(f"{k:>16}: {v}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m docufill", description="DocuFill AI headless tools")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("batch", help="extract every document under a directory to JSONL")
+    b.add_argument("root", help="directory (searched recursively) or a single file")
+    b.add_argument("--out", default="results.jsonl", help="JSONL output, appended to when resuming")
+    b.add_argument("--workers", type=int, default=None, help="files OCR'd in parallel (pipeline.ocr_workers)")
+    b.add_argument("--ai-workers", type=int, default=None, help="Gemini requests in flight (ai.concurrency)")
+    b.add_argument("--no-resume", action="store_true", help="overwrite --out instead of skipping finished pages")
+
+    a = sub.add_parser("autofill", help="fill every saved record for a portal into its form (headless, no submit)")
+    a.add_argument("url", help="form URL; its host selects the saved mapping profile and records")
+    a.add_argument("--out", default="autofill.jsonl", help="JSONL report, one line per record")
+    a.add_argument("--domain", default=None, help="profile/records domain if it differs from the URL host")
+    a.add_argument("--sessions", type=int, default=None, help="browser sessions in parallel (automation.pool.size)")
+    a.add_argument("--limit", type=int, default=None, help="fill at most this many records")
+    a.add_argument("--show-browser", action="store_true", help="run visible browsers instead of headless")
+
+    args = ap.parse_args(argv)
+    setup_logging()
+
+    if args.command == "batch":
+        from pipeline.batch import run_batch
+        summary = run_batch(args.root, args.out, workers=args.workers, ai_workers=args.ai_workers,
+                            resume=not args.no_resume)
+        _print_summary(summary)
+        return 1 if summary["errors"] else 0
+    if args.command == "autofill":
+        from automation.batch_fill import run_autofill
+        summary = run_autofill(args.url, args.out, domain=args.domain, sessions=args.sessions, limit=args.limit,
+                               headless=not args.show_browser)
+        _print_summary(summary, "Autofill")
+        return 1 if summary["failed"] else 0
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,300 @@
+import atexit
 import io
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import pdfplumber
 from PIL import Image
 import pytesseract
 import cv2
 import numpy as np
+from loguru import logger
 from common.config import settings
-from common.utils import safe_basename
+from common.utils import safe_basename, hash_file, hash_string
+from datastore.cache import DiskCache
+from datastore.crypto import get_fernet
+from datastore.storage import BASE_DIR
 from ocr.preprocess import preprocess_bgr
 
+_PAGE_CACHE: Optional[DiskCache] = None
+
+# Layout key -> PSM that last reached ocr.psm_min_confidence (main process only)
+_PSM_MEMORY: Dict[str, int] = {}
+
+# Worker count -> process pool shared by every ocr_file call (started once, shut down at exit)
+_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
 def _ensure_tesseract_path():
     tpath = settings.get("tesseract_path")
     if tpath:
         pytesseract.pytesseract.tesseract_cmd = tpath
 
-def _ocr_image_pil(pil_img) -> Dict:
+def _ocr_image_pil(pil_img, psm: Optional[int] = None) -> Dict:
     data = pytesseract.image_to_data(pil_img, lang=settings.get("ocr.languages", "eng"),
+                                     config=f"--psm {int(psm)}" if psm is not None else "",
                                      output_type=pytesseract.Output.DICT)
     text = " ".join([w for w in data.get("text", []) if w and w.strip()])
-    confs = [float(c) for c in data.get("conf", []) if c not in ("-1", "")]
+    # Non-word boxes report -1 (as str or number depending on the pytesseract version)
+    confs = [float(c) for c in data.get("conf", []) if str(c).strip() not in ("-1", "")]
+    confs = [c for c in confs if c >= 0]
     avg_conf = sum(confs) / len(confs) / 100.0 if confs else 0.0
     return {"text": text, "confidence": avg_conf}
 
-def ocr_file(path: str, max_pages: int = None) -> List[Dict]:
+def _psm_order(psm_hint: Optional[int]) -> List[Optional[int]]:
+    """Configured candidates, cheapest first; a remembered PSM for this layout goes first."""
+    candidates = list(settings.get("ocr.psm_candidates") or [None])
+    if psm_hint in candidates:
+        candidates.remove(psm_hint)
+        candidates.insert(0, psm_hint)
+    return candidates
+
+def _ocr_adaptive(pil_img, psm_hint: Optional[int] = None) -> Dict:
+    """
+    Try PSM candidates in order and stop at the first whose mean word confidence
+    reaches ocr.psm_min_confidence; otherwise keep the most confident attempt.
+    """
+    min_conf = float(settings.get("ocr.psm_min_confidence", 0.6))
+    t0 = time.perf_counter()
+    best, tried = None, []
+    for psm in _psm_order(psm_hint):
+        rec = _ocr_image_pil(pil_img, psm)
+        rec["psm"] = psm
+        tried.append(psm)
+        if best is None or rec["confidence"] > best["confidence"]:
+            best = rec
+        if rec["confidence"] >= min_conf:
+            break
+    best["psm_tried"] = tried
+    best["ocr_s"] = round(time.perf_counter() - t0, 3)
+    return best
+
+def _ocr_page(bgr, psm_hint: Optional[int] = None, templates: Optional[List[Dict]] = None) -> Dict:
+    """
+    Preprocess a rendered page and OCR it. Runs inside pool workers.
+    A page matching a layout template is read from its field crops only.
+    """
+    pre = preprocess_bgr(bgr)
+    if templates:
+        from ocr.roi import ocr_with_template  # ocr.roi imports this module
+        rec = ocr_with_template(pre, templates)
+        if rec is not None:
+            return rec
+    rec = _ocr_adaptive(Image.fromarray(pre), psm_hint)
+    rec["extraction_method"] = "ocr"
+    return rec
+
+def _layout_key(source: str, shape) -> str:
+    """Same source and (coarsely) same page size => same layout."""
+    h, w = shape[:2]
+    return f"{source}:{round(w / 50)}x{round(h / 50)}"
+
+def _remember_psm(key: str, rec: Dict):
+    if rec.get("psm") is not None and rec["confidence"] >= float(settings.get("ocr.psm_min_confidence", 0.6)):
+        _PSM_MEMORY[key] = rec["psm"]
+
+def _page_cache() -> DiskCache:
+    global _PAGE_CACHE
+    if _PAGE_CACHE is None:
+        _PAGE_CACHE = DiskCache(
+            BASE_DIR / "cache" / "ocr",
+            max_bytes=int(settings.get("ocr.cache.max_mb", 256)) * 1024 * 1024,
+            fernet=get_fernet(settings.get("datastore.encrypt", False)),
+        )
+    return _PAGE_CACHE
+
+def _cache_key(file_digest: str, idx: int, use_text_layer: bool, templates_fp: Optional[str] = None) -> str:
+    """Key a page by file content, page index and every setting that changes its OCR output."""
+    return hash_string(json.dumps({
+        "file": file_digest,
+        "page": idx,
+        "languages": settings.get("ocr.languages", "eng"),
+        "dpi": settings.get("ocr.dpi_upscale", 300),
+        "psm": settings.get("ocr.psm_candidates"),
+        "psm_min_confidence": settings.get("ocr.psm_min_confidence", 0.6),
+        "text_layer": settings.get("ocr.text_layer_min_chars", 40) if use_text_layer else None,
+        "templates": templates_fp,
+    }, sort_keys=True))
+
+def _init_worker():
+    _ensure_tesseract_path()
+
+def _ocr_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared pool for raster pages, so a batch of files spawns its workers once."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            if not _POOLS:
+                atexit.register(shutdown_ocr_pools)
+            pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        return pool
+
+def _drop_pool(pool: ProcessPoolExecutor):
+    """Forget a pool whose worker died; the next call starts a fresh one."""
+    with _POOLS_LOCK:
+        for n, p in list(_POOLS.items()):
+            if p is pool:
+                del _POOLS[n]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_ocr_pools():
+    """Stop the shared OCR worker processes (registered with atexit)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _text_layer_record(page) -> Optional[Dict]:
+    """Return a record from the embedded text layer, or None if it is too thin to trust."""
+    words = page.extract_words()
+    n_chars = sum(len(w["text"]) for w in words)
+    if n_chars < settings.get("ocr.text_layer_min_chars", 40):
+        return None
+    return {"text": page.extract_text() or "", "confidence": 1.0, "extraction_method": "text_layer"}
+
+def _pdf_page_jobs(p: Path, max_pages: int, use_text_layer: bool,
+                   lookup: Callable[[int], Optional[Dict]]) -> Iterator[Tuple[int, Optional[Dict], Optional[np.ndarray]]]:
+    """
+    Yield (index, record, bgr) per page. Cached pages and pages with a usable
+    text layer come back as a finished record; scanned pages are rendered one
+    at a time so only in-flight pages stay in memory.
+    """
+    name = safe_basename(str(p))
+    with pdfplumber.open(p) as pdf:
+        for idx, page in enumerate(pdf.pages[:max_pages]):
+            rec = lookup(idx)
+            if rec is not None:
+                logger.info("{} p{}: cache ({})", name, idx + 1, rec.get("extraction_method"))
+                yield idx, rec, None
+                continue
+            rec = _text_layer_record(page) if use_text_layer else None
+            if rec is not None:
+                logger.info("{} p{}: text_layer ({} chars)", name, idx + 1, len(rec["text"]))
+                yield idx, rec, None
+                continue
+            logger.info("{} p{}: raster OCR", name, idx + 1)
+            pil = page.to_image(resolution=settings.get("ocr.dpi_upscale", 300)).original
+            yield idx, None, cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
+
+def _ocr_pages(jobs: Iterator[Tuple[int, Optional[Dict], Optional[np.ndarray]]], workers: int,
+               source: str = "", templates: Optional[List[Dict]] = None) -> Iterator[Tuple[int, Dict]]:
+    """
+    Resolve page jobs, yielding (index, record) in page order.
+    With workers > 1 raster pages are fanned out to the shared process pool;
+    at most 2 * workers pages are queued ahead of the slowest pending result.
+    Raster pages start from the PSM remembered for their layout, if any.
+    """
+    def resolve(res, key):
+        if isinstance(res, dict):
+            return res
+        rec = res.result()
+        _remember_psm(key, rec)
+        return rec
+
+    if workers <= 1:
+        for idx, rec, bgr in jobs:
+            if rec is None:
+                key = _layout_key(source, bgr.shape)
+                rec = _ocr_page(bgr, _PSM_MEMORY.get(key), templates)
+                _remember_psm(key, rec)
+            yield idx, rec
+        return
+
+    pool = _ocr_pool(workers)
+    pending = deque()
+    try:
+        for idx, rec, bgr in jobs:
+            if rec is not None:
+                pending.append((idx, rec, None))
+            else:
+                key = _layout_key(source, bgr.shape)
+                pending.append((idx, pool.submit(_ocr_page, bgr, _PSM_MEMORY.get(key), templates), key))
+            if len(pending) >= workers * 2:
+                done_idx, res, key = pending.popleft()
+                yield done_idx, resolve(res, key)
+        while pending:
+            done_idx, res, key = pending.popleft()
+            yield done_idx, resolve(res, key)
+    except BrokenProcessPool:
+        _drop_pool(pool)
+        raise
+    finally:
+        for _, res, _ in pending:  # the caller stopped early: free the shared workers
+            if not isinstance(res, dict):
+                res.cancel()
+
+def iter_ocr_file(path: str, max_pages: int = None, workers: int = None, use_text_layer: bool = None,
+                  use_cache: bool = None, templates: Optional[List[Dict]] = None) -> Iterator[Dict]:
+    """
+    Yield page records in page order as soon as each page is ready.
+    templates defaults to the saved layout templates (ocr.templates.enabled); pass [] to disable.
+    """
     _ensure_tesseract_path()
     p = Path(path)
-    out = []
     max_pages = max_pages or settings.get("ocr.max_pages", 50)
+    workers = workers or settings.get("ocr.workers", 1)
+    if use_text_layer is None:
+        use_text_layer = settings.get("ocr.text_layer", True)
+    if use_cache is None:
+        use_cache = settings.get("ocr.cache.enabled", True)
+    if templates is None:
+        from ocr.roi import load_templates
+        templates = load_templates() if settings.get("ocr.templates.enabled", True) else []
+
+    cache = _page_cache() if use_cache else None
+    digest = hash_file(path) if cache else None
+    templates_fp = hash_string(json.dumps(templates, sort_keys=True)) if templates else None
+    hits = set()
+    methods = []
+
+    def lookup(idx: int) -> Optional[Dict]:
+        if cache is None:
+            return None
+        rec = cache.get(_cache_key(digest, idx, use_text_layer, templates_fp))
+        if rec is not None:
+            hits.add(idx)
+        return rec
+
+    def finish(idx: int, rec: Dict) -> Dict:
+        if cache is not None and idx not in hits:
+            cache.put(_cache_key(digest, idx, use_text_layer, templates_fp), dict(rec))
+        rec["page"] = idx + 1
+        rec["source_file"] = safe_basename(path)
+        methods.append(rec["extraction_method"])
+        if idx not in hits and "psm_tried" in rec:
+            logger.info("{} p{}: psm {} (tried {}) conf {:.2f} in {:.2f}s", rec["source_file"], rec["page"],
+                        rec["psm"], rec["psm_tried"], rec["confidence"], rec["ocr_s"])
+        if idx not in hits and rec["extraction_method"] == "template":
+            logger.info("{} p{}: template '{}', {} field crop(s) in {:.2f}s", rec["source_file"], rec["page"],
+                        rec["template"], len(rec["fields"]), rec["ocr_s"])
+        return rec
+
     if p.suffix.lower() in [".pdf"]:
-        with pdfplumber.open(p) as pdf:
-            for idx, page in enumerate(pdf.pages[:max_pages]):
-                pil = page.to_image(resolution=settings.get("ocr.dpi_upscale", 300)).original
-                bgr = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
-                pre = preprocess_bgr(bgr)
-                pil2 = Image.fromarray(pre)
-                rec = _ocr_image_pil(pil2)
-                rec["page"] = idx + 1
-                rec["source_file"] = safe_basename(path)
-                out.append(rec)
+        for idx, rec in _ocr_pages(_pdf_page_jobs(p, max_pages, use_text_layer, lookup), workers,
+                                   source=safe_basename(path), templates=templates):
+            yield finish(idx, rec)
+        n_text = methods.count("text_layer")
+        logger.info("OCR {}: {} page(s), {} from text layer, {} raster with {} worker(s)",
+                    safe_basename(path), len(methods), n_text, len(methods) - n_text, workers)
     else:
-        pil = Image.open(p)
-        bgr = cv2.cvtColor(np.array(pil.convert("RGB")), cv2.COLOR_RGB2BGR)
-        pre = preprocess_bgr(bgr)
-        pil2 = Image.fromarray(pre)
-        rec = _ocr_image_pil(pil2)
-        rec["page"] = 1
-        rec["source_file"] = safe_basename(path)
-        out.append(rec)
-    return out
+        rec = lookup(0)
+        if rec is None:
+            pil = Image.open(p)
+            bgr = cv2.cvtColor(np.array(pil.convert("RGB")), cv2.COLOR_RGB2BGR)
+            key = _layout_key(safe_basename(path), bgr.shape)
+            rec = _ocr_page(bgr, _PSM_MEMORY.get(key), templates)
+            _remember_psm(key, rec)
+        yield finish(0, rec)
+    if cache is not None:
+        logger.info("OCR cache {}: {} of {} page(s) served from cache; totals {}",
+                    safe_basename(path), len(hits), len(methods), cache.stats())
 
+def ocr_file(path: str, max_pages: int = None, workers: int = None, use_text_layer: bool = None,
+             use_cache: bool = None, templates: Optional[List[Dict]] = None) -> List[Dict]:
+    return list(iter_ocr_file(path, max_pages, workers, use_text_layer, use_cache, templates))
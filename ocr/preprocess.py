@@ -1,6 +1,7 @@
 from typing import Tuple
 import cv2
 import numpy as np
+from common.config import settings
 
 def to_grayscale(img):
     return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -8,15 +9,32 @@ def to_grayscale(img):
 def denoise(gray):
     return cv2.medianBlur(gray, 3)
 
-def deskew(gray):
-    coords = np.column_stack(np.where(gray > 0))
-    if coords.size == 0:
-        return gray
+def estimate_skew_angle(gray, max_side: int = 1000) -> float:
+    """
+    Estimate page skew in degrees (counter-clockwise positive, OpenCV convention)
+    from a downscaled, Otsu-binarized copy, so only text pixels are measured.
+    """
+    h, w = gray.shape[:2]
+    scale = min(1.0, max_side / float(max(h, w)))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    _, bw = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    coords = cv2.findNonZero(bw)
+    if coords is None or len(coords) < 50:
+        return 0.0
     angle = cv2.minAreaRect(coords)[-1]
-    if angle < -45:
-        angle = -(90 + angle)
-    else:
-        angle = -angle
+    # OpenCV >= 4.5 reports (0, 90]; older builds report [-90, 0)
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return float(angle)
+
+def deskew(gray, min_angle: float = None):
+    angle = estimate_skew_angle(gray)
+    if min_angle is None:
+        min_angle = settings.get("ocr.deskew_min_angle", 0.3)
+    if abs(angle) < min_angle:
+        return gray
     (h, w) = gray.shape[:2]
     M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
     return cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
@@ -0,0 +1,130 @@
+# file: ocr/roi.py
+"""
+Region-of-interest OCR for recurring form layouts.
+
+A layout template is a JSON document saved with datastore.storage.save_template:
+
+    {
+      "name": "lucknow_admission",
+      "aspect": 0.707,                                   # page width / height (optional)
+      "anchors": [{"text": "ADMISSION FORM", "box": [0.30, 0.02, 0.70, 0.06]}],
+      "fields": {"full_name": [0.08, 0.07, 0.94, 0.10], ...}
+    }
+
+Boxes are [x0, y0, x1, y1] as fractions of the page, so they hold at any DPI.
+A page matches when every anchor box reads (fuzzily) as its anchor text; only
+the field boxes are then OCR'd and each value maps straight to a canonical key.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from PIL import Image
+from loguru import logger
+from rapidfuzz import fuzz
+from common.config import settings
+from ai_extraction.normalize import CANONICAL_KEYS, map_alias
+from datastore.storage import list_templates
+from ocr.extract_text import _ocr_image_pil
+
+
+def load_templates() -> List[Dict]:
+    """Saved templates with field names resolved to canonical keys; unusable ones are skipped."""
+    out = []
+    for tpl in list_templates():
+        fields = {}
+        for key, box in (tpl.get("fields") or {}).items():
+            mapped = map_alias(key)
+            if mapped not in CANONICAL_KEYS:
+                logger.warning("Template {}: field '{}' is not a canonical key, ignored", tpl.get("name"), key)
+                continue
+            fields[mapped] = box
+        if not fields or not tpl.get("anchors"):
+            logger.warning("Template {} has no fields or no anchors, skipped", tpl.get("name"))
+            continue
+        out.append(dict(tpl, fields=fields))
+    return out
+
+
+def _crop(img: np.ndarray, box: Sequence[float]) -> np.ndarray:
+    h, w = img.shape[:2]
+    x0, y0, x1, y1 = box
+    left, right = max(0, int(x0 * w)), min(w, int(round(x1 * w)))
+    top, bottom = max(0, int(y0 * h)), min(h, int(round(y1 * h)))
+    return img[top:bottom, left:right]
+
+
+def _read_box(img: np.ndarray, box: Sequence[float]) -> Dict:
+    crop = _crop(img, box)
+    if crop.size == 0:
+        return {"text": "", "confidence": 0.0}
+    return _ocr_image_pil(Image.fromarray(crop), settings.get("ocr.templates.psm", 7))
+
+
+def _strip_label(text: str) -> str:
+    """A box drawn around 'Label: value' keeps only the value."""
+    return text.split(":", 1)[1].strip() if ":" in text else text.strip()
+
+
+def _aspect_ok(img: np.ndarray, tpl: Dict) -> bool:
+    if not tpl.get("aspect"):
+        return True
+    h, w = img.shape[:2]
+    tol = float(settings.get("ocr.templates.aspect_tolerance", 0.03))
+    return abs(w / h - tpl["aspect"]) <= tol * tpl["aspect"]
+
+
+def _anchor_score(img: np.ndarray, tpl: Dict) -> float:
+    """Worst fuzzy score over the template's anchors (0-100)."""
+    scores = []
+    for anchor in tpl["anchors"]:
+        read = _read_box(img, anchor["box"])["text"]
+        scores.append(fuzz.partial_ratio(anchor["text"].lower(), read.lower()))
+    return min(scores, default=0.0)
+
+
+def match_template(img: np.ndarray, templates: List[Dict], pool: ThreadPoolExecutor) -> Optional[Dict]:
+    """Best template whose anchors all read back, or None. Candidates are scored in parallel."""
+    candidates = [t for t in templates if _aspect_ok(img, t)]
+    if not candidates:
+        return None
+    min_score = float(settings.get("ocr.templates.min_anchor_score", 80))
+    scores = list(pool.map(lambda t: _anchor_score(img, t), candidates))
+    best_score, best = max(zip(scores, candidates), key=lambda pair: pair[0])
+    return best if best_score >= min_score else None
+
+
+def read_fields(img: np.ndarray, tpl: Dict, pool: ThreadPoolExecutor) -> Dict[str, Dict]:
+    """OCR each field box in parallel into {field: {value, confidence, rationale}}."""
+    names = list(tpl["fields"])
+    reads = pool.map(lambda k: _read_box(img, tpl["fields"][k]), names)
+    rationale = f"template:{tpl.get('name', '')}"
+    return {
+        k: {"value": _strip_label(r["text"]), "confidence": round(r["confidence"], 3), "rationale": rationale}
+        for k, r in zip(names, reads)
+    }
+
+
+def ocr_with_template(img: np.ndarray, templates: List[Dict]) -> Optional[Dict]:
+    """
+    Page record built from field crops if the preprocessed page matches a
+    template, else None (the caller falls back to full-page OCR).
+    """
+    if not templates:
+        return None
+    t0 = time.perf_counter()
+    # Tesseract runs as a subprocess, so threads overlap the crops without holding the GIL
+    with ThreadPoolExecutor(max_workers=int(settings.get("ocr.templates.threads", 4))) as pool:
+        tpl = match_template(img, templates, pool)
+        if tpl is None:
+            return None
+        fields = read_fields(img, tpl, pool)
+    confs = [f["confidence"] for f in fields.values() if f["value"]]
+    return {
+        "text": "\n".join(f"{k}: {f['value']}" for k, f in fields.items()),
+        "confidence": sum(confs) / len(confs) if confs else 0.0,
+        "fields": fields,
+        "template": tpl.get("name"),
+        "extraction_method": "template",
+        "ocr_s": round(time.perf_counter() - t0, 3),
+    }
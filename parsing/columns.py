@@ -0,0 +1,189 @@
+# file: parsing/columns.py
+"""
+Column-wise validation and normalization for whole batches of records.
+
+A table is a dict of equal-length sequences (column -> values) or a pandas
+DataFrame. Each column resolves its validator once. Regex validators run
+over the whole column at once: the cells are joined into one newline-
+separated string, the pattern is applied in MULTILINE mode with a single
+re.sub and the result is split back into per-cell flags, so the scan stays
+in C. Length and digit-count checks work the same way; only validators with
+no array form (dates) are called in Python, once per distinct value.
+"""
+import math
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from parsing.validators import (
+    EMAIL, GENDER, NAME, NUMERIC, PINCODE, YEAR, parse_date, resolve_validator, validate_email,
+    validate_gender, validate_name, validate_numeric, validate_phone, validate_postal, validate_text,
+    validate_year,
+)
+from parsing.normalizers import title_case_name, normalize_phone, split_address
+
+try:
+    import pandas as pd
+except ImportError:  # pandas is only required by the GUI
+    pd = None
+
+# Bookkeeping columns carried by flat records, never validated
+META_COLUMNS = ("source_file", "page", "confidence", "extraction_method")
+
+
+# Same per-field normalization as pipeline.stream.postprocess (date_of_birth
+# is handled row by row in normalize_columns: its parse depends on the source)
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "full_name": title_case_name,
+    "phone": normalize_phone,
+}
+
+
+def _is_frame(table: Any) -> bool:
+    return pd is not None and isinstance(table, pd.DataFrame)
+
+
+def _columns(table: Any) -> Iterable[Tuple[str, Iterable]]:
+    if _is_frame(table):
+        return ((str(c), table[c].tolist()) for c in table.columns)
+    return table.items()
+
+
+def _blank(v: Any) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v)) or (pd is not None and v is pd.NA)
+
+
+def _cells(values: Iterable) -> np.ndarray:
+    """Column as an object array of strings; None and NaN become ''."""
+    return np.array([v.strip() if isinstance(v, str) else "" if _blank(v) else str(v).strip() for v in values],
+                    dtype=object)
+
+
+def _per_distinct(cells: np.ndarray, fn: Callable[[str], Any]) -> Tuple[List[Any], np.ndarray]:
+    """fn over the distinct cell values, plus the index mapping each cell to its result."""
+    index: Dict[str, int] = {}
+    inverse = np.fromiter((index.setdefault(v, len(index)) for v in cells), dtype=np.intp, count=cells.size)
+    return [fn(u) for u in index], inverse
+
+
+def _joined(cells: np.ndarray) -> str:
+    """Cells as one newline-separated string; a newline inside a cell becomes NUL, which no pattern accepts."""
+    text = "\n".join(cells)
+    if text.count("\n") != max(cells.size - 1, 0):
+        text = "\n".join(c.replace("\n", "\0") for c in cells)
+    return text
+
+
+def _lengths(lines: Iterable[str], n: int) -> np.ndarray:
+    return np.fromiter(map(len, lines), dtype=np.intp, count=n)
+
+
+def _regex_check(pattern: "re.Pattern") -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Column form of `bool(pattern.match(cell))` for a ^...$ pattern: every
+    matching line is blanked by one MULTILINE re.sub, so a cell is valid
+    when it was non-empty and its line came back empty. A match that spans
+    a newline (YEAR allows whitespace around its separator) changes the
+    line count; then the column falls back to matching its distinct values
+    one by one.
+    """
+    column_rx = re.compile(pattern.pattern, pattern.flags | re.MULTILINE)
+
+    def check(cells: np.ndarray) -> np.ndarray:
+        lines = column_rx.sub("", _joined(cells)).split("\n")
+        if len(lines) != cells.size:
+            results, inverse = _per_distinct(cells, lambda v: bool(pattern.match(v)))
+            return np.array(results, dtype=bool)[inverse]
+        return (_lengths(lines, cells.size) == 0) & (_lengths(cells, cells.size) > 0)
+    return check
+
+
+def _digit_count_check(cells: np.ndarray) -> np.ndarray:
+    """validate_phone for a column: at least 10 digits per cell."""
+    return _lengths(re.sub(r"[^0-9\n]", "", _joined(cells)).split("\n"), cells.size) >= 10
+
+
+def _text_check(cells: np.ndarray) -> np.ndarray:
+    """validate_text for a column: more than one character once stripped."""
+    return _lengths(cells, cells.size) > 1
+
+
+# validator -> (column check returning per-cell validity, confidence of a valid cell)
+COLUMN_CHECKS: Dict[Callable, Tuple[Callable[[np.ndarray], np.ndarray], float]] = {
+    validate_email: (_regex_check(EMAIL), 0.98),
+    validate_postal: (_regex_check(PINCODE), 0.9),
+    validate_name: (_regex_check(NAME), 0.9),
+    validate_gender: (_regex_check(GENDER), 0.95),
+    validate_numeric: (_regex_check(NUMERIC), 0.9),
+    validate_year: (_regex_check(YEAR), 0.9),
+    validate_phone: (_digit_count_check, 0.95),
+    validate_text: (_text_check, 0.8),
+}
+
+
+def to_columns(records: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+    """Row records (e.g. flat extraction results) -> dict of columns, '' where a record lacks a field."""
+    if fields is None:
+        fields = list(dict.fromkeys(k for r in records for k in r))
+    return {f: [r.get(f, "") for r in records] for f in fields}
+
+
+def validate_columns(table: Any) -> Tuple[Any, Any]:
+    """
+    Per-cell (validity, confidence) for every non-metadata column.
+    For a dict input both results are dicts of numpy arrays (bool / float);
+    for a DataFrame they are DataFrames with the same index.
+    """
+    valid, conf = {}, {}
+    for col, values in _columns(table):
+        if col in META_COLUMNS:
+            continue
+        fn = resolve_validator(col)
+        cells = _cells(values)
+        if fn in COLUMN_CHECKS:
+            check, ok_conf = COLUMN_CHECKS[fn]
+            valid[col] = check(cells)
+            conf[col] = np.where(valid[col], ok_conf, 0.0)
+            continue
+        results, inverse = _per_distinct(cells, lambda v: fn(v) if v else (False, 0.0))
+        valid[col] = np.array([r[0] for r in results], dtype=bool)[inverse]
+        conf[col] = np.array([r[1] for r in results], dtype=float)[inverse]
+    if _is_frame(table):
+        return pd.DataFrame(valid, index=table.index), pd.DataFrame(conf, index=table.index)
+    return valid, conf
+
+
+def normalize_columns(table: Any) -> Any:
+    """
+    Copy of the table with names title-cased, phones in E.164 and dates in
+    ISO form (read with the day/month order learned for each row's
+    source_file), and combined addresses split into line1/line2 where line1
+    is empty. Other columns pass through; returns the same kind of table.
+    """
+    out = dict(_columns(table))
+    for col, fn in NORMALIZERS.items():
+        if col in out:
+            results, inverse = _per_distinct(_cells(out[col]), lambda v: fn(v) if v else v)
+            out[col] = np.array(results, dtype=object)[inverse]
+
+    if "date_of_birth" in out:
+        # In row order, like postprocess, so each source's learned day/month order applies to its later rows
+        sources = out["source_file"] if "source_file" in out else [None] * len(out["date_of_birth"])
+        out["date_of_birth"] = np.array(
+            [(parse_date(v, source=None if _blank(src) else src)[0] or v) if v else v
+             for v, src in zip(_cells(out["date_of_birth"]), sources)],
+            dtype=object,
+        )
+
+    if "address_line2" in out:
+        line2 = _cells(out["address_line2"])
+        line1 = _cells(out["address_line1"]) if "address_line1" in out else np.full(line2.shape, "", dtype=object)
+        rows = np.flatnonzero((line1 == "") & (line2 != ""))
+        if rows.size:
+            results, inverse = _per_distinct(line2[rows], split_address)
+            line1[rows] = [results[i]["address_line1"] for i in inverse]
+            line2[rows] = [results[i]["address_line2"] for i in inverse]
+            out["address_line1"], out["address_line2"] = line1, line2
+
+    if _is_frame(table):
+        return pd.DataFrame(out, index=table.index)
+    return out
@@ -1,6 +1,10 @@
 # file: parsing/validators.py
 import re
-from typing import Tuple
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
 from dateutil import parser as dateparser
 
 # ------------------------------
@@ -12,6 +16,7 @@ PINCODE = re.compile(r"^[0-9]{5,6}$")
 NUMERIC = re.compile(r"^[0-9]+(\.[0-9]+)?$")
 GENDER = re.compile(r"^(male|female|other|m|f|o)$", re.IGNORECASE)
 NAME = re.compile(r"^[A-Za-z .'-]{2,}$")
+YEAR = re.compile(r"^[0-9]{4}(\s*[-/–]\s*[0-9]{2,4})?$")
 
 # ------------------------------
 # Core validation functions
@@ -38,15 +43,79 @@ def validate_postal(s: str) -> Tuple[bool, float]:
     return ok, 0.9 if ok else 0.0
 
 
-def parse_date(s: str) -> Tuple[str, float]:
-    """Try parsing flexible date formats."""
-    if not s:
-        return "", 0.0
+# ------------------------------
+# Dates: strict formats first, dateutil as the fallback
+# ------------------------------
+
+DATE_NUMERIC = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$")
+DATE_ISO = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+DATE_MON = re.compile(r"^(\d{1,2})[ -]([A-Za-z]{3,9})\.?[ ,-]+(\d{4})$")
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+CONF_STRICT = 0.95     # one unambiguous reading
+CONF_AMBIGUOUS = 0.9   # DD/MM vs MM/DD settled by the source's learned order (day-first by default)
+CONF_FUZZY = 0.75      # dateutil fuzzy fallback
+
+# Source document -> "dmy" / "mdy", learned from unambiguous numeric dates
+_SOURCE_ORDER: "OrderedDict[str, str]" = OrderedDict()
+_SOURCE_ORDER_MAX = 1024
+_SOURCE_LOCK = threading.Lock()
+
+
+def _iso(y: int, m: int, d: int) -> str:
+    return date(y, m, d).isoformat()  # raises ValueError for impossible dates
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_cached(s: str, order: str) -> Tuple[str, float, Optional[str]]:
+    """(iso, confidence, order this date proves) for a stripped string; memoized."""
+    try:
+        m = DATE_ISO.match(s)
+        if m:
+            return _iso(int(m[1]), int(m[2]), int(m[3])), CONF_STRICT, None
+        m = DATE_NUMERIC.match(s)
+        if m:
+            a, b, y = int(m[1]), int(m[2]), int(m[3])
+            if a > 12 >= b:
+                return _iso(y, b, a), CONF_STRICT, "dmy"
+            if b > 12 >= a:
+                return _iso(y, a, b), CONF_STRICT, "mdy"
+            if a == b:
+                return _iso(y, a, b), CONF_STRICT, None
+            return (_iso(y, a, b) if order == "mdy" else _iso(y, b, a)), CONF_AMBIGUOUS, None
+        m = DATE_MON.match(s)
+        if m and m[2][:3].lower() in MONTHS:
+            return _iso(int(m[3]), MONTHS[m[2][:3].lower()], int(m[1])), CONF_STRICT, None
+    except ValueError:
+        pass  # matched a pattern but is not a real date; let dateutil have a go
     try:
-        dt = dateparser.parse(s, dayfirst=True, fuzzy=True)
-        return dt.strftime("%Y-%m-%d"), 0.9
+        dt = dateparser.parse(s, dayfirst=order != "mdy", fuzzy=True)
+        return dt.strftime("%Y-%m-%d"), CONF_FUZZY, None
     except Exception:
+        return "", 0.0, None
+
+
+def parse_date(s: str, source: Optional[str] = None) -> Tuple[str, float]:
+    """
+    Parse a date to ISO form with a confidence that says how it was read:
+    strict pattern (0.95), ambiguous DD/MM vs MM/DD (0.9) or dateutil fuzzy
+    fallback (0.75). With a source (e.g. the document name), the day/month
+    order seen in that document's unambiguous dates is applied to its other
+    dates.
+    """
+    if not s:
         return "", 0.0
+    with _SOURCE_LOCK:
+        order = _SOURCE_ORDER.get(source, "dmy") if source else "dmy"
+    iso, conf, proven = _parse_date_cached(s.strip(), order)
+    if source and proven:
+        with _SOURCE_LOCK:
+            _SOURCE_ORDER[source] = proven
+            _SOURCE_ORDER.move_to_end(source)
+            if len(_SOURCE_ORDER) > _SOURCE_ORDER_MAX:
+                _SOURCE_ORDER.popitem(last=False)
+    return iso, conf
 
 
 def validate_name(s: str) -> Tuple[bool, float]:
@@ -67,6 +136,12 @@ def validate_numeric(s: str) -> Tuple[bool, float]:
     return ok, 0.9 if ok else 0.0
 
 
+def validate_year(s: str) -> Tuple[bool, float]:
+    """Validate a year or academic session like 2024-2028."""
+    ok = bool(s and YEAR.match(s.strip()))
+    return ok, 0.9 if ok else 0.0
+
+
 def validate_text(s: str) -> Tuple[bool, float]:
     """Generic fallback for non-empty text fields."""
     ok = bool(s and len(s.strip()) > 1)
@@ -77,34 +152,44 @@ def validate_text(s: str) -> Tuple[bool, float]:
 # Central dispatcher
 # ------------------------------
 
-def validate_field(field: str, value: str) -> Tuple[bool, float]:
-    """
-    Unified validation entry point.
-    Returns (is_valid, confidence) for a given field name and value.
-    """
-    if not value:
-        return False, 0.0
+def validate_date(s: str) -> Tuple[bool, float]:
+    """Validate anything parse_date can read."""
+    parsed, conf = parse_date(s)
+    return bool(parsed), conf
 
+
+@lru_cache(maxsize=256)
+def resolve_validator(field: str) -> Callable[[str], Tuple[bool, float]]:
+    """Pick the validator for a field name once; validate_field and the column API share it."""
     field = field.lower().strip()
     if "email" in field:
-        return validate_email(value)
+        return validate_email
     if any(k in field for k in ["phone", "contact", "mobile"]):
-        return validate_phone(value)
+        return validate_phone
     if any(k in field for k in ["postal", "pincode", "zip"]):
-        return validate_postal(value)
+        return validate_postal
     if "date" in field or "dob" in field:
-        parsed, conf = parse_date(value)
-        return bool(parsed), conf
+        return validate_date
     if any(k in field for k in ["gender", "sex"]):
-        return validate_gender(value)
-    if any(k in field for k in ["fees", "amount", "id", "year"]):
-        return validate_numeric(value)
+        return validate_gender
+    if "year" in field or "session" in field:
+        return validate_year
+    if any(k in field for k in ["fees", "amount", "id"]):
+        return validate_numeric
     if any(k in field for k in ["name", "father", "mother"]):
-        return validate_name(value)
+        return validate_name
     if any(k in field for k in ["address", "city", "state", "country", "course", "school", "religion", "category", "nationality", "blood"]):
-        return validate_text(value)
+        return validate_text
 
     # Default fallback
-    return validate_text(value)
+    return validate_text
 
 
+def validate_field(field: str, value: str) -> Tuple[bool, float]:
+    """
+    Unified validation entry point.
+    Returns (is_valid, confidence) for a given field name and value.
+    """
+    if not value:
+        return False, 0.0
+    return resolve_validator(field)(value)
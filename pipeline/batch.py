@@ -0,0 +1,138 @@
+# file: pipeline/batch.py
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+import pdfplumber
+from loguru import logger
+from common.config import settings
+from common.utils import percentile
+from ai_extraction.normalize import CANONICAL_KEYS
+from pipeline.stream import stream_extract, DEFAULT_HINTS
+
+# .docx is offered by the GUI file picker but ocr_file cannot read it
+SUPPORTED_SUFFIXES = {".pdf", ".jpg", ".jpeg", ".png"}
+
+
+def discover(root: str) -> List[str]:
+    """All supported documents under root (or root itself if it is a file), sorted."""
+    p = Path(root)
+    if p.is_file():
+        return [str(p)]
+    return sorted(str(f) for f in p.rglob("*") if f.is_file() and f.suffix.lower() in SUPPORTED_SUFFIXES)
+
+
+def _expected_pages(path: str) -> int:
+    if not path.lower().endswith(".pdf"):
+        return 1
+    with pdfplumber.open(path) as pdf:
+        return min(len(pdf.pages), int(settings.get("ocr.max_pages", 50)))
+
+
+def _load_done(out_path: Path) -> Dict[str, Set[int]]:
+    """Pages already written without error, per source path."""
+    done: Dict[str, Set[int]] = defaultdict(set)
+    if not out_path.exists():
+        return done
+    with out_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if not rec.get("error") and rec.get("page"):
+                done[rec["source_path"]].add(int(rec["page"]))
+    return done
+
+
+def _ends_mid_line(path: Path) -> bool:
+    if not path.exists() or path.stat().st_size == 0:
+        return False
+    with path.open("rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) != b"\n"
+
+
+def _to_record(res: Dict) -> Dict:
+    flat = res["flat"] or {}
+    return {
+        "source_path": res["source_path"],
+        "source_file": res["source_file"],
+        "page": res["page"],
+        "extraction_method": res["extraction_method"],
+        "confidence": flat.get("confidence", 0.0),
+        "data": {k: flat.get(k, "") for k in CANONICAL_KEYS} if flat else {},
+        "validation": {k: {"valid": ok, "confidence": conf} for k, (ok, conf) in res["validation"].items()},
+        "error": res["error"],
+        "ai_called": res["ai_called"],
+        "local_fields": res["local_fields"],
+        "timings": res["timings"],
+    }
+
+
+def run_batch(
+    root: str,
+    out: str,
+    workers: Optional[int] = None,
+    ai_workers: Optional[int] = None,
+    hints: Optional[Dict] = None,
+    resume: bool = True,
+) -> Dict:
+    """
+    Extract every document under `root` into a JSONL file, one record per page,
+    flushed as each page finishes. With resume, pages already written without
+    error are skipped and fully finished files are not reopened at all.
+    Returns (and logs) a throughput/latency summary.
+    """
+    out_path = Path(out)
+    files = discover(root)
+    done = _load_done(out_path) if resume else defaultdict(set)
+
+    todo = []
+    for f in files:
+        if done.get(f) and len(done[f]) >= _expected_pages(f):
+            continue
+        todo.append(f)
+    resumed_pages = sum(len(v) for v in done.values())
+    logger.info("Batch: {} file(s) found, {} to process, {} page(s) already done", len(files), len(todo), resumed_pages)
+
+    latencies, ai_times = [], []
+    pages = errors = pages_local = fields = fields_local = 0
+    t0 = time.perf_counter()
+    if resume and _ends_mid_line(out_path):
+        with out_path.open("a", encoding="utf-8") as fh:
+            fh.write("\n")  # terminate a torn line left by an interrupted run
+    with out_path.open("a" if resume else "w", encoding="utf-8") as fh:
+        for res in stream_extract(todo, hints=hints or DEFAULT_HINTS, ocr_workers=workers, ai_workers=ai_workers,
+                                  skip=lambda path, page: page in done.get(path, ())):
+            fh.write(json.dumps(_to_record(res), ensure_ascii=False) + "\n")
+            fh.flush()
+            pages += 1
+            if res["error"]:
+                errors += 1
+            else:
+                pages_local += 0 if res["ai_called"] else 1
+                fields += sum(1 for k in CANONICAL_KEYS if res["flat"].get(k))
+                fields_local += res["local_fields"]
+            latencies.append(res["timings"]["latency_s"])
+            ai_times.append(res["timings"]["ai_s"])
+    elapsed = time.perf_counter() - t0
+
+    summary = {
+        "files_found": len(files),
+        "files_processed": len(todo),
+        "pages": pages,
+        "pages_resumed": resumed_pages,
+        "errors": errors,
+        "pages_without_ai": pages_local,
+        "fields_local_frac": round(fields_local / fields, 3) if fields else 0.0,
+        "elapsed_s": round(elapsed, 2),
+        "pages_per_s": round(pages / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_p50_s": round(percentile(latencies, 50), 3),
+        "latency_p95_s": round(percentile(latencies, 95), 3),
+        "latency_max_s": round(max(latencies, default=0.0), 3),
+        "ai_p50_s": round(percentile(ai_times, 50), 3),
+    }
+    logger.info("Batch summary: {}", summary)
+    return summary
@@ -0,0 +1,230 @@
+# file: pipeline/stream.py
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from loguru import logger
+from common.config import settings
+from ocr.extract_text import iter_ocr_file
+from ai_extraction.gemini_client import extract_structured_data, GeminiError
+from ai_extraction.normalize import normalize_ai_output, CANONICAL_KEYS
+from ai_extraction.rules import resolve_locally, merge, record_page, rule_stats
+from parsing.validators import parse_date, validate_field
+from parsing.normalizers import title_case_name, normalize_phone, split_address
+
+DEFAULT_HINTS = {"form_type": "generic", "priority_fields": ["full_name", "email", "phone"]}
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+
+def postprocess(flat: Dict) -> Dict:
+    """Post-validate + normalize a flat AI record in place."""
+    if flat.get("full_name"):
+        flat["full_name"] = title_case_name(flat["full_name"])
+    if flat.get("phone"):
+        flat["phone"] = normalize_phone(flat["phone"])
+    if flat.get("date_of_birth"):
+        date_norm, c = parse_date(flat["date_of_birth"], source=flat.get("source_file"))
+        if date_norm:
+            flat["date_of_birth"] = date_norm
+    # Heuristic: split address into line1/line2 if combined
+    if not flat.get("address_line1") and flat.get("address_line2"):
+        addr = split_address(flat["address_line2"])
+        flat.update(addr)
+    return flat
+
+
+def build_rows(flat: Dict, src_file: str, page: int, conf: float) -> List[Dict]:
+    """Turn a flat record into preview-table rows (one per field)."""
+    rows = []
+    for k, v in flat.items():
+        if k in ("source_file", "page", "confidence", "extraction_method"):
+            continue
+        rows.append({
+            "field": k,
+            "value": v or "",
+            "confidence": conf,
+            "source_file": src_file,
+            "page": page
+        })
+    return rows
+
+
+def _finish(rec: Dict) -> Dict:
+    """Normalize/validate stage: AI output -> flat record, rows and per-field validation."""
+    result = {
+        "source_path": rec["source_path"],
+        "source_file": rec.get("source_file"),
+        "page": rec.get("page"),
+        "extraction_method": rec.get("extraction_method"),
+        "error": rec.get("error"),
+        "ai_called": rec.get("ai_called", False),
+        "local_fields": rec.get("local_fields", 0),
+        "flat": None,
+        "rows": [],
+        "validation": {},
+        "timings": {
+            "ai_s": round(rec.get("ai_s", 0.0), 4),
+            "latency_s": round(time.perf_counter() - rec["t_ready"], 4),
+        },
+    }
+    if result["error"]:
+        return result
+
+    flat = normalize_ai_output(rec["ai"])
+    logger.debug("Extracted {} p{}: {}", rec["source_file"], rec["page"], list(flat.keys()))
+    flat["source_file"] = rec["source_file"]
+    flat["page"] = rec["page"]
+    conf = float(flat.get("confidence", 0.0))
+    postprocess(flat)
+    result["flat"] = flat
+    result["validation"] = {k: validate_field(k, flat[k]) for k in CANONICAL_KEYS if flat.get(k)}
+    result["rows"] = build_rows(flat, rec["source_file"], rec["page"], conf)
+    result["timings"]["latency_s"] = round(time.perf_counter() - rec["t_ready"], 4)
+    return result
+
+
+def stream_extract(
+    paths: Iterable[str],
+    hints: Optional[Dict] = None,
+    ocr_workers: Optional[int] = None,
+    ai_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    on_result: Optional[Callable[[Dict], None]] = None,
+    skip: Optional[Callable[[str, int], bool]] = None,
+) -> Iterator[Dict]:
+    """
+    Staged extraction: OCR workers -> AI workers -> normalize/validate,
+    connected by bounded queues so page N+1 is in OCR while page N waits on
+    Gemini, and a slow stage holds back the ones before it.
+    The AI stage first reads 'Label: value' pairs locally (ai.rules) and
+    only calls Gemini when fields are still missing or weak.
+
+    Yields one result per page as soon as it is ready (completion order, not
+    page order). A page whose OCR or Gemini call failed is still yielded,
+    with `error` set and no rows. Pages for which skip(path, page) is true
+    are dropped after OCR. Closing the generator stops all stages.
+    """
+    hints = DEFAULT_HINTS if hints is None else hints
+    ocr_workers = max(1, int(ocr_workers or settings.get("pipeline.ocr_workers", 1)))
+    ai_workers = max(1, int(ai_workers or settings.get("ai.concurrency", 4)))
+    size = max(1, int(queue_size or settings.get("pipeline.queue_size", 8)))
+    use_rules = settings.get("ai.rules.enabled", True)
+
+    stop = threading.Event()
+    files_q: queue.Queue = queue.Queue()
+    for p in paths:
+        files_q.put(p)
+    pages_q: queue.Queue = queue.Queue(maxsize=size)
+    ai_q: queue.Queue = queue.Queue(maxsize=size)
+    out_q: queue.Queue = queue.Queue(maxsize=size)
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def ocr_stage():
+        while not stop.is_set():
+            try:
+                path = files_q.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                for rec in iter_ocr_file(path):
+                    if skip and skip(path, rec["page"]):
+                        continue
+                    rec["source_path"] = path
+                    rec["t_ready"] = time.perf_counter()
+                    if not put(pages_q, rec):
+                        return
+            except Exception as e:
+                logger.error("OCR failed for {}: {}", path, e)
+                put(pages_q, {"source_path": path, "error": f"OCR error: {e}", "t_ready": time.perf_counter()})
+
+    def ai_stage():
+        while True:
+            rec = get(pages_q)
+            if rec is _DONE:
+                return
+            if not rec.get("error") and rec.get("fields") is not None:
+                rec["ai"] = rec["fields"]  # template page: values already keyed by canonical field
+                rec["local_fields"] = sum(1 for f in rec["fields"].values() if f["value"])
+                record_page(rec["ai"], rec["local_fields"], ai_called=False)
+            elif not rec.get("error"):
+                t0 = time.perf_counter()
+                try:
+                    resolved, needed = resolve_locally(rec["text"]) if use_rules else ({}, list(CANONICAL_KEYS))
+                    rec["local_fields"] = len(resolved)
+                    if needed is None:
+                        rec["ai"] = resolved
+                    else:
+                        page_hints = dict(hints, fields_needed=needed) if resolved else hints
+                        rec["ai"] = merge(extract_structured_data(rec["text"], hints=page_hints), resolved)
+                        rec["ai_called"] = True
+                    record_page(rec["ai"], rec["local_fields"], rec.get("ai_called", False))
+                except GeminiError as e:
+                    logger.error("Gemini failed for {} p{}: {}", rec["source_file"], rec["page"], e)
+                    rec["error"] = f"Gemini error: {e}"
+                except Exception as e:  # e.g. the response cache or local rules; never lose the page or the worker
+                    logger.error("Extraction failed for {} p{}: {}", rec.get("source_file"), rec.get("page"), e)
+                    rec["error"] = f"Extraction error: {e}"
+                rec["ai_s"] = time.perf_counter() - t0
+            if not put(ai_q, rec):
+                return
+
+    def post_stage():
+        while True:
+            rec = get(ai_q)
+            if rec is _DONE:
+                return
+            try:
+                result = _finish(rec)
+            except Exception as e:
+                logger.error("Post-processing failed for {} p{}: {}", rec.get("source_file"), rec.get("page"), e)
+                rec["error"] = f"Post-processing error: {e}"
+                result = _finish(rec)
+            if not put(out_q, result):
+                return
+
+    def launch(target: Callable, n: int, downstream: queue.Queue, n_downstream: int):
+        """Start n workers; once all exit, send one end marker per downstream worker."""
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(n)]
+        for t in threads:
+            t.start()
+
+        def close():
+            for t in threads:
+                t.join()
+            for _ in range(n_downstream):
+                put(downstream, _DONE)
+
+        threading.Thread(target=close, daemon=True).start()
+
+    launch(ocr_stage, ocr_workers, pages_q, ai_workers)
+    launch(ai_stage, ai_workers, ai_q, 1)
+    launch(post_stage, 1, out_q, 1)
+
+    try:
+        while True:
+            item = get(out_q)
+            if item is _DONE:
+                break
+            if on_result:
+                on_result(item)
+            yield item
+        logger.info("Resolved without Gemini so far: {}", rule_stats())
+    finally:
+        stop.set()
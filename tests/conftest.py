@@ -0,0 +1,165 @@
+import functools
+import json
+import re
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+
+FORMS_DIR = Path(__file__).parent / "fixtures" / "forms"
+
+
+class FakeGemini:
+    """
+    Local stand-in for the Gemini generateContent endpoint.
+    Echoes the last OCR text back as `full_name` (one object per page for
+    batched prompts), sleeps `latency` seconds per request and serves the
+    queued `failures` before succeeding; each is a status code or a
+    (status, headers) pair.
+    """
+
+    def __init__(self):
+        self.latency = 0.0
+        self.failures = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.bodies = []
+        self._lock = threading.Lock()
+        self.url = ""
+
+    def reply_for(self, body: dict) -> dict:
+        text = body["contents"][-1]["parts"][0]["text"].split("OCR TEXT:\n", 1)[-1]
+        if "=== PAGE 1 ===" in text:
+            pages = re.split(r"=== PAGE \d+ ===\n", text)[1:]
+            out = [self._echo(p.strip()) for p in pages]
+        else:
+            out = self._echo(text)
+        return {"candidates": [{"content": {"parts": [{"text": json.dumps(out)}]}}]}
+
+    @staticmethod
+    def _echo(text: str) -> dict:
+        return {"full_name": {"value": text, "confidence": 0.9, "rationale": "echo"}}
+
+
+@pytest.fixture(autouse=True)
+def isolated_aliases(tmp_path, monkeypatch):
+    """Keep the shared alias resolver (and its learned-alias file) out of the developer's home directory."""
+    import ai_extraction.normalize as normalize
+
+    monkeypatch.setattr(normalize, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(normalize, "_RESOLVER", normalize.AliasResolver(path=tmp_path / "aliases.json"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_templates(tmp_path, monkeypatch):
+    """OCR runs see an empty layout-template store, not the developer's saved templates."""
+    import datastore.storage as storage
+
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    monkeypatch.setattr(storage, "TEMPLATES_DIR", templates)
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    import ai_extraction.gemini_client as gc
+
+    state = FakeGemini()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with state._lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                state.bodies.append(raw)
+                failure = state.failures.pop(0) if state.failures else 200
+            status, extra_headers = failure if isinstance(failure, tuple) else (failure, {})
+            try:
+                time.sleep(state.latency)
+                if status == 200:
+                    payload = json.dumps(state.reply_for(json.loads(raw))).encode("utf-8")
+                else:
+                    payload = json.dumps({"error": {"code": status}}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+            finally:
+                with state._lock:
+                    state.in_flight -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}/v1beta/models/{{model}}:generateContent"
+
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gc, "GEMINI_ENDPOINT", state.url)
+    monkeypatch.setattr(gc, "_CLIENT", None)
+    monkeypatch.setattr(gc.settings, "get", _override(gc.settings.get, {"ai.cache.enabled": False}))
+    # Keep the retry policy but drop the backoff sleeps
+    for fn in (gc._call_gemini, gc._call_gemini_batch):
+        monkeypatch.setattr(fn.retry, "wait", lambda retry_state: 0)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _override(get, values):
+    def patched(dotted, default=None):
+        return values[dotted] if dotted in values else get(dotted, default)
+    return patched
+
+
+@pytest.fixture
+def forms_site():
+    """Base URL of a local static server for tests/fixtures/forms (no network access needed)."""
+    class Quiet(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Quiet, directory=str(FORMS_DIR)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def chrome_factory():
+    """factory(headless) launching a local Chrome session, or skip when no browser is installed."""
+    if not any(shutil.which(b) for b in ("google-chrome", "chromium", "chromium-browser", "chrome")):
+        pytest.skip("no local Chrome/Chromium")
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    def factory(headless=True):
+        opts = Options()
+        if headless:
+            opts.add_argument("--headless=new")
+        opts.add_argument("--disable-gpu")
+        opts.add_argument("--no-sandbox")
+        return webdriver.Chrome(options=opts)
+    return factory
+
+
+@pytest.fixture
+def browser(chrome_factory):
+    """Headless Chrome, or skip when no local browser is installed."""
+    drv = chrome_factory()
+    yield drv
+    drv.quit()
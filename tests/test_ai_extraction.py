@@ -0,0 +1,160 @@
+import json
+import pytest
+import ai_extraction.gemini_client as gc
+from datastore.cache import DiskCache
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path / "gemini", max_bytes=1 << 20, ttl_seconds=3600)
+    monkeypatch.setattr(gc, "_RESPONSE_CACHE", cache)
+    return cache
+
+
+def test_cache_key_ignores_whitespace_but_not_hints_or_model():
+    k = gc._cache_key("Name:  Rohan\n Sharma", {"form_type": "generic"}, "m1")
+    assert k == gc._cache_key("Name: Rohan Sharma", {"form_type": "generic"}, "m1")
+    assert k != gc._cache_key("Name: Rohan Sharma", {"form_type": "other"}, "m1")
+    assert k != gc._cache_key("Name: Rohan Sharma", {"form_type": "generic"}, "m2")
+
+
+def test_prompt_edits_invalidate_cache_key(monkeypatch):
+    k = gc._cache_key("Name: Rohan", None, "m1")
+    monkeypatch.setattr(gc, "PROMPT_FINGERPRINT", "edited")
+    assert gc._cache_key("Name: Rohan", None, "m1") != k
+
+
+def test_repeat_extraction_served_from_cache(response_cache, monkeypatch):
+    calls = []
+
+    def fake_call(ocr_text, hints, model):
+        calls.append(ocr_text)
+        return {"full_name": {"value": "Rohan", "confidence": 0.9, "rationale": "labelled"}}
+
+    monkeypatch.setattr(gc, "_call_gemini", fake_call)
+    first = gc.extract_structured_data("Name: Rohan", use_cache=True)
+    second = gc.extract_structured_data("Name:   Rohan", use_cache=True)
+    assert second == first
+    assert len(calls) == 1
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_many_keeps_page_order_and_bounds_in_flight(fake_gemini):
+    fake_gemini.latency = 0.2
+    texts = [f"page {i}" for i in range(6)]
+    out = gc.extract_structured_data_many(texts, concurrency=3)
+    assert [o["full_name"]["value"] for o in out] == texts
+    assert fake_gemini.max_in_flight == 3
+
+
+def test_many_retries_rate_limits_and_server_errors(fake_gemini):
+    fake_gemini.failures = [429, 503]
+    out = gc.extract_structured_data_many(["a", "b"], concurrency=1)
+    assert [o["full_name"]["value"] for o in out] == ["a", "b"]
+    assert fake_gemini.requests == 4
+
+
+def test_many_raises_after_retry_budget(fake_gemini):
+    fake_gemini.failures = [500] * 10
+    with pytest.raises(gc.GeminiError):
+        gc.extract_structured_data_many(["a"], concurrency=1)
+    assert fake_gemini.requests == gc.settings.get("ai.max_retries", 3)
+
+
+def test_plan_batches_respects_char_and_page_budgets():
+    texts = ["x" * 100] * 5 + ["y" * 1000]
+    batches = gc._plan_batches(texts, max_chars=350, max_pages=8)
+    assert [i for b in batches for i in b] == list(range(6))
+    assert batches[-1] == [5]  # oversized page travels alone
+    assert all(len(b) <= 3 for b in batches)
+    assert gc._plan_batches(texts[:5], max_chars=10_000, max_pages=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_batched_many_uses_fewer_requests_and_keeps_order(fake_gemini):
+    texts = [f"Name: person {i}" for i in range(5)]
+    out = gc.extract_structured_data_many(texts, concurrency=2, batch=True)
+    assert [o["full_name"]["value"] for o in out] == texts
+    assert all(len(o) == len(gc.CANONICAL["fields"]) for o in out)
+    assert fake_gemini.requests == 1
+
+
+def test_batch_length_mismatch_is_retried(fake_gemini, monkeypatch):
+    replies = iter([[gc._to_schema({})], None])
+    real = fake_gemini.reply_for
+
+    def flaky(body):
+        bad = next(replies, None)
+        if bad is not None:
+            return {"candidates": [{"content": {"parts": [{"text": json.dumps(bad)}]}}]}
+        return real(body)
+
+    monkeypatch.setattr(fake_gemini, "reply_for", flaky)
+    out = gc.extract_structured_data_batch(["a", "b"], use_cache=False)
+    assert [o["full_name"]["value"] for o in out] == ["a", "b"]
+    assert fake_gemini.requests == 2
+
+
+def test_token_bucket_blocks_until_refilled():
+    now = [0.0]
+    slept = []
+
+    def fake_sleep(dt):
+        slept.append(dt)
+        now[0] += dt
+
+    bucket = gc.TokenBucket(60, clock=lambda: now[0], sleep=fake_sleep)  # 1 token/s, burst 60
+    assert bucket.acquire(60) == 0.0
+    waited = bucket.acquire(2)
+    assert waited == pytest.approx(2.0)
+    assert sum(slept) == pytest.approx(2.0)
+
+
+def test_retry_after_header_parsing():
+    assert gc._retry_after_seconds("3") == 3.0
+    assert gc._retry_after_seconds(None) is None
+    assert gc._retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert gc._retry_after_seconds("soon") is None
+
+
+def test_client_reuses_connections_and_reports_retry_after(fake_gemini):
+    client = gc.GeminiClient(pool_size=2, requests_per_minute=600)
+    payload = gc._make_prompt("Name: Rohan")
+    for _ in range(3):
+        client.generate(payload, "m")
+    stats = client.stats()
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1 and stats["reused_connections"] == 2
+
+    fake_gemini.failures = [(429, {"Retry-After": "7"})]
+    with pytest.raises(gc.GeminiError) as err:
+        client.generate(payload, "m")
+    assert err.value.retry_after == 7.0
+    assert client.stats()["rate_limited"] == 1
+    client.close()
+
+
+def test_retry_wait_prefers_retry_after():
+    class Outcome:
+        def __init__(self, exc):
+            self._exc = exc
+
+        def exception(self):
+            return self._exc
+
+    class State:
+        attempt_number = 1
+
+        def __init__(self, exc):
+            self.outcome = Outcome(exc)
+
+    assert gc._wait_for_retry(State(gc.GeminiError("429", retry_after=2.5))) == 2.5
+    assert gc._wait_for_retry(State(gc.GeminiError("429", retry_after=999))) == 60
+    assert gc._wait_for_retry(State(gc.GeminiError("500"))) == 1
+
+
+def test_encoded_request_matches_prompt_dict():
+    hints = {"form_type": "generic"}
+    body = gc._encode_request(gc._user_text("Name:  Rohan", hints))
+    assert json.loads(body) == gc._make_prompt("Name:  Rohan", hints)
+    assert body.startswith(gc._preamble_prefix())
+    assert b"\n  " not in gc._preamble_prefix()  # compact separators, no indentation
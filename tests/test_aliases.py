@@ -0,0 +1,47 @@
+import json
+from ai_extraction.normalize import AliasResolver, normalize_ai_output
+
+
+def test_alias_resolver_memoizes_learns_and_persists(tmp_path):
+    path = tmp_path / "aliases.json"
+    r = AliasResolver(path=path)
+    assert r.resolve("Mobile") == "phone"  # alias table
+    assert r.resolve("full_nme") == "full_name"  # fuzzy, then learned
+    assert r.resolve("favourite_colour") == "favourite_colour"  # no match: unchanged
+    assert r.resolve("FULL_NME") == "full_name"
+    assert r.resolve("full_name") == "full_name"  # canonical: neither memoized nor learned
+    assert r.stats()["misses"] == 2 and r.stats()["memo"] == 2
+    assert not path.exists()  # single-key resolves are persisted in bulk
+    r.save()
+    assert json.loads(path.read_text()) == {"full_nme": "full_name"}
+
+    warm = AliasResolver(path=path)
+    assert warm.resolve("full_nme") == "full_name" and warm.stats()["misses"] == 0
+
+
+def test_batch_resolution_matches_single_key_path():
+    keys = ["Name", "emial", "Date_Of_Birth", "pin", "favourite_colour", "emial", "postal_cod"]
+    assert AliasResolver().resolve_many(keys) == [AliasResolver().resolve(k) for k in keys]
+
+
+def test_memo_is_bounded():
+    r = AliasResolver(max_entries=3)
+    r.resolve_many([f"unknown_key_{i}" for i in range(10)])
+    assert r.stats()["memo"] == 3
+
+
+def test_normalize_ai_output_maps_keys_in_one_pass():
+    flat = normalize_ai_output({"Name": {"value": "Rohan", "confidence": 0.8}, "mail_id": "r@x.com"})
+    assert flat["full_name"] == "Rohan" and flat["email"] == "r@x.com" and flat["confidence"] == 0.8
+
+
+def test_resolve_many_saves_once_per_call(tmp_path, monkeypatch):
+    r = AliasResolver(path=tmp_path / "aliases.json")
+    saves = []
+    real_save = r.save
+    monkeypatch.setattr(r, "save", lambda: saves.append(1) or real_save())
+    r.resolve_many(["full_nme", "emial", "postal_cod", "full_name", "email"])
+    assert len(saves) == 1
+    assert json.loads((tmp_path / "aliases.json").read_text()) == {
+        "emial": "email", "full_nme": "full_name", "postal_cod": "postal_code",
+    }
@@ -0,0 +1,47 @@
+import json
+import pipeline.stream as ps
+from pipeline.batch import run_batch
+from benchmarks.synthetic import make_digital_pdf
+
+
+def _setup(tmp_path, monkeypatch, calls):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    make_digital_pdf(str(docs / "a.pdf"), pages=2)
+    make_digital_pdf(str(docs / "b.pdf"), pages=1)
+    (docs / "notes.txt").write_text("ignored")
+
+    def fake_ai(text, hints=None):
+        calls.append(text)
+        return {"full_name": {"value": "Apoorva Srivastava", "confidence": 0.9, "rationale": "t"}}
+
+    real_ocr = ps.iter_ocr_file
+    monkeypatch.setattr(ps, "iter_ocr_file", lambda path: real_ocr(path, use_cache=False))
+    monkeypatch.setattr(ps, "extract_structured_data", fake_ai)
+    # Every page goes to the (fake) model so calls count pages
+    monkeypatch.setattr(ps, "resolve_locally", lambda text: ({}, list(ps.CANONICAL_KEYS)))
+    return docs
+
+
+def test_batch_writes_one_record_per_page_and_resumes(tmp_path, monkeypatch):
+    calls = []
+    docs = _setup(tmp_path, monkeypatch, calls)
+    out = tmp_path / "results.jsonl"
+
+    summary = run_batch(str(docs), str(out), ai_workers=2)
+    lines = [json.loads(l) for l in out.read_text().splitlines()]
+    assert summary["pages"] == 3 and summary["errors"] == 0
+    assert sorted((r["source_file"], r["page"]) for r in lines) == [("a.pdf", 1), ("a.pdf", 2), ("b.pdf", 1)]
+    assert lines[0]["data"]["full_name"] == "Apoorva Srivastava"
+
+    # Second run: everything is done, nothing is re-extracted
+    again = run_batch(str(docs), str(out))
+    assert again["pages"] == 0 and again["files_processed"] == 0
+    assert len(calls) == 3
+
+    # Drop a.pdf page 2 plus leave a torn line, as after a crash
+    kept = [l for l in out.read_text().splitlines() if not ('"a.pdf"' in l and '"page": 2' in l)]
+    out.write_text("\n".join(kept) + '\n{"source_path": "x", "pa')
+    resumed = run_batch(str(docs), str(out))
+    assert resumed["pages"] == 1 and resumed["pages_resumed"] == 2
+    assert len(calls) == 4
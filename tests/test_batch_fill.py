@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from automation import batch_fill
+from automation.driver import DriverPool
+from datastore import storage
+
+
+class FakeSession:
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.switch_to = self
+        self.urls = []
+
+    def execute_script(self, script, *args):
+        pass
+
+    def execute_cdp_cmd(self, cmd, params):
+        pass
+
+    def window(self, handle):
+        pass
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def quit(self):
+        pass
+
+
+def _records(tmp_path, monkeypatch, datas):
+    monkeypatch.setattr(storage, "RECORDS_DIR", tmp_path)
+    monkeypatch.setattr(storage, "PROFILES_DIR", tmp_path.parent)
+    for i, data in enumerate(datas):
+        p = tmp_path / f"r{i:02d}.json"
+        p.write_text(json.dumps({"domain": "forms.test", "data": data}))
+    (tmp_path / "other.json").write_text(json.dumps({"domain": "elsewhere", "data": {}}))
+
+
+def test_records_fill_concurrently_with_per_record_reports(tmp_path, monkeypatch):
+    records = tmp_path / "records"
+    records.mkdir()
+    _records(records, monkeypatch, [{"full_name": f"Student {i}"} for i in range(7)] + [{}])
+    monkeypatch.setattr(batch_fill, "_load_mapping", lambda domain: {"full_name": "#fullName", "email": "#email"})
+
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def fake_fill(drv, mapping, data, stale=()):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        fields = {"email": {"status": "skipped", "reason": "no value"}}
+        if data.get("full_name"):
+            fields["full_name"] = {"status": "filled", "reason": ""}
+        else:
+            fields["full_name"] = {"status": "skipped", "reason": "no value"}
+        filled = sum(1 for f in fields.values() if f["status"] == "filled")
+        return {"fields": fields, "filled": filled, "mapped": 2, "timings": {"wait_s": 0.01, "work_s": 0.04}}
+
+    monkeypatch.setattr(batch_fill, "fill_record", fake_fill)
+    launched = []
+    pool = DriverPool(size=3, factory=lambda headless: launched.append(FakeSession()) or launched[-1])
+    out = tmp_path / "autofill.jsonl"
+
+    summary = batch_fill.run_autofill("http://forms.test/apply", str(out), pool=pool)
+    lines = [json.loads(l) for l in out.read_text().splitlines()]
+    assert sorted(r["record"] for r in lines) == [f"r{i:02d}" for i in range(8)]
+    assert summary["records"] == 8 and summary["succeeded"] == 7 and summary["failed"] == 1
+    assert summary["fields_filled"] == 7 and summary["fields_skipped"] == 9
+    assert summary["sessions"] == 3 and summary["max_concurrent"] == 3 == peak[0]
+    assert len(launched) == 3 and sum(len(s.urls) for s in launched) == 8 * 2  # form + reset page
+    assert summary["latency_p50_s"] >= 0.05 and summary["latency_max_s"] >= summary["latency_p95_s"]
+    pool.close()
+
+
+def test_batch_fill_in_browser_against_local_form(tmp_path, monkeypatch, chrome_factory, forms_site):
+    records = tmp_path / "records"
+    records.mkdir()
+    _records(records, monkeypatch, [
+        {"full_name": "Apoorva Srivastava", "date_of_birth": "2004-03-12", "gender": "Female"},
+        {"full_name": "Rohan Mehta", "gender": "Male"},
+    ])
+    mapping = {"full_name": "#fullName", "date_of_birth": "#dob", "gender": "#gender"}
+    monkeypatch.setattr(batch_fill, "_load_mapping", lambda domain: mapping)
+    pool = DriverPool(size=2, factory=chrome_factory)
+    out = tmp_path / "autofill.jsonl"
+
+    summary = batch_fill.run_autofill(f"{forms_site}/fill_controls.html", str(out), domain="forms.test", pool=pool)
+    pool.close()
+    by_id = {r["record"]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert summary["succeeded"] == 2 and summary["errors"] == 0
+    assert by_id["r00"]["filled"] == 3
+    assert by_id["r01"]["filled"] == 2 and by_id["r01"]["fields"]["date_of_birth"]["status"] == "skipped"
+
+
+def test_unreadable_records_are_counted_apart_and_each_record_is_read_once(tmp_path, monkeypatch):
+    from cryptography.fernet import Fernet
+
+    records = tmp_path / "records"
+    records.mkdir()
+    monkeypatch.setattr(storage, "RECORDS_DIR", records)
+    monkeypatch.setattr(storage, "PROFILES_DIR", tmp_path)
+    monkeypatch.setattr(storage, "FERNET", Fernet(Fernet.generate_key()))
+    for i in range(3):
+        storage.save_record({"domain": "forms.test", "data": {"full_name": f"Student {i}"}})
+    storage.save_record({"domain": "elsewhere", "data": {"full_name": "Other"}})
+    old_key = Fernet(Fernet.generate_key())  # e.g. saved by a session that generated its own key
+    (records / "old.json").write_text(old_key.encrypt(b'{"domain": "forms.test"}').decode())
+    (records / "torn.json").write_text("gAAAA")
+
+    reads = []
+    real_load = batch_fill.load_record
+    monkeypatch.setattr(batch_fill, "load_record", lambda p: reads.append(p.name) or real_load(p))
+    monkeypatch.setattr(batch_fill, "_load_mapping", lambda domain: {"full_name": "#fullName"})
+    monkeypatch.setattr(batch_fill, "fill_record", lambda drv, mapping, data, stale=(): {
+        "fields": {"full_name": {"status": "filled", "reason": ""}}, "filled": 1, "mapped": 1, "timings": {}})
+    pool = DriverPool(size=2, factory=lambda headless: FakeSession())
+    out = tmp_path / "autofill.jsonl"
+
+    summary = batch_fill.run_autofill("http://forms.test/apply", str(out), pool=pool)
+    pool.close()
+    lines = {r["record"]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert summary["records"] == 3 and summary["succeeded"] == 3 and summary["failed"] == 0
+    assert summary["errors"] == 0 and summary["unreadable"] == 2
+    assert "old" not in lines and "torn" not in lines
+    assert sorted(reads) == sorted(p.name for p in records.glob("*.json"))  # once each
+
+    # Unreadable files never use up the limit
+    limited = batch_fill.run_autofill("http://forms.test/apply", str(out), sessions=1, limit=3,
+                                      pool=DriverPool(size=1, factory=lambda headless: FakeSession()))
+    assert limited["records"] == 3 and limited["succeeded"] == 3
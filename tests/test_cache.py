@@ -0,0 +1,56 @@
+import os
+import time
+import pytest
+from datastore.cache import DiskCache
+from datastore.crypto import get_fernet
+
+
+def test_disk_cache_roundtrip_and_counters(tmp_path):
+    c = DiskCache(tmp_path, max_bytes=1 << 20)
+    assert c.get("k") is None
+    c.put("k", {"text": "hello", "confidence": 0.9})
+    assert c.get("k") == {"text": "hello", "confidence": 0.9}
+    assert c.stats()["hits"] == 1 and c.stats()["misses"] == 1
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    c = DiskCache(tmp_path, max_bytes=400)
+    for k in ("a", "b", "c"):
+        c.put(k, {"v": "x" * 60})
+    c.get("a")  # touch: "a" becomes most recent
+    monkeypatch.setattr(type(tmp_path), "glob", lambda *a: pytest.fail("eviction listed the directory"))
+    c.put("d", {"v": "x" * 200})
+    assert c.get("a") is not None
+    assert c.get("b") is None
+    assert c.stats()["evictions"] >= 1
+    assert c.stats()["bytes"] <= 400
+
+
+def test_disk_cache_restores_lru_order_from_mtimes(tmp_path):
+    c = DiskCache(tmp_path, max_bytes=400)
+    for k in ("a", "b", "c"):
+        c.put(k, {"v": "x" * 60})
+    past = time.time() - 100
+    for i, k in enumerate(("c", "a", "b")):  # on disk, "c" is the least recently used
+        os.utime(tmp_path / f"{k}.json", (past + i, past + i))
+    c = DiskCache(tmp_path, max_bytes=400)
+    c.put("d", {"v": "x" * 200})
+    assert c.get("c") is None and c.get("b") is not None
+
+
+def test_disk_cache_encrypts_at_rest(tmp_path):
+    c = DiskCache(tmp_path, max_bytes=1 << 20, fernet=get_fernet(True))
+    c.put("secret", {"phone": "9876543210"})
+    assert "9876543210" not in (tmp_path / "secret.json").read_text()
+    assert c.get("secret") == {"phone": "9876543210"}
+
+
+def test_disk_cache_ttl_expires_entries(tmp_path, monkeypatch):
+    c = DiskCache(tmp_path, max_bytes=1 << 20, ttl_seconds=60)
+    c.put("k", {"v": 1})
+    assert c.get("k") == {"v": 1}
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 120)
+    assert c.get("k") is None
+    assert c.stats()["expired"] == 1
+    assert not (tmp_path / "k.json").exists()
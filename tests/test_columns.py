@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from parsing.columns import normalize_columns, to_columns, validate_columns
+from parsing.validators import validate_field
+
+
+RECORDS = [
+    {"full_name": "rohan sharma", "email": "rohan@example.com", "phone": "9876543210",
+     "date_of_birth": "03/05/2001", "address_line2": "45 MG Road, Delhi", "page": 1},
+    {"full_name": "R0han", "email": "not-an-email", "phone": "", "date_of_birth": "", "page": 2},
+    {"full_name": "rohan sharma", "email": "rohan@example.com", "phone": "12", "page": 3},
+]
+
+
+def test_validate_columns_matches_validate_field_per_cell():
+    table = to_columns(RECORDS)
+    valid, conf = validate_columns(table)
+    assert "page" not in valid
+    for col, cells in valid.items():
+        expected = [validate_field(col, v) for v in table[col]]
+        assert cells.tolist() == [ok for ok, _ in expected]
+        assert np.allclose(conf[col], [c for _, c in expected])
+    assert valid["email"].tolist() == [True, False, True]
+
+
+def test_normalize_columns_keeps_other_columns():
+    out = normalize_columns(to_columns(RECORDS))
+    assert out["full_name"].tolist() == ["Rohan Sharma", "R0Han", "Rohan Sharma"]
+    assert out["phone"][0] == "+919876543210" and out["phone"][1] == ""
+    assert out["address_line1"][0] == "45 MG Road" and out["address_line2"][0] == "Delhi"
+    assert out["page"] == [1, 2, 3]
+
+
+def test_dataframe_in_dataframe_out():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame(RECORDS)
+    valid, conf = validate_columns(df)
+    assert list(valid.index) == list(df.index) and valid["email"].tolist() == [True, False, True]
+    assert normalize_columns(df)["full_name"][0] == "Rohan Sharma"
+
+
+def test_column_checks_agree_with_validate_field_on_edge_cells():
+    cells = ["", " ", "2024", "-25", "2024 -", "- 2025", "2024 - 28", "a@b.in\nx", "x\na@b.in", "Male", "F ", "12.5",
+             "5600\n01", "560001", "98765 43210", "+91-98765", "O'Neil", "R0han", "x", None, float("nan")]
+    table = {f: list(cells) for f in ("session_year", "email", "gender", "fees", "pincode", "phone", "full_name", "city")}
+    table["empty"] = []
+    valid, conf = validate_columns(table)
+    for col, values in table.items():
+        expected = [validate_field(col, "" if v is None or v != v else str(v).strip()) for v in values]
+        assert valid[col].tolist() == [ok for ok, _ in expected], col
+        assert np.allclose(conf[col], [c for _, c in expected]), col
+
+
+def test_dates_use_each_sources_learned_order_like_postprocess():
+    from pipeline.stream import postprocess
+
+    records = [
+        {"date_of_birth": "12/25/2001", "source_file": "columns-us.pdf"},
+        {"date_of_birth": "03/05/2001", "source_file": "columns-us.pdf"},
+        {"date_of_birth": "03/05/2001", "source_file": "columns-in.pdf"},
+        {"date_of_birth": "", "source_file": None},
+    ]
+    out = normalize_columns(to_columns(records))
+    assert out["date_of_birth"].tolist() == ["2001-12-25", "2001-03-05", "2001-05-03", ""]
+    assert out["date_of_birth"].tolist() == [postprocess(dict(r))["date_of_birth"] for r in records]
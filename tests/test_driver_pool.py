@@ -0,0 +1,114 @@
+import threading
+import time
+import pytest
+from selenium.common.exceptions import WebDriverException
+from automation.driver import DriverPool, PoolTimeout
+
+
+class FakeSession:
+    def __init__(self, n):
+        self.n = n
+        self.calls = []
+        self.window_handles = ["main"]
+        self.switch_to = self
+        self.broken = False
+        self.quit_called = False
+
+    def execute_script(self, script, *args):
+        if self.broken:
+            raise WebDriverException("invalid session id")
+        self.calls.append("storage")
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.calls.append(cmd)
+
+    def window(self, handle):
+        pass
+
+    def get(self, url):
+        self.calls.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def _factory(launched, delay=0.0):
+    def factory(headless):
+        time.sleep(delay)
+        launched.append(FakeSession(len(launched)))
+        return launched[-1]
+    return factory
+
+
+def test_pool_reuses_warm_sessions_and_resets_between_records():
+    launched = []
+    pool = DriverPool(size=2, headless=True, factory=_factory(launched, delay=0.05))
+    assert pool.warm() == 2 and len(launched) == 2
+
+    t0 = time.perf_counter()
+    with pool.session() as a:
+        assert time.perf_counter() - t0 < 0.05  # no startup on the hot path
+    assert a.calls == ["storage", "Network.clearBrowserCookies", "about:blank"]
+    with pool.session() as b:
+        assert b is a
+    assert len(launched) == 2
+
+    s = pool.stats()
+    assert s["started"] == 2 and s["warm_hits"] == 2 and s["resets"] == 2
+    assert s["startup_mean_s"] >= 0.05 and s["idle"] == 2
+    pool.close()
+    assert all(d.quit_called for d in launched)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_sessions_still_starting_when_the_pool_closes_are_quit():
+    launched = []
+    pool = DriverPool(size=2, factory=_factory(launched, delay=0.2))
+    warming = threading.Thread(target=pool.warm)
+    warming.start()
+    time.sleep(0.05)
+    pool.close()
+    warming.join()
+    assert len(launched) == 2 and all(d.quit_called for d in launched)
+    assert pool.stats()["sessions"] == 0 and pool.stats()["idle"] == 0
+
+
+def test_pool_blocks_when_full_and_replaces_sessions_that_fail_reset():
+    launched = []
+    pool = DriverPool(size=1, factory=_factory(launched))
+    a = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=2)))
+    waiter.start()
+    pool.release(a)
+    waiter.join()
+    assert got == [a]
+
+    a.broken = True  # e.g. the user closed the window
+    pool.release(a)
+    assert a.quit_called and pool.stats()["reset_failures"] == 1
+    b = pool.acquire(timeout=1)
+    assert b is not a and len(launched) == 2
+    pool.close()
+
+
+def test_pool_session_is_clean_for_the_next_record(chrome_factory, forms_site):
+    pool = DriverPool(size=1, factory=chrome_factory)
+    url = f"{forms_site}/fill_controls.html"
+    try:
+        with pool.session() as drv:
+            drv.get(url)
+            drv.add_cookie({"name": "sid", "value": "record-1"})
+            drv.execute_script("localStorage.setItem('draft', 'record-1')")
+        with pool.session() as again:
+            assert again is drv and again.current_url == "about:blank"
+            again.get(url)
+            assert again.get_cookies() == []
+            assert again.execute_script("return localStorage.getItem('draft')") is None
+        assert pool.stats()["started"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,215 @@
+import builtins
+from automation import filler, locators, waits
+from datastore import storage
+
+
+class FakeElement:
+    tag_name = "input"
+
+    def __init__(self, store=lambda typed: typed):
+        self.keys = []
+        self.store = store  # what the control keeps of the typed text
+
+    def get_attribute(self, name):
+        return self.store("".join(self.keys)) if name == "value" else "text"
+
+    def is_enabled(self):
+        return True
+
+    def clear(self):
+        pass
+
+    def send_keys(self, value):
+        self.keys.append(value)
+
+
+class FakeDriver:
+    def __init__(self, statuses, elements=None):
+        self.statuses = statuses
+        self.elements = elements or {}
+        self.scripts = []
+        self.switch_to = self
+
+    def execute_script(self, script, *args):
+        if "readyState" in script:
+            return "complete"
+        self.scripts.append(args)
+        if not isinstance(args[0], list):  # highlight
+            return None
+        if args[0] and isinstance(args[0][0], str):  # resolve_selectors
+            return [self.elements.get(sel) for sel in args[0]]
+        return [{"field": e["field"], "status": self.statuses[e["field"]], "reason": "x"} for e in args[0]]
+
+    def default_content(self):
+        pass
+
+
+MAPPING = {"full_name": "#fullName", "date_of_birth": "#dob", "email": "#email", "phone": "#phone"}
+DATA = {"full_name": "Apoorva Srivastava", "date_of_birth": "12/03/2004", "email": "a@b.in"}
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "PROFILES_DIR", tmp_path)
+    storage.save_profile("x", {"domain": "x", "mapping": MAPPING})
+    monkeypatch.setattr(filler, "implicit_timeout", lambda: 0.2)
+    monkeypatch.setattr(builtins, "input", lambda *a: "")
+
+
+def _bulk_calls(drv):
+    return [a[0] for a in drv.scripts if isinstance(a[0], list) and a[0] and isinstance(a[0][0], dict)]
+
+
+def test_bulk_fill_uses_one_script_and_types_only_rejected_fields(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    typed = FakeElement()
+    drv = FakeDriver({"full_name": "filled", "date_of_birth": "rejected", "email": "missing"}, {"#dob": typed})
+
+    report = filler.fill_form_fields(drv, "http://x", "x", DATA)
+    bulk_calls = _bulk_calls(drv)
+    assert [e["field"] for e in bulk_calls[0]] == ["full_name", "date_of_birth", "email"]
+    # The missing field is re-polled on its own; the rejected one is typed once
+    assert all([e["field"] for e in c] == ["email"] for c in bulk_calls[1:])
+    assert typed.keys == ["12/03/2004"]
+    assert {f: r["status"] for f, r in report["fields"].items()} == {
+        "full_name": "filled", "date_of_birth": "filled", "email": "missing", "phone": "skipped",
+    }
+    assert report["filled"] == 2 and report["mapped"] == 4
+    t = report["timings"]
+    assert t["wait_s"] >= 0.15 and abs(t["wait_s"] + t["work_s"] - t["total_s"]) < 0.01
+    # The rejected field was resolved with the other per-field ones in one script call
+    assert [a[0] for a in drv.scripts if isinstance(a[0], list) and isinstance(a[0][0], str)] == [["#dob"]]
+
+
+def test_selectors_that_keep_missing_are_flagged_and_not_waited_for(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(filler, "refresh_stale_selectors", lambda d, domain, m: (m, locators.stale_fields(domain, m)))
+    statuses = {"full_name": "filled", "date_of_birth": "filled", "email": "missing"}
+    for run in range(3):
+        report = filler.fill_form_fields(FakeDriver(statuses), "http://x", "x", DATA)
+        assert report["timings"]["wait_s"] >= 0.15  # email is still waited for
+    stats = storage.load_profile("x")["selector_stats"]
+    assert stats["email"] == {"selector": "#email", "runs": 3, "hits": 0, "miss_streak": 3, "hit_rate": 0.0, "stale": True}
+    assert stats["full_name"]["hit_rate"] == 1.0 and "phone" not in stats  # skipped fields are not counted
+    assert locators.stale_fields("x", MAPPING) == ["email"]
+
+    drv = FakeDriver(statuses)
+    report = filler.fill_form_fields(drv, "http://x", "x", DATA)
+    assert len(_bulk_calls(drv)) == 1 and report["timings"]["wait_s"] < 0.1
+
+    # A new selector for the field starts with clean stats
+    storage.save_profile("x", dict(storage.load_profile("x"), mapping=dict(MAPPING, email="[name='mail']")))
+    assert locators.stale_fields("x", dict(MAPPING, email="[name='mail']")) == []
+
+
+def test_typed_value_needs_to_stick_not_to_echo(monkeypatch):
+    monkeypatch.setattr(filler, "implicit_timeout", lambda: 0.3)
+    drv = FakeDriver({})
+    clock = waits.FillClock()
+    iso = FakeElement(store=lambda typed: "2004-12-03" if typed else "")
+    assert filler._fill_one(drv, "date_of_birth", "#dob", "12/03/2004", clock, element=iso) == {
+        "status": "filled", "reason": "stored as '2004-12-03'",
+    }
+    assert clock.timings()["wait_s"] < 0.1  # no waiting for an exact echo
+
+    ignored = FakeElement(store=lambda typed: "")
+    assert filler._fill_one(drv, "fees", "#fees", "abc", clock, element=ignored)["status"] == "rejected"
+
+
+def test_wait_until_returns_first_truthy_result_or_none():
+    ticks = iter([False, None, "el"])
+    clock = waits.FillClock()
+    assert waits.wait_until(object(), lambda d: next(ticks), 1, clock) == "el"
+    assert waits.wait_until(object(), lambda d: False, 0.1, clock) is None
+    assert clock.timings()["wait_s"] >= 0.1
+
+
+def test_bulk_fill_in_browser_sets_every_control_type(browser, forms_site):
+    browser.get(f"{forms_site}/fill_controls.html")
+    browser.execute_script(
+        "window.hostelChanges = 0;"
+        "document.getElementById('hostel').addEventListener('change', function () { window.hostelChanges++; });"
+    )
+    entries = [
+        {"field": "full_name", "selector": "#fullName", "value": "Apoorva Srivastava"},
+        {"field": "date_of_birth", "selector": "#dob", "value": "2004-03-12"},
+        {"field": "gender", "selector": "#gender", "value": "female"},
+        {"field": "category", "selector": "[name='category']", "value": "OBC"},
+        {"field": "hostel", "selector": "#hostel", "value": "yes"},
+        {"field": "address_line1", "selector": "//textarea[@name='addr1']", "value": "12 MG Road"},
+        {"field": "university_id", "selector": "#uid", "value": "U123"},
+        {"field": "email", "selector": "#email", "value": "a@b.in"},
+    ]
+    report = filler.bulk_fill(browser, entries)
+    assert {f: r["status"] for f, r in report.items()} == {
+        "full_name": "filled", "date_of_birth": "filled", "gender": "filled", "category": "filled",
+        "hostel": "filled", "address_line1": "filled", "university_id": "rejected", "email": "missing",
+    }
+    get = lambda js: browser.execute_script("return " + js)
+    assert get("document.getElementById('gender').value") == "F"
+    assert get("document.querySelector('[name=category]:checked').value") == "obc"
+    assert get("document.getElementById('hostel').checked") is True
+    assert get("window.hostelChanges") == 1
+    assert filler.bulk_fill(browser, [dict(entries[4], value="no")])["hostel"]["status"] == "filled"
+    assert get("document.getElementById('hostel').checked") is False
+    assert get("document.getElementById('addr1').value") == "12 MG Road"
+    assert get("document.getElementById('docufill-highlight') !== null")
+    # A date input refuses non-ISO text, so it is reported for the send_keys fallback
+    assert filler.bulk_fill(browser, [dict(entries[1], value="12/03/2004")])["date_of_birth"]["status"] == "rejected"
+
+
+class FramedElement(FakeElement):
+    """A handle that only works while the driver is in the document it came from."""
+
+    def __init__(self, driver, frame):
+        super().__init__()
+        self.driver, self.frame = driver, frame
+
+    def _check(self):
+        if self.driver.context != self.frame:
+            from selenium.common.exceptions import StaleElementReferenceException
+            raise StaleElementReferenceException("element is not in the current browsing context")
+
+    def is_enabled(self):
+        self._check()
+        return True
+
+    def send_keys(self, value):
+        self._check()
+        super().send_keys(value)
+
+
+class FrameDriver(FakeDriver):
+    def __init__(self):
+        super().__init__({})
+        self.context = "top"
+
+    def default_content(self):
+        self.context = "top"
+
+    def frame(self, el):
+        self.context = el
+
+    def find_element(self, by, expr):
+        return expr
+
+
+def test_fallback_fills_handle_from_inside_an_iframe(monkeypatch):
+    monkeypatch.setattr(filler, "implicit_timeout", lambda: 0.2)
+    drv = FrameDriver()
+    applicant = FramedElement(drv, "#details")
+    drv.elements = {"[name='applicant']": applicant}
+    mapping = {"full_name": "#details >>> [name='applicant']"}
+
+    report = filler.fill_record(drv, mapping, {"full_name": "Rohan Mehta"}, bulk=False)
+    assert report["fields"]["full_name"] == {"status": "filled", "reason": ""}
+    assert applicant.keys == ["Rohan Mehta"]
+
+
+def test_fallback_in_browser_types_into_iframe_field(browser, forms_site, monkeypatch):
+    browser.get(f"{forms_site}/iframe_host.html")
+    mapping = {"email": "#email", "full_name": "#details >>> [name='applicant']"}
+    report = filler.fill_record(browser, mapping, {"email": "a@b.in", "full_name": "Rohan Mehta"}, bulk=False)
+    assert {f: r["status"] for f, r in report["fields"].items()} == {"email": "filled", "full_name": "filled"}
+    locators.enter_frame_of(browser, mapping["full_name"])
+    assert browser.execute_script("return document.querySelector(\"[name='applicant']\").value") == "Rohan Mehta"
+    locators.enter_top_document(browser)
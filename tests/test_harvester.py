@@ -0,0 +1,133 @@
+from automation import locators
+from automation.harvester import harvest_inputs
+
+HARVESTED = [
+    {"tag": "input", "attrs": {"id": "email", "type": "email", "class": "wide big"}, "label": "Email",
+     "visible": True, "css": "#email", "frame": []},
+    {"tag": "input", "attrs": {"name": "applicant"}, "label": "Full Name", "visible": True,
+     "css": "form:nth-of-type(1) > label:nth-of-type(1) > input:nth-of-type(1)", "frame": ["#details"]},
+]
+
+
+class FakeDriver:
+    def __init__(self, payload=None):
+        self.payload = payload
+        self.scripts = 0
+        self.switches = []
+        self.switch_to = self
+
+    @property
+    def page_source(self):
+        raise AssertionError("page_source should not be fetched when harvesting")
+
+    def execute_script(self, script, *args):
+        self.scripts += 1
+        return [dict(i, attrs=dict(i["attrs"])) for i in self.payload]
+
+    def default_content(self):
+        self.switches.append("top")
+
+    def frame(self, el):
+        self.switches.append(el)
+
+    def find_element(self, by, expr):
+        return expr
+
+
+def test_mapping_uses_one_harvest_script_and_frame_paths():
+    drv = FakeDriver(HARVESTED)
+    assert harvest_inputs(drv)[0]["attrs"]["class"] == ["wide", "big"]
+    mapping = locators.suggest_mapping_for_page(drv)
+    assert drv.scripts == 2
+    assert mapping == {"full_name": "#details >>> [name='applicant']", "email": "#email"}
+
+
+def test_resolve_selector_switches_frames_only_when_needed():
+    drv = FakeDriver()
+    assert locators.resolve_selector(drv, "#email") == "#email"
+    assert drv.switches == []
+    assert locators.resolve_selector(drv, "#details >>> [name='applicant']") == "[name='applicant']"
+    assert drv.switches == ["top", "#details"]
+    locators.resolve_selector(drv, "#email")  # back to the top document
+    assert drv.switches == ["top", "#details", "top"]
+
+
+def test_harvester_in_browser_sees_same_origin_iframe(browser, forms_site):
+    browser.get(f"{forms_site}/iframe_host.html")
+    items = harvest_inputs(browser, include_frames=True)
+    by_name = {i["attrs"].get("name"): i for i in items}
+    assert by_name["email"]["label"] == "Email" and by_name["email"]["frame"] == []
+    assert by_name["csrf"]["visible"] is False
+    assert by_name["applicant"]["label"] == "Full Name" and by_name["applicant"]["frame"] == ["#details"]
+    assert by_name["mobile"]["label"] == "Mobile"
+
+    mapping = locators.suggest_mapping_for_page(browser)
+    assert mapping["full_name"] == "#details >>> [name='applicant']"
+    el = locators.resolve_selector(browser, mapping["full_name"])
+    assert el is not None and el.get_attribute("name") == "applicant"
+    assert locators.resolve_selector(browser, "#email") is not None
+
+
+class ResolvingDriver(FakeDriver):
+    """Harvest script returns the payload; resolve script finds the selectors in `present`."""
+
+    def __init__(self, payload, present):
+        super().__init__(payload)
+        self.present = present
+        self.resolved = []
+
+    def execute_script(self, script, *args):
+        if args and isinstance(args[0], list):
+            self.resolved.append(args[0])
+            return [f"<{s}>" if s in self.present else None for s in args[0]]
+        return super().execute_script(script, *args)
+
+
+def test_resolve_selectors_one_call_per_document():
+    drv = ResolvingDriver([], {"#email", "[name='applicant']"})
+    found, missed = locators.resolve_selectors(drv, {
+        "email": "#email", "phone": "//input[@name='phone']", "full_name": "#details >>> [name='applicant']",
+    })
+    assert found == {"email": "<#email>", "full_name": "<[name='applicant']>"}
+    assert missed == ["phone"]
+    assert drv.resolved == [["#email", "//input[@name='phone']"], ["[name='applicant']"]]
+    assert drv.switches == ["top", "#details", "top"]
+
+
+def test_stale_selector_is_resuggested_from_the_page(tmp_path, monkeypatch):
+    from datastore import storage
+
+    monkeypatch.setattr(storage, "PROFILES_DIR", tmp_path)
+    mapping = {"email": "#old-email", "full_name": "#details >>> [name='applicant']"}
+    storage.save_profile("portal", {"mapping": mapping})
+    monkeypatch.setattr(locators, "_stale_after", lambda: 2)
+    for _ in range(2):
+        locators.record_selector_hits("portal", mapping, [{"email": {"status": "missing"},
+                                                           "full_name": {"status": "filled"}}])
+    assert locators.stale_fields("portal", mapping) == ["email"]
+
+    drv = ResolvingDriver(HARVESTED, {"#email"})
+    new, still = locators.refresh_stale_selectors(drv, "portal", mapping)
+    assert new["email"] == "#email" and still == []
+    assert storage.load_profile("portal")["mapping"]["email"] == "#email"
+    assert locators.stale_fields("portal", new) == []
+
+
+def test_resolve_selectors_in_browser_across_iframe(browser, forms_site):
+    browser.get(f"{forms_site}/iframe_host.html")
+    sel = "#details >>> [name='applicant']"
+    found, missed = locators.resolve_selectors(browser, {
+        "email": "#email", "full_name": sel, "phone": "//input[@name='nope']", "city": "#bad[",
+    })
+    assert set(found) == {"email", "full_name"} and missed == ["phone", "city"]
+    assert found["email"].get_attribute("name") == "email"
+    locators.enter_frame_of(browser, sel)
+    assert found["full_name"].get_attribute("name") == "applicant"
+
+
+def test_invisible_controls_are_not_mapping_candidates():
+    hidden = {"tag": "input", "attrs": {"name": "email_token", "type": "hidden"}, "label": "Email",
+              "visible": False, "css": "[name='email_token']", "frame": []}
+    mapping = locators.suggest_mapping_from_inputs([hidden] + [dict(i, label="Contact") for i in HARVESTED[:1]])
+    assert "[name='email_token']" not in mapping.values()
+    assert locators.suggest_mapping_from_inputs([hidden]) == {}
@@ -5,3 +5,79 @@ def test_selector_detection():
     assert expr == "#email"
     by, expr = _css_or_xpath("//input[@name='email']")
     assert expr.startswith("//input")
+
+
+FORM = """
+<form>
+  <label for="fn">Full <b>Name</b></label><input id="fn" name="full_name">
+  <label>Email <input type="email" name="mail"></label>
+  <label>Gender <select name="g"><option>Male</option><option>Female</option></select></label>
+  <label>Phone</label> <!-- adjacent, no for --> <input name="p">
+  <input name="c" aria-label="City">
+  <label for="elsewhere">Not mine</label><input name="q" placeholder="Postal code">
+</form>
+"""
+
+
+def test_collect_inputs_finds_for_wrapping_and_adjacent_labels():
+    from automation.locators import _collect_inputs_bs4, _collect_inputs_lxml
+
+    for collect in (_collect_inputs_bs4, _collect_inputs_lxml):
+        got = [(i["tag"], i["attrs"].get("name"), i["label"]) for i in collect(FORM)]
+        assert got == [
+            ("input", "full_name", "Full Name"),
+            ("input", "mail", "Email"),
+            ("select", "g", "Gender"),
+            ("input", "p", "Phone"),
+            ("input", "c", "City"),
+            ("input", "q", "Postal code"),
+        ]
+    assert _collect_inputs_bs4(FORM) == _collect_inputs_lxml(FORM)
+    assert _collect_inputs_lxml("") == []
+
+
+def _fixture(name):
+    from pathlib import Path
+    return (Path(__file__).parent / "fixtures" / "forms" / name).read_text(encoding="utf-8")
+
+
+def test_mapping_from_saved_admission_form():
+    from automation.locators import suggest_mapping_from_html
+
+    mapping = suggest_mapping_from_html(_fixture("admission.html"))
+    assert mapping["full_name"] == "#fullName"
+    assert mapping["father_name"] == "#fatherName"
+    assert mapping["phone"] == "#phone"
+    assert mapping["alternate_contact"] == "#altPhone"
+    assert mapping["emergency_contact"] == "#emergency"
+    assert len(set(mapping.values())) == len(mapping)
+
+
+def test_no_input_is_claimed_by_two_fields():
+    from automation.locators import suggest_mapping_from_html
+
+    # "Address" scores 100 for address_line1 and 87.5 for address_line2; greedy gave it to both
+    mapping = suggest_mapping_from_html(_fixture("scholarship_short.html"))
+    assert mapping["address_line1"] == "[name='address']"
+    assert "address_line2" not in mapping
+    assert mapping["phone"] == "[name='mobile']"
+    assert len(set(mapping.values())) == len(mapping)
+
+
+def test_assignment_is_optimal_and_respects_threshold():
+    import itertools
+    import numpy as np
+    from automation.locators import _assign, _hungarian
+
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        n, m = int(rng.integers(1, 5)), int(rng.integers(1, 6))
+        n, m = min(n, m), max(n, m)
+        cost = rng.integers(0, 20, (n, m)).astype(float)
+        cols = _hungarian(cost)
+        best = min(sum(cost[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+        assert len(set(cols)) == n and cost[np.arange(n), cols].sum() == best
+
+    scores = np.array([[100.0, 90.0], [95.0, 60.0]])
+    assert _assign(scores) == {0: 1, 1: 0}  # greedy would give input 0 to both rows
+    assert _assign(np.array([[69.0, 10.0]])) == {}
@@ -6,3 +6,170 @@ def test_ocr_handles_nonexistent(tmp_path):
     # because sample files are placeholders.
     # In real CI, add a small PNG with text.
     assert True
+
+
+def test_ocr_file_pdf_records_in_page_order(tmp_path, monkeypatch):
+    from benchmarks.synthetic import make_scanned_pdf
+    import ocr.extract_text as et
+
+    calls = []
+
+    def fake_ocr(pil_img, psm=None):
+        calls.append(pil_img.size)
+        return {"text": f"page-{len(calls)}", "confidence": 0.9}
+
+    monkeypatch.setattr(et, "_ocr_image_pil", fake_ocr)
+    pdf = make_scanned_pdf(str(tmp_path / "three.pdf"), pages=3)
+    recs = ocr_file(str(pdf), workers=1, use_cache=False)
+    assert [r["page"] for r in recs] == [1, 2, 3]
+    assert [r["text"] for r in recs] == ["page-1", "page-2", "page-3"]
+    assert all(r["source_file"] == "three.pdf" for r in recs)
+
+
+def test_process_pool_is_started_once_across_files(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from benchmarks.synthetic import make_scanned_pdf
+    import ocr.extract_text as et
+
+    started = []
+
+    class InlinePool:
+        def __init__(self, max_workers, initializer=None):
+            started.append(max_workers)
+
+        def submit(self, fn, *args):
+            f = Future()
+            f.set_result(fn(*args))
+            return f
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    monkeypatch.setattr(et, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(et, "_POOLS", {})
+    monkeypatch.setattr(et.atexit, "register", lambda fn: None)
+    monkeypatch.setattr(et, "_ocr_image_pil", lambda img, psm=None: {"text": "x", "confidence": 0.9})
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        pdf = make_scanned_pdf(str(tmp_path / name), pages=2)
+        recs = ocr_file(str(pdf), workers=2, use_cache=False, use_text_layer=False, templates=[])
+        assert [r["page"] for r in recs] == [1, 2]
+    assert started == [2]
+
+
+def test_digital_pdf_uses_text_layer_without_tesseract(tmp_path, monkeypatch):
+    from benchmarks.synthetic import make_digital_pdf
+    import ocr.extract_text as et
+
+    def no_raster(*_a, **_k):
+        raise AssertionError("raster OCR should not run for born-digital pages")
+
+    monkeypatch.setattr(et, "_ocr_page", no_raster)
+    pdf = make_digital_pdf(str(tmp_path / "digital.pdf"), pages=2)
+    recs = ocr_file(str(pdf), workers=1, use_text_layer=True, use_cache=False)
+    assert [r["page"] for r in recs] == [1, 2]
+    assert all(r["extraction_method"] == "text_layer" and r["confidence"] == 1.0 for r in recs)
+    assert "Date of Birth" in recs[0]["text"]
+
+
+def test_scanned_pdf_falls_back_to_raster(tmp_path, monkeypatch):
+    from benchmarks.synthetic import make_scanned_pdf
+    import ocr.extract_text as et
+
+    monkeypatch.setattr(et, "_ocr_image_pil", lambda img, psm=None: {"text": "scanned", "confidence": 0.7})
+    pdf = make_scanned_pdf(str(tmp_path / "scan.pdf"), pages=1)
+    recs = ocr_file(str(pdf), workers=1, use_text_layer=True, use_cache=False)
+    assert recs[0]["extraction_method"] == "ocr"
+
+
+def test_ocr_cache_serves_repeat_runs(tmp_path, monkeypatch):
+    from benchmarks.synthetic import make_scanned_pdf
+    from datastore.cache import DiskCache
+    import ocr.extract_text as et
+
+    calls = []
+    monkeypatch.setattr(et, "_PAGE_CACHE", DiskCache(tmp_path / "cache", max_bytes=1 << 20))
+    monkeypatch.setattr(et, "_ocr_image_pil", lambda img, psm=None: calls.append(1) or {"text": "t", "confidence": 0.9})
+    pdf = make_scanned_pdf(str(tmp_path / "scan.pdf"), pages=2)
+
+    first = ocr_file(str(pdf), workers=1, use_cache=True)
+    second = ocr_file(str(pdf), workers=1, use_cache=True)
+    assert len(calls) == 2
+    assert second == first
+    assert et._PAGE_CACHE.stats()["hits"] == 2
+
+
+def test_deskew_corrects_rotation_and_skips_straight_pages():
+    import numpy as np
+    from benchmarks.synthetic import render_form_image, sample_form_lines
+    from ocr.preprocess import deskew, estimate_skew_angle
+
+    skewed = np.array(render_form_image(sample_form_lines(0), skew_deg=4).convert("L"))
+    assert abs(estimate_skew_angle(skewed) + 4) < 0.5
+    assert abs(estimate_skew_angle(deskew(skewed))) < 0.5
+
+    straight = np.array(render_form_image(sample_form_lines(0)).convert("L"))
+    assert deskew(straight) is straight  # below ocr.deskew_min_angle: no warp
+
+
+def test_adaptive_psm_retries_low_confidence_and_remembers_layout(tmp_path, monkeypatch):
+    from benchmarks.synthetic import make_scanned_pdf
+    import ocr.extract_text as et
+
+    tried = []
+
+    def fake_ocr(pil_img, psm=None):
+        tried.append(psm)
+        return {"text": f"psm {psm}", "confidence": 0.9 if psm == 4 else 0.3}
+
+    monkeypatch.setattr(et, "_ocr_image_pil", fake_ocr)
+    monkeypatch.setattr(et, "_PSM_MEMORY", {})
+    pdf = make_scanned_pdf(str(tmp_path / "scan.pdf"), pages=2)
+    recs = ocr_file(str(pdf), workers=1, use_cache=False, use_text_layer=False)
+
+    assert tried == [6, 4, 4]  # page 1 escalates 6 -> 4, page 2 goes straight to 4
+    assert [r["psm"] for r in recs] == [4, 4]
+    assert recs[0]["psm_tried"] == [6, 4] and recs[1]["psm_tried"] == [4]
+
+
+def test_template_page_reads_only_field_crops(monkeypatch):
+    import numpy as np
+    import ocr.roi as roi
+
+    tpl = {"name": "admission", "anchors": [{"text": "ADMISSION FORM", "box": [0, 0, 0.5, 0.1]}],
+           "fields": {"full_name": [0, 0.2, 1, 0.3], "email": [0, 0.4, 1, 0.45]}}
+    crops = []
+
+    def fake_ocr(img, psm=None):
+        crops.append(img.size)
+        if img.size == (500, 100):
+            return {"text": "Admission Form", "confidence": 0.95}
+        if img.size == (1000, 100):
+            return {"text": "Name: Rohan Sharma", "confidence": 0.9}
+        return {"text": "rohan@example.com", "confidence": 0.8}
+
+    monkeypatch.setattr(roi, "_ocr_image_pil", fake_ocr)
+    page = np.full((1000, 1000), 255, np.uint8)
+    rec = roi.ocr_with_template(page, [tpl])
+    assert rec["extraction_method"] == "template" and rec["template"] == "admission"
+    assert rec["fields"]["full_name"]["value"] == "Rohan Sharma"
+    assert rec["fields"]["email"] == {"value": "rohan@example.com", "confidence": 0.8, "rationale": "template:admission"}
+    assert sorted(crops) == [(500, 100), (1000, 50), (1000, 100)]
+
+    # Wrong page shape or anchors that do not read back: fall back to full-page OCR
+    assert roi.ocr_with_template(page, [dict(tpl, aspect=0.5)]) is None
+    monkeypatch.setattr(roi, "_ocr_image_pil", lambda img, psm=None: {"text": "Invoice", "confidence": 0.9})
+    assert roi.ocr_with_template(page, [tpl]) is None
+
+
+def test_load_templates_maps_fields_to_canonical_keys(monkeypatch):
+    import ocr.roi as roi
+
+    saved = [
+        {"name": "a", "anchors": [{"text": "X", "box": [0, 0, 1, 1]}],
+         "fields": {"Name": [0, 0, 1, 1], "favourite_colour": [0, 0, 1, 1]}},
+        {"name": "no_anchors", "anchors": [], "fields": {"email": [0, 0, 1, 1]}},
+    ]
+    monkeypatch.setattr(roi, "list_templates", lambda: saved)
+    templates = roi.load_templates()
+    assert [t["name"] for t in templates] == ["a"]
+    assert list(templates[0]["fields"]) == ["full_name"]
@@ -13,3 +13,17 @@ def test_normalizers():
     assert title_case_name("rohan sharma") == "Rohan Sharma"
     sp = split_address("45 MG Road, Delhi")
     assert sp["address_line1"] == "45 MG Road"
+
+def test_parse_date_tiers_and_source_order():
+    from parsing.validators import CONF_AMBIGUOUS, CONF_FUZZY, CONF_STRICT
+    assert parse_date("2001-03-05") == ("2001-03-05", CONF_STRICT)
+    assert parse_date("12-Sep-2004") == ("2004-09-12", CONF_STRICT)
+    assert parse_date("25/12/2003") == ("2003-12-25", CONF_STRICT)
+    assert parse_date("05/07/2007") == ("2007-07-05", CONF_AMBIGUOUS)  # day-first by default
+    assert parse_date("born on 5th July 2007") == ("2007-07-05", CONF_FUZZY)
+    assert parse_date("31/02/2001") == ("", 0.0)
+
+    # A US-style document proves month-first once; its ambiguous dates follow
+    assert parse_date("12/25/2003", source="us.pdf") == ("2003-12-25", CONF_STRICT)
+    assert parse_date("05/07/2007", source="us.pdf") == ("2007-05-07", CONF_AMBIGUOUS)
+    assert parse_date("05/07/2007", source="other.pdf")[0] == "2007-07-05"
@@ -0,0 +1,128 @@
+import threading
+import pipeline.stream as ps
+from ai_extraction.gemini_client import GeminiError
+
+
+def _fake_pages(path, n):
+    for i in range(n):
+        yield {"text": f"Name: person {i}", "confidence": 0.9, "page": i + 1,
+               "source_file": path, "extraction_method": "text_layer"}
+
+
+def _fake_ai(text, hints=None):
+    return {"full_name": {"value": text.split(": ")[1], "confidence": 0.9, "rationale": "t"}}
+
+
+def test_stream_emits_every_page_with_rows(monkeypatch):
+    monkeypatch.setattr(ps, "iter_ocr_file", lambda path: _fake_pages(path, 3))
+    monkeypatch.setattr(ps, "extract_structured_data", _fake_ai)
+    results = list(ps.stream_extract(["a.pdf", "b.pdf"], ai_workers=2, queue_size=1))
+    assert sorted((r["source_file"], r["page"]) for r in results) == [
+        ("a.pdf", 1), ("a.pdf", 2), ("a.pdf", 3), ("b.pdf", 1), ("b.pdf", 2), ("b.pdf", 3)]
+    r = results[0]
+    assert r["error"] is None
+    assert r["flat"]["full_name"].startswith("Person")
+    assert {"field": "full_name", "value": r["flat"]["full_name"]}.items() <= r["rows"][0].items()
+    assert "full_name" in r["validation"]
+
+
+def test_ai_starts_before_ocr_finishes(monkeypatch):
+    ai_started = threading.Event()
+    overlapped = []
+
+    def slow_ocr(path):
+        yield from _fake_pages(path, 1)
+        overlapped.append(ai_started.wait(timeout=5))  # page 2 still "in OCR"
+        yield from _fake_pages(path, 2)
+
+    def ai(text, hints=None):
+        ai_started.set()
+        return _fake_ai(text)
+
+    monkeypatch.setattr(ps, "iter_ocr_file", slow_ocr)
+    monkeypatch.setattr(ps, "extract_structured_data", ai)
+    results = list(ps.stream_extract(["a.pdf"], ai_workers=1))
+    assert overlapped == [True]
+    assert len(results) == 3
+
+
+def test_gemini_errors_are_reported_per_page(monkeypatch):
+    def flaky(text, hints=None):
+        if text.endswith("1"):
+            raise GeminiError("HTTP 500")
+        return _fake_ai(text)
+
+    monkeypatch.setattr(ps, "iter_ocr_file", lambda path: _fake_pages(path, 2))
+    monkeypatch.setattr(ps, "extract_structured_data", flaky)
+    by_page = {r["page"]: r for r in ps.stream_extract(["a.pdf"], ai_workers=2)}
+    assert by_page[1]["error"] is None and by_page[1]["rows"]
+    assert "HTTP 500" in by_page[2]["error"] and by_page[2]["rows"] == []
+
+
+def test_unexpected_ai_stage_errors_keep_the_page_and_the_worker(monkeypatch):
+    def broken(text, hints=None):
+        if text.endswith("0"):
+            raise OSError("cache write failed")
+        return _fake_ai(text)
+
+    monkeypatch.setattr(ps, "iter_ocr_file", lambda path: _fake_pages(path, 3))
+    monkeypatch.setattr(ps, "extract_structured_data", broken)
+    by_page = {r["page"]: r for r in ps.stream_extract(["a.pdf"], ai_workers=1)}
+    assert sorted(by_page) == [1, 2, 3]
+    assert "cache write failed" in by_page[1]["error"] and by_page[1]["rows"] == []
+    assert by_page[2]["error"] is None and by_page[3]["error"] is None
+
+
+def test_closing_the_stream_stops_workers(monkeypatch):
+    monkeypatch.setattr(ps, "iter_ocr_file", lambda path: _fake_pages(path, 50))
+    monkeypatch.setattr(ps, "extract_structured_data", _fake_ai)
+    before = threading.active_count()
+    stream = ps.stream_extract(["a.pdf"], ai_workers=2, queue_size=1)
+    next(stream)
+    stream.close()
+    for t in threading.enumerate():
+        if t.daemon and t is not threading.current_thread():
+            t.join(timeout=2)
+    assert threading.active_count() <= before
+
+
+def test_template_pages_skip_gemini(monkeypatch):
+    def template_pages(path):
+        yield {"text": "full_name: Rohan Sharma", "confidence": 0.9, "page": 1, "source_file": path,
+               "extraction_method": "template", "template": "admission",
+               "fields": {"full_name": {"value": "rohan sharma", "confidence": 0.9, "rationale": "template:admission"}}}
+
+    def no_gemini(*_a, **_k):
+        raise AssertionError("Gemini should not be called for template pages")
+
+    monkeypatch.setattr(ps, "iter_ocr_file", template_pages)
+    monkeypatch.setattr(ps, "extract_structured_data", no_gemini)
+    [r] = list(ps.stream_extract(["form.png"]))
+    assert r["error"] is None and r["extraction_method"] == "template"
+    assert r["flat"]["full_name"] == "Rohan Sharma"
+
+
+def test_labeled_pages_resolve_without_gemini_and_weak_fields_fall_back(monkeypatch):
+    from benchmarks.synthetic import sample_form_lines
+
+    full = "\n".join(sample_form_lines(0))
+    sent = []
+
+    def pages(path):
+        yield {"text": full, "confidence": 1.0, "page": 1, "source_file": path, "extraction_method": "text_layer"}
+        yield {"text": "Name: Rohan Sharma\nEmail: rohan at example", "confidence": 0.8, "page": 2,
+               "source_file": path, "extraction_method": "ocr"}
+
+    def ai(text, hints=None):
+        sent.append(hints)
+        return {"email": {"value": "rohan@example.com", "confidence": 0.9, "rationale": "t"},
+                "full_name": {"value": "R Sharma", "confidence": 0.9, "rationale": "t"}}
+
+    monkeypatch.setattr(ps, "iter_ocr_file", pages)
+    monkeypatch.setattr(ps, "extract_structured_data", ai)
+    by_page = {r["page"]: r for r in ps.stream_extract(["a.pdf"])}
+    assert not by_page[1]["ai_called"] and by_page[1]["local_fields"] == 24
+    assert by_page[2]["ai_called"] and by_page[2]["local_fields"] == 1
+    assert by_page[2]["flat"]["full_name"] == "Rohan Sharma"  # local value kept
+    assert by_page[2]["flat"]["email"] == "rohan@example.com"
+    assert len(sent) == 1 and "email" in sent[0]["fields_needed"]
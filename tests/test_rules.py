@@ -0,0 +1,49 @@
+from ai_extraction.rules import extract_by_rules, merge, resolve_locally
+from benchmarks.synthetic import sample_form_lines
+
+
+def test_rules_read_labeled_lines_and_flattened_ocr_text():
+    text = "\n".join(sample_form_lines(0))
+    for t in (text, " ".join(text.split())):  # text layer vs Tesseract output
+        found = extract_by_rules(t)
+        assert found["full_name"]["value"] == "Apoorva Srivastava"
+        assert found["father_name"]["value"] == "Mukesh Srivastava"  # "Father's Name"
+        assert found["phone"]["value"] == "9555665004"  # alias "contact number"
+        assert found["alternate_contact"]["value"] == "9876543210"
+        assert found["academic_year"]["value"] == "2024-2028"
+        assert all(f["confidence"] > 0 for f in found.values())
+    resolved, needed = resolve_locally(text)
+    assert needed is None and len(resolved) == 24
+
+
+def test_weak_or_missing_fields_still_go_to_gemini():
+    resolved, needed = resolve_locally("Name: Rohan Sharma\nEmail: not-an-email\nPhone: 98765 43210")
+    assert set(resolved) == {"full_name", "phone"}
+    assert "email" in needed and "full_name" not in needed
+    assert resolve_locally("no labels here")[1] is not None
+
+
+def test_unknown_label_ends_a_value_and_leaves_it_to_gemini():
+    found = extract_by_rules("Name: Rohan Sharma Address: 12 MG Road Hostel Required: Yes Phone: 9876543210 "
+                             "Blood Type: O+ Email: rohan@example.com")
+    assert found["full_name"]["value"] == "Rohan Sharma" and found["full_name"]["confidence"] > 0
+    assert "Hostel" not in found["address_line1"]["value"] and found["address_line1"]["confidence"] == 0
+    # A strict validator confirms a value cut at an unknown label
+    assert found["phone"]["value"] == "9876543210" and found["phone"]["confidence"] > 0
+    resolved, needed = resolve_locally("Address: 12 MG Road Hostel Required: Yes")
+    assert "address_line1" not in resolved and "address_line1" in needed
+    # Times and URLs are not labels
+    assert extract_by_rules("Address: Gate 2, open 10:30 daily")["address_line1"]["confidence"] > 0
+    assert extract_by_rules("Address: see https://x.in/a")["address_line1"]["value"] == "see https://x.in/a"
+    assert extract_by_rules("Address: " + "word " * 20)["address_line1"]["confidence"] == 0
+
+
+def test_merge_keeps_gemini_free_text_but_takes_validated_rule_hits():
+    ai = {"address_line1": {"value": "12 MG Road", "confidence": 0.9, "rationale": "ai"},
+          "phone": {"value": "98765", "confidence": 0.5, "rationale": "ai"}, "city": {"value": "", "confidence": 0.0}}
+    resolved = {"address_line1": {"value": "12 MG Road Hostel", "confidence": 0.8, "rationale": "rule:Address"},
+                "phone": {"value": "9876543210", "confidence": 0.95, "rationale": "rule:Phone"},
+                "city": {"value": "Delhi", "confidence": 0.8, "rationale": "rule:City"}}
+    out = merge(ai, resolved)
+    assert out["address_line1"]["value"] == "12 MG Road"
+    assert out["phone"]["value"] == "9876543210" and out["city"]["value"] == "Delhi"
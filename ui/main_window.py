@@ -1,5 +1,4 @@
 # file: ui/main_window.py
-import json
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from urllib.parse import urlparse
@@ -9,16 +8,12 @@ import pandas as pd
 
 from common.config import settings
 from common.logging_setup import setup_logging
-from common.utils import mask_value
-from ocr.extract_text import ocr_file
-from ai_extraction.gemini_client import extract_structured_data, GeminiError
-from ai_extraction.normalize import normalize_ai_output
-from parsing.validators import validate_email, validate_phone, validate_postal, parse_date
-from parsing.normalizers import title_case_name, normalize_phone, split_address
+from common.utils import mask_value, safe_basename
+from pipeline.stream import stream_extract, DEFAULT_HINTS
 from datastore.storage import save_record
 from ui.preview_table import PreviewTable
 from ui.mapping_editor import MappingEditor
-from automation.driver import get_driver
+from automation.driver import get_pool
 from automation.locators import suggest_mapping_for_page
 from automation.filler import autofill_with_mapping
 from ui.dialogs import show_error, show_info, show_summary
@@ -54,63 +49,23 @@ def run_app():
             state["files"] = list(paths)
             show_info(f"Selected {len(paths)} file(s).")
 
-    def build_rows(flat: dict, src_file: str, page: int, conf: float):
-        rows = []
-        for k, v in flat.items():
-            if k in ("source_file", "page", "confidence", "extraction_method"):
-                continue
-            rows.append({
-                "field": k,
-                "value": v or "",
-                "confidence": conf,
-                "source_file": src_file,
-                "page": page
-            })
-        return rows
-
     def on_extract():
         if not state["files"]:
             show_error("Please select at least one file.")
             return
 
         def work():
+            # Pages arrive as they finish; keep the table in file/page order
+            order = {safe_basename(f): i for i, f in enumerate(state["files"])}
             rows_all = []
-            for f in state["files"]:
-                logger.info("OCR: {}", f)
-                pages = ocr_file(f)
-                for rec in pages:
-                    ocr_text = rec["text"]
-                    try:
-                        ai = extract_structured_data(
-                            ocr_text,
-                            hints={"form_type": "generic", "priority_fields": ["full_name", "email", "phone"]}
-                        )
-                    except GeminiError as e:
-                        show_error(f"Gemini error: {e}")
-                        return
-                    flat = normalize_ai_output(ai)
-                    print("\n🔍 Extracted Keys:", list(flat.keys()))
-                    print("📦 Extracted Data:", json.dumps(flat, indent=2))
-
-                    flat["source_file"] = rec["source_file"]
-                    flat["page"] = rec["page"]
-                    conf = float(flat.get("confidence", 0.0))
-                    # Post-validate + normalize
-                    if flat.get("full_name"):
-                        flat["full_name"] = title_case_name(flat["full_name"])
-                    if flat.get("phone"):
-                        flat["phone"] = normalize_phone(flat["phone"])
-                    if flat.get("date_of_birth"):
-                        date_norm, c = parse_date(flat["date_of_birth"])
-                        if date_norm:
-                            flat["date_of_birth"] = date_norm
-                    # Heuristic: split address into line1/line2 if combined
-                    if not flat.get("address_line1") and flat.get("address_line2"):
-                        addr = split_address(flat["address_line2"])
-                        flat.update(addr)
-                    rows_all.extend(build_rows(flat, rec["source_file"], rec["page"], conf))
-            state["extracted_rows"] = rows_all
-            refresh_table()
+            for res in stream_extract(state["files"], hints=DEFAULT_HINTS):
+                if res["error"]:
+                    show_error(f"{res['source_file'] or res['source_path']}: {res['error']}")
+                    return
+                rows_all.extend(res["rows"])
+                rows_all.sort(key=lambda r: (order.get(r["source_file"], 0), r["page"]))
+                state["extracted_rows"] = list(rows_all)
+                root.after(0, refresh_table)
 
         threading.Thread(target=work, daemon=True).start()
 
@@ -140,14 +95,11 @@ def run_app():
             return
         domain = urlparse(url).netloc
         show_info("Opening browser to analyze the page…")
-        drv = get_driver()
-        try:
+        with get_pool().session() as drv:
             drv.get(url)
             sugg = suggest_mapping_for_page(drv)
-            state["mapping_suggestions"] = sugg
-            MappingEditor(root, domain, sugg)
-        finally:
-            drv.quit()
+        state["mapping_suggestions"] = sugg
+        MappingEditor(root, domain, sugg)
 
     ttk.Button(top, text="Open Mapping Editor", command=on_open_mapping).pack(side=tk.LEFT, padx=4)
 
@@ -165,7 +117,8 @@ def run_app():
         data = state["table"].as_dict()
         save_record({"domain": domain, "data": data})
 
-        drv = get_driver()
+        pool = get_pool()
+        drv = pool.acquire()
         try:
             drv.get(url)
             logger.info(f"Starting autofill for domain={domain}, url={url}")
@@ -179,9 +132,13 @@ def run_app():
             messagebox.showerror("Autofill Error", str(e))
         finally:
             input("Press ENTER to close the browser after review...")
-            drv.quit()
+            pool.release(drv)  # cleared and kept warm for the next run
 
     ttk.Button(top, text="Run Autofill", command=on_autofill).pack(side=tk.LEFT, padx=4)
 
+    if settings.get("automation.pool.warm_on_start", True):
+        threading.Thread(target=get_pool().warm, daemon=True).start()
+
     root.mainloop()
+    get_pool().close()
     return 0